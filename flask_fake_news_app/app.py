@@ -1,38 +1,62 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+import time
+_import_started = time.perf_counter()
+
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, g, send_file, has_request_context
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
+import atexit
+import csv
 import os
-import re
-import string
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import PorterStemmer
-from transformers import AutoTokenizer, pipeline
-import torch
+import uuid
 import logging
-import pickle
 from model_loader import load_model, find_latest_model
-from bert_detector import create_detector
+from model_bundle import is_bundle
+from bert_detector import create_detector, add_stage_observer
+from batching import MicroBatcher, QueueFullError
+from inference_executor import InferenceExecutor, plan_threads, configure_torch_threads
+from config import get_config, STARTUP_CONFIG, INFERENCE_CONFIG, BATCH_CONFIG, MICRO_BATCH_CONFIG, RESULT_CACHE_CONFIG, PERSISTENT_CACHE_CONFIG, STATS_CONFIG, WRITE_BEHIND_CONFIG, METRICS_CONFIG, PROFILING_CONFIG, EXECUTOR_CONFIG, JOBS_CONFIG
+from result_cache import ResultCache, content_key
+from persistent_cache import PersistentResultCache
+from stats_counter import StatsAccumulator
+from write_behind import AnalysisWriter
+from pagination import keyset_paginate
+from database import engine_options, install_sqlite_pragmas
+from startup import StartupTimer, BackgroundLoader, ModelNotReadyError
+import metrics
+import profiling
+import prefork
+import jobs
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+startup_timer = StartupTimer(started=_import_started)
+startup_timer.record('imports', time.perf_counter() - _import_started)
+
 # Initialize Flask app
 app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key-here'
+app_config = get_config()
+app.config.from_object(app_config)
 
 # Database configuration
-basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(basedir, "fake_news_db.sqlite")}'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app_config)
 
 # Initialize database
 db = SQLAlchemy(app)
+with app.app_context():
+    install_sqlite_pragmas(db.engine, app_config.SQLITE_PRAGMAS)
+    logger.info(f"✅ {app_config.__name__} loaded, database backend: {db.engine.dialect.name}")
 
 # Database Models
 class NewsAnalysis(db.Model):
+    # History pages are read newest first, optionally filtered by prediction
+    __table_args__ = (
+        db.Index('ix_news_analysis_created_at', 'created_at', 'id'),
+        db.Index('ix_news_analysis_prediction_created_at', 'prediction', 'created_at', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.Text, nullable=False)
     content = db.Column(db.Text, nullable=False)
@@ -46,10 +70,13 @@ class NewsAnalysis(db.Model):
     text_length = db.Column(db.Integer, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     ip_address = db.Column(db.String(45))
+    model_version = db.Column(db.String(255), nullable=True)
+    uid = db.Column(db.String(32), unique=True, index=True, nullable=True, default=lambda: uuid.uuid4().hex)
 
     def to_dict(self):
         return {
             'id': self.id,
+            'uid': self.uid,
             'title': self.title,
             'content': self.content[:100] + '...' if len(self.content) > 100 else self.content,
             'prediction': self.prediction,
@@ -59,6 +86,30 @@ class NewsAnalysis(db.Model):
             'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
         }
 
+    def to_result(self):
+        """Rebuild the detector result stored in this row"""
+        bert_features = None
+        if self.token_diversity is not None:
+            bert_features = {
+                'token_diversity': self.token_diversity,
+                'text_length': self.text_length
+            }
+        return {
+            'prediction': self.prediction,
+            'confidence': self.confidence,
+            'fake_probability': self.fake_probability,
+            'real_probability': self.real_probability,
+            'analysis': {
+                'suspicion_patterns': self.suspicious_patterns_score,
+                'pipeline_score': self.pipeline_score,
+                'bert_features': bert_features
+            },
+            'method': 'Enhanced BERT-based Analysis'
+        }
+
+# Every worker increments this one row, so it must exist before the first flush
+STATS_ROW_ID = 1
+
 class SystemStats(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     total_analyses = db.Column(db.Integer, default=0)
@@ -66,39 +117,334 @@ class SystemStats(db.Model):
     real_detected = db.Column(db.Integer, default=0)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow)
 
-# Initialize the detector using the new BERT implementation
-logger.info("🔄 Initializing BERT-based fake news detector...")
-try:
-    # First, try to load from pickle (with CUDA fix)
-    model_path = find_latest_model("models")
-    detector = None
+class ScoringJob(db.Model):
+    """A background scoring job (see jobs.py)"""
+    __table_args__ = (
+        db.Index('ix_scoring_job_status_created_at', 'status', 'created_at'),
+    )
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    status = db.Column(db.String(10), nullable=False, default=jobs.QUEUED)
+    source = db.Column(db.String(10), nullable=False)  # 'batch' or 'file'
+    filename = db.Column(db.String(255))
+    total = db.Column(db.Integer, nullable=False)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Integer, nullable=False, default=0)
+    fake_detected = db.Column(db.Integer, nullable=False, default=0)
+    real_detected = db.Column(db.Integer, nullable=False, default=0)
+    active_seconds = db.Column(db.Float, nullable=False, default=0.0)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    owner = db.Column(db.String(255))
+    heartbeat_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    ip_address = db.Column(db.String(45))
+
+    def to_dict(self):
+        rate = jobs.throughput(self.processed, self.active_seconds)
+        remaining = self.total - self.processed
+        return {
+            'id': self.id,
+            'status': self.status,
+            'source': self.source,
+            'filename': self.filename,
+            'total': self.total,
+            'processed': self.processed,
+            'errors': self.errors,
+            'fake_detected': self.fake_detected,
+            'real_detected': self.real_detected,
+            'progress': round(self.processed / self.total, 4) if self.total else 1.0,
+            'articles_per_s': rate,
+            'eta_seconds': round(remaining / rate, 1) if rate and self.status not in jobs.FINISHED_STATES else None,
+            'attempts': self.attempts,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class ScoringJobItem(db.Model):
+    """One article of a scoring job and, once scored, its result"""
+    __table_args__ = (
+        db.Index('ix_scoring_job_item_job_position', 'job_id', 'position', unique=True),
+        db.Index('ix_scoring_job_item_job_status_position', 'job_id', 'status', 'position'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(32), db.ForeignKey('scoring_job.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.Text, nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default=jobs.ITEM_PENDING)
+    prediction = db.Column(db.String(10))
+    confidence = db.Column(db.Float)
+    fake_probability = db.Column(db.Float)
+    analysis_uid = db.Column(db.String(32))
+    error = db.Column(db.Text)
+
+    def to_dict(self):
+        return {
+            'position': self.position,
+            'title': self.title,
+            'status': self.status,
+            'prediction': self.prediction,
+            'confidence': round(self.confidence, 3) if self.confidence is not None else None,
+            'fake_probability': round(self.fake_probability, 3) if self.fake_probability is not None else None,
+            'analysis_uid': self.analysis_uid,
+            'error': self.error
+        }
+
+def _load_detector():
+    """Build the detector, preferring the newest saved model"""
+    logger.info("🔄 Initializing BERT-based fake news detector...")
+    try:
+        # First, try the latest saved model (bundle or pickle)
+        model_path = find_latest_model("models")
+        loaded = None
+        
+        if model_path:
+            model_format = 'bundle' if is_bundle(model_path) else 'pickle'
+            logger.info(f"Found saved model ({model_format}): {model_path}")
+            try:
+                loaded = load_model(model_path)
+                if loaded is not None:
+                    logger.info(f"✅ Saved model loaded successfully ({model_format})")
+                else:
+                    logger.warning(f"⚠️ Saved model loading failed ({model_format}), using direct implementation")
+            except Exception as e:
+                logger.warning(f"⚠️ Saved model loading failed ({model_format}): {e}")
+        
+        # If loading failed or no model found, use direct implementation
+        if loaded is None:
+            logger.info("🔄 Creating new BERT detector from source...")
+            loaded = create_detector()
+            logger.info("✅ BERT detector initialized successfully from source")
+            
+    except Exception as e:
+        logger.error(f"❌ Error initializing detector: {e}")
+        logger.info("🔄 Creating fallback detector...")
+        loaded = create_detector()
+    
+    # Final safety check
+    if loaded is None:
+        logger.error("❌ Critical: Could not initialize any detector!")
+        loaded = create_detector()
+    
+    # Saved models are stored in fp32
+    try:
+        loaded.set_precision(INFERENCE_CONFIG['precision'])
+    except Exception as e:
+        logger.warning(f"⚠️ Keeping fp32 classifier: {e}")
+    return loaded
+
+def _activate_detector(new_detector):
+    """Start serving predictions from a loaded detector"""
+    global detector, micro_batcher
+    
+    # Optional micro-batching of concurrent single-article requests
+    if MICRO_BATCH_CONFIG['enabled']:
+        micro_batcher = MicroBatcher(
+            new_detector,
+            max_batch_size=MICRO_BATCH_CONFIG['max_batch_size'],
+            max_wait_ms=MICRO_BATCH_CONFIG['max_wait_ms'],
+            max_queue_size=MICRO_BATCH_CONFIG['max_queue_size'],
+            executor=inference_executor
+        )
+        logger.info("✅ Micro-batching enabled")
     
-    if model_path:
-        logger.info(f"Found pickle model: {model_path}")
+    # The first forward pass allocates buffers; keep it out of user requests
+    try:
+        new_detector.predict("Warm-up", "Warm-up article used to initialize the model.")
+    except Exception as e:
+        logger.warning(f"⚠️ Model warm-up failed: {e}")
+    detector = new_detector
+    
+    if persistent_cache is not None and PERSISTENT_CACHE_CONFIG['prewarm_rows'] > 0:
         try:
-            detector = load_model(model_path)
-            if detector is not None:
-                logger.info("✅ Pickle model loaded successfully")
-            else:
-                logger.warning("⚠️ Pickle model loading failed, using direct implementation")
+            with app.app_context():
+                _prewarm_persistent_cache(PERSISTENT_CACHE_CONFIG['prewarm_rows'])
         except Exception as e:
-            logger.warning(f"⚠️ Pickle model loading failed: {e}")
-    
-    # If pickle loading failed or no model found, use direct implementation
+            logger.warning(f"⚠️ Persistent cache prewarm failed: {e}")
+
+def _load_and_activate_detector():
+    with startup_timer.phase('detector'):
+        # The model load imports torch anyway; the app import stays torch-free
+        _configure_torch_threads()
+        loaded = _load_detector()
+    with startup_timer.phase('detector warm-up'):
+        _activate_detector(loaded)
+    logger.info(f"✅ Model ready, startup phases: {startup_timer.summary()}")
+
+# Size torch's thread pools together with the inference threads; applied
+# when the model is loaded, before it does any work
+thread_plan = plan_threads(
+    workers=EXECUTOR_CONFIG['workers'] if EXECUTOR_CONFIG['enabled'] else 1,
+    torch_threads=EXECUTOR_CONFIG['torch_threads'],
+    interop_threads=EXECUTOR_CONFIG['torch_interop_threads'],
+    processes=EXECUTOR_CONFIG['server_processes']
+)
+if prefork.active:
+    # Torch's thread pool does not survive fork: the gunicorn master stays on
+    # one thread and each worker applies the plan after the fork
+    prefork.defer_torch_threads(thread_plan['torch_threads'])
+
+def _configure_torch_threads():
+    if prefork.active:
+        configure_torch_threads(1, thread_plan['interop_threads'])
+    else:
+        configure_torch_threads(thread_plan['torch_threads'], thread_plan['interop_threads'])
+
+# Dedicated inference threads; requests beyond its bounded queue get 503
+inference_executor = None
+if EXECUTOR_CONFIG['enabled']:
+    inference_executor = InferenceExecutor(
+        workers=thread_plan['workers'],
+        max_queue_size=EXECUTOR_CONFIG['max_queue_size'],
+        max_queue_wait=EXECUTOR_CONFIG['max_queue_wait']
+    )
+    logger.info(
+        f"✅ Inference executor: {thread_plan['workers']} thread(s) x {thread_plan['torch_threads']} "
+        f"torch thread(s) on {thread_plan['cpus']} CPU(s)"
+    )
+
+# The detector is loaded by detector_loader at the end of startup
+detector = None
+micro_batcher = None
+detector_loader = BackgroundLoader(_load_and_activate_detector)
+
+def _require_detector():
     if detector is None:
-        logger.info("🔄 Creating new BERT detector from source...")
-        detector = create_detector()
-        logger.info("✅ BERT detector initialized successfully from source")
-        
-except Exception as e:
-    logger.error(f"❌ Error initializing detector: {e}")
-    logger.info("🔄 Creating fallback detector...")
-    detector = create_detector()
+        raise ModelNotReadyError("The model is still loading")
+    return detector
 
-# Final safety check
-if detector is None:
-    logger.error("❌ Critical: Could not initialize any detector!")
-    detector = create_detector()
+# Optional cache of recent predictions, keyed by article content
+result_cache = None
+if RESULT_CACHE_CONFIG['enabled']:
+    result_cache = ResultCache(
+        max_entries=RESULT_CACHE_CONFIG['max_entries'],
+        ttl_seconds=RESULT_CACHE_CONFIG['ttl_seconds']
+    )
+
+# Optional on-disk cache shared by all workers on this host
+persistent_cache = None
+if PERSISTENT_CACHE_CONFIG['enabled']:
+    try:
+        persistent_cache = PersistentResultCache(
+            os.path.join(app.instance_path, PERSISTENT_CACHE_CONFIG['filename']),
+            max_entries=PERSISTENT_CACHE_CONFIG['max_entries'],
+            ttl_seconds=PERSISTENT_CACHE_CONFIG['ttl_seconds']
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Persistent cache disabled: {e}")
+
+# Optional on-demand profiling of single analyze requests
+request_profiler = None
+if PROFILING_CONFIG['enabled']:
+    request_profiler = profiling.RequestProfiler(
+        os.path.join(app.instance_path, 'profiles'),
+        admin_token=PROFILING_CONFIG['admin_token'],
+        sample_rate=PROFILING_CONFIG['sample_rate'],
+        torch_profiler=PROFILING_CONFIG['torch_profiler'],
+        max_profiles=PROFILING_CONFIG['max_profiles'],
+        sample_interval=PROFILING_CONFIG['sample_interval_ms'] / 1000
+    )
+    add_stage_observer(profiling.observe_detector_stage)
+    metrics.add_stage_listener(profiling.observe_request_stage)
+
+def _profiled(view):
+    return request_profiler.profile_view(view) if request_profiler is not None else view
+
+def _cached_result(key, model_version):
+    """Look a result up in the in-process cache, then the shared on-disk cache"""
+    if result_cache is not None:
+        result = result_cache.get(key, model_version)
+        metrics.record_cache_lookup('memory', result is not None)
+        if result is not None:
+            return result
+    if persistent_cache is not None:
+        result = persistent_cache.get(key, model_version)
+        metrics.record_cache_lookup('disk', result is not None)
+        if result is not None:
+            if result_cache is not None:
+                result_cache.put(key, model_version, result)
+            return result
+    return None
+
+def _cache_results(entries):
+    """Store (key, model_version, result) tuples in every enabled cache"""
+    entries = [entry for entry in entries if entry[2]['prediction'] != 'Error']
+    if result_cache is not None:
+        for key, model_version, result in entries:
+            result_cache.put(key, model_version, result)
+    if persistent_cache is not None:
+        persistent_cache.put_many(entries)
+
+def _caching_enabled():
+    return result_cache is not None or persistent_cache is not None
+
+def _run_inference(func, *args, **kwargs):
+    """Run a detector call on the inference executor (if any)"""
+    # A profiled request runs on its own thread so the profile sees the model
+    if inference_executor is None or g.get('profiling'):
+        return func(*args, **kwargs)
+    return inference_executor.submit(func, *args, **kwargs)
+
+def _predict(title, content):
+    """Score one article from the result caches, the micro-batcher or the detector"""
+    detector = _require_detector()
+    key = None
+    if _caching_enabled():
+        with metrics.stage(request.endpoint, 'cache_lookup'):
+            key = content_key(title, content)
+            model_version = detector.model_version
+            cached = _cached_result(key, model_version)
+        if cached is not None:
+            metrics.record_predictions([cached], 'cache')
+            return cached
+    
+    with metrics.stage(request.endpoint, 'inference'):
+        if micro_batcher is not None and not g.get('profiling'):
+            result = micro_batcher.submit(title, content, timeout=MICRO_BATCH_CONFIG['request_timeout'])
+        else:
+            result = _run_inference(detector.predict, title, content)
+    metrics.record_predictions([result], 'model')
+    
+    if key is not None:
+        with metrics.stage(request.endpoint, 'cache_store'):
+            _cache_results([(key, model_version, result)])
+    return result
+
+def _predict_batch(titles, contents):
+    """Score several articles, running only cache misses through the detector"""
+    detector = _require_detector()
+    results = [None] * len(titles)
+    keys = [None] * len(titles)
+    if _caching_enabled():
+        with metrics.stage(request.endpoint, 'cache_lookup'):
+            model_version = detector.model_version
+            for i, (title, content) in enumerate(zip(titles, contents)):
+                keys[i] = content_key(title, content)
+                results[i] = _cached_result(keys[i], model_version)
+        metrics.record_predictions([result for result in results if result is not None], 'cache')
+    
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        with metrics.stage(request.endpoint, 'inference'):
+            scored = _run_inference(
+                detector.predict_batch,
+                [titles[i] for i in missing],
+                [contents[i] for i in missing],
+                batch_size=BATCH_CONFIG['inference_batch_size']
+            )
+        metrics.record_predictions(scored, 'model')
+        for i, result in zip(missing, scored):
+            results[i] = result
+        if _caching_enabled():
+            with metrics.stage(request.endpoint, 'cache_store'):
+                _cache_results([(keys[i], model_version, results[i]) for i in missing])
+    return results
 
 # Routes
 @app.route('/')
@@ -108,15 +454,12 @@ def index():
     recent_analyses = NewsAnalysis.query.order_by(NewsAnalysis.created_at.desc()).limit(5).all()
     
     # Get system statistics
-    stats = SystemStats.query.first()
-    if not stats:
-        stats = SystemStats()
-        db.session.add(stats)
-        db.session.commit()
+    stats = _current_stats()
     
     return render_template('index.html', recent_analyses=recent_analyses, stats=stats)
 
 @app.route('/analyze', methods=['POST'])
+@_profiled
 def analyze_news():
     """Analyze news article"""
     try:
@@ -131,7 +474,12 @@ def analyze_news():
             }), 400
         
         # Perform analysis
-        result = detector.predict(title, content)
+        try:
+            result = _predict(title, content)
+        except QueueFullError as e:
+            return _busy_response(e)
+        except ModelNotReadyError:
+            return _not_ready_response()
         
         if result['prediction'] == 'Error':
             return jsonify({
@@ -139,83 +487,472 @@ def analyze_news():
                 'message': f"Analysis error: {result.get('error', 'Unknown error')}"
             }), 500
         
-        # Save to database
-        analysis = NewsAnalysis(
-            title=title,
-            content=content,
-            prediction=result['prediction'],
-            confidence=result['confidence'],
-            fake_probability=result['fake_probability'],
-            real_probability=result['real_probability'],
-            suspicious_patterns_score=result['analysis']['suspicion_patterns'],
-            pipeline_score=result['analysis']['pipeline_score'],
-            token_diversity=result['analysis']['bert_features']['token_diversity'] if result['analysis']['bert_features'] else None,
-            text_length=result['analysis']['bert_features']['text_length'] if result['analysis']['bert_features'] else None,
-            ip_address=request.remote_addr
-        )
+        # Save to database (statistics count the row once it is committed)
+        with metrics.stage('analyze_news', 'db_insert'):
+            values = _analysis_values(title, content, result)
+            analysis_id = _save_analyses([values])[0]
         
-        db.session.add(analysis)
+        return jsonify({
+            'success': True,
+            'result': result,
+            'analysis_id': analysis_id,
+            'analysis_uid': values['uid'],
+            'queued': analysis_writer is not None
+        })
         
-        # Update statistics
-        stats = SystemStats.query.first()
-        if not stats:
-            stats = SystemStats()
-            db.session.add(stats)
+    except QueueFullError as e:
+        return _busy_response(e)
+    except ModelNotReadyError:
+        return _not_ready_response()
+    except Exception as e:
+        logger.error(f"Error in analyze_news: {e}")
+        return jsonify({
+            'success': False,
+            'message': f'Server error: {str(e)}'
+        }), 500
+
+@app.route('/api/analyze/batch', methods=['POST'])
+@_profiled
+def analyze_news_batch():
+    """Analyze a list of news articles in one request"""
+    try:
+        data = request.get_json(silent=True)
+        articles = data.get('articles') if isinstance(data, dict) else None
         
-        stats.total_analyses += 1
-        if result['prediction'] == 'Fake':
-            stats.fake_detected += 1
-        else:
-            stats.real_detected += 1
-        stats.last_updated = datetime.utcnow()
+        if not isinstance(articles, list) or not articles:
+            return jsonify({
+                'success': False,
+                'message': 'A non-empty list of articles is required'
+            }), 400
         
-        db.session.commit()
+        if len(articles) > BATCH_CONFIG['max_articles']:
+            return jsonify({
+                'success': False,
+                'message': f"At most {BATCH_CONFIG['max_articles']} articles can be analyzed per request"
+            }), 400
+        
+        try:
+            titles, contents = _parse_articles(articles)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        # Perform analysis
+        results = _predict_batch(titles, contents)
+        
+        # Save all successful analyses in a single transaction
+        with metrics.stage('analyze_news_batch', 'db_insert'):
+            values = [
+                _analysis_values(title, content, result) if result['prediction'] != 'Error' else None
+                for title, content, result in zip(titles, contents, results)
+            ]
+            saved_ids = iter(_save_analyses([row for row in values if row is not None]))
+        
+        items = []
+        for result, row in zip(results, values):
+            if row is None:
+                items.append({
+                    'success': False,
+                    'message': f"Analysis error: {result.get('error', 'Unknown error')}"
+                })
+            else:
+                items.append({
+                    'success': True,
+                    'result': result,
+                    'analysis_id': next(saved_ids),
+                    'analysis_uid': row['uid']
+                })
         
         return jsonify({
             'success': True,
-            'result': result,
-            'analysis_id': analysis.id
+            'count': len(items),
+            'results': items,
+            'queued': analysis_writer is not None
         })
         
+    except QueueFullError as e:
+        return _busy_response(e)
+    except ModelNotReadyError:
+        return _not_ready_response()
     except Exception as e:
-        logger.error(f"Error in analyze_news: {e}")
+        db.session.rollback()
+        logger.error(f"Error in analyze_news_batch: {e}")
         return jsonify({
             'success': False,
             'message': f'Server error: {str(e)}'
         }), 500
 
+def _parse_articles(articles):
+    """Titles and contents of a list of article objects; ValueError names the first invalid one"""
+    titles, contents = [], []
+    for index, article in enumerate(articles):
+        if not isinstance(article, dict):
+            article = {}
+        title = str(article.get('title') or '').strip()
+        content = str(article.get('content') or '').strip()
+        if not title or not content:
+            raise ValueError(f'Both title and content are required (article {index})')
+        titles.append(title)
+        contents.append(content)
+    return titles, contents
+
+def _analysis_values(title, content, result, ip_address=None):
+    """Column values of the NewsAnalysis row for a detector result"""
+    bert_features = result['analysis']['bert_features']
+    return {
+        'uid': uuid.uuid4().hex,
+        'title': title,
+        'content': content,
+        'prediction': result['prediction'],
+        'confidence': result['confidence'],
+        'fake_probability': result['fake_probability'],
+        'real_probability': result['real_probability'],
+        'suspicious_patterns_score': result['analysis']['suspicion_patterns'],
+        'pipeline_score': result['analysis']['pipeline_score'],
+        'token_diversity': bert_features['token_diversity'] if bert_features else None,
+        'text_length': bert_features['text_length'] if bert_features else None,
+        'created_at': datetime.utcnow(),
+        'ip_address': request.remote_addr if has_request_context() else ip_address,
+        'model_version': detector.model_version
+    }
+
+def _build_analysis(title, content, result):
+    """Create a NewsAnalysis row from a detector result"""
+    return NewsAnalysis(**_analysis_values(title, content, result))
+
+def _save_analyses(rows):
+    """Persist NewsAnalysis rows in one transaction and return their ids.
+    
+    With write-behind enabled the rows are queued and their uids are
+    returned instead, since integer ids are only assigned on insert.
+    """
+    if not rows:
+        return []
+    if analysis_writer is not None:
+        analysis_writer.submit(rows)
+        return [row['uid'] for row in rows]
+    
+    analyses = [NewsAnalysis(**row) for row in rows]
+    db.session.add_all(analyses)
+    db.session.commit()
+    _count_analyses(rows)
+    return [analysis.id for analysis in analyses]
+
+def _insert_analyses(rows):
+    """Bulk-insert queued rows with a single executemany INSERT"""
+    with app.app_context():
+        db.session.execute(db.insert(NewsAnalysis), rows)
+        db.session.commit()
+    _count_analyses(rows)
+
+def _count_analyses(rows):
+    """Add committed rows to the statistics; rows that fail to insert are never counted"""
+    stats_accumulator.record([row['prediction'] for row in rows])
+
+# Optional write-behind queue for NewsAnalysis inserts
+analysis_writer = None
+if WRITE_BEHIND_CONFIG['enabled']:
+    analysis_writer = AnalysisWriter(
+        _insert_analyses,
+        max_queue_size=WRITE_BEHIND_CONFIG['max_queue_size'],
+        batch_size=WRITE_BEHIND_CONFIG['batch_size'],
+        flush_interval=WRITE_BEHIND_CONFIG['flush_interval'],
+        full_policy=WRITE_BEHIND_CONFIG['full_policy'],
+        block_timeout=WRITE_BEHIND_CONFIG['block_timeout']
+    )
+    logger.info(f"✅ Write-behind enabled (full policy: {analysis_writer.full_policy})")
+
+def _flush_stats(deltas):
+    """Add buffered counters to the SystemStats row with atomic SQL increments"""
+    with app.app_context():
+        updated = db.session.execute(
+            db.update(SystemStats)
+            .where(SystemStats.id == STATS_ROW_ID)
+            .values(
+                total_analyses=SystemStats.total_analyses + deltas['total_analyses'],
+                fake_detected=SystemStats.fake_detected + deltas['fake_detected'],
+                real_detected=SystemStats.real_detected + deltas['real_detected'],
+                last_updated=deltas['last_updated']
+            )
+        ).rowcount
+        if not updated:
+            # The row is created at startup; keep the deltas for the next flush
+            db.session.rollback()
+            raise RuntimeError('SystemStats row is missing')
+        db.session.commit()
+
+# Counters are kept per process and flushed on an interval instead of
+# locking the SystemStats row in every /analyze transaction
+stats_accumulator = StatsAccumulator(_flush_stats, flush_interval=STATS_CONFIG['flush_interval'])
+
+def _flush_on_exit():
+    """Drain the write-behind queue before the last stats flush.
+
+    Rows are only counted once written, and atexit runs the writer's own hook
+    after the accumulator's (it was registered first), so drained rows would
+    never reach SystemStats.
+    """
+    if analysis_writer is not None:
+        analysis_writer.close()
+    stats_accumulator.flush()
+
+atexit.register(_flush_on_exit)
+
+def _current_stats():
+    """Stored statistics plus this process's not yet flushed counts (not persisted)"""
+    stored = db.session.get(SystemStats, STATS_ROW_ID) or SystemStats()
+    pending = stats_accumulator.pending()
+    last_updated = max(
+        (value for value in (stored.last_updated, pending['last_updated']) if value),
+        default=None
+    )
+    return SystemStats(
+        total_analyses=(stored.total_analyses or 0) + pending['total_analyses'],
+        fake_detected=(stored.fake_detected or 0) + pending['fake_detected'],
+        real_detected=(stored.real_detected or 0) + pending['real_detected'],
+        last_updated=last_updated
+    )
+
+# Background scoring jobs: the database is the queue (see jobs.py)
+def _runnable_job():
+    """Queued jobs, and running jobs whose runner stopped heartbeating"""
+    stale = datetime.utcnow() - timedelta(seconds=JOBS_CONFIG['lease_seconds'])
+    return db.or_(
+        ScoringJob.status == jobs.QUEUED,
+        db.and_(ScoringJob.status == jobs.RUNNING, ScoringJob.heartbeat_at < stale)
+    )
+
+def _owned_job(job_id, owner):
+    return db.update(ScoringJob).where(
+        ScoringJob.id == job_id, ScoringJob.owner == owner, ScoringJob.status == jobs.RUNNING
+    )
+
+def _claim_job(owner):
+    """Lease the oldest runnable job to owner; returns its id or None"""
+    with app.app_context():
+        candidates = db.session.execute(
+            db.select(ScoringJob.id).where(_runnable_job()).order_by(ScoringJob.created_at).limit(5)
+        ).scalars().all()
+        for job_id in candidates:
+            now = datetime.utcnow()
+            # Conditional update: only one runner wins a job
+            claimed = db.session.execute(
+                db.update(ScoringJob)
+                .where(ScoringJob.id == job_id, _runnable_job())
+                .values(status=jobs.RUNNING, owner=owner, heartbeat_at=now,
+                        started_at=db.func.coalesce(ScoringJob.started_at, now))
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return job_id
+        return None
+
+def _run_job_chunk(job_id, owner):
+    """Score and commit the next chunk of a job; False once it is done or no longer owned"""
+    detector = _require_detector()
+    with app.app_context():
+        items = db.session.execute(
+            db.select(ScoringJobItem.id, ScoringJobItem.title, ScoringJobItem.content)
+            .where(ScoringJobItem.job_id == job_id, ScoringJobItem.status == jobs.ITEM_PENDING)
+            .order_by(ScoringJobItem.position)
+            .limit(JOBS_CONFIG['chunk_size'])
+        ).all()
+        if not items:
+            now = datetime.utcnow()
+            db.session.execute(_owned_job(job_id, owner).values(status=jobs.COMPLETED, finished_at=now, heartbeat_at=now))
+            db.session.commit()
+            logger.info(f"✅ Job {job_id} completed")
+            return False
+        ip_address = db.session.execute(db.select(ScoringJob.ip_address).where(ScoringJob.id == job_id)).scalar()
+        # End the read transaction while the model runs
+        db.session.commit()
+        
+        titles = [item.title for item in items]
+        contents = [item.content for item in items]
+        started = time.perf_counter()
+        if inference_executor is not None:
+            # Shares the inference threads with interactive requests, in arrival order
+            results = inference_executor.submit(
+                detector.predict_batch, titles, contents,
+                batch_size=BATCH_CONFIG['inference_batch_size'], block=True
+            )
+        else:
+            results = detector.predict_batch(titles, contents, batch_size=BATCH_CONFIG['inference_batch_size'])
+        elapsed = time.perf_counter() - started
+        
+        rows, item_values = [], []
+        counts = {'Fake': 0, 'Real': 0, 'Error': 0}
+        for item, result in zip(items, results):
+            counts[result['prediction']] += 1
+            if result['prediction'] == 'Error':
+                item_values.append({
+                    'id': item.id, 'status': jobs.ITEM_ERROR, 'prediction': None, 'confidence': None,
+                    'fake_probability': None, 'analysis_uid': None, 'error': result.get('error', 'Unknown error')
+                })
+                continue
+            row = _analysis_values(item.title, item.content, result, ip_address=ip_address)
+            rows.append(row)
+            item_values.append({
+                'id': item.id, 'status': jobs.ITEM_SCORED, 'prediction': result['prediction'],
+                'confidence': result['confidence'], 'fake_probability': result['fake_probability'],
+                'analysis_uid': row['uid'], 'error': None
+            })
+        
+        # Progress, analyses and item results commit together, and only while
+        # this runner still owns the job (not cancelled, not reclaimed)
+        owned = db.session.execute(_owned_job(job_id, owner).values(
+            processed=ScoringJob.processed + len(items),
+            errors=ScoringJob.errors + counts['Error'],
+            fake_detected=ScoringJob.fake_detected + counts['Fake'],
+            real_detected=ScoringJob.real_detected + counts['Real'],
+            active_seconds=ScoringJob.active_seconds + elapsed,
+            heartbeat_at=datetime.utcnow()
+        )).rowcount
+        if not owned:
+            db.session.rollback()
+            logger.warning(f"⚠️ Job {job_id} was cancelled or taken over, dropping its current chunk")
+            return False
+        if rows:
+            db.session.execute(db.insert(NewsAnalysis), rows)
+        db.session.execute(db.update(ScoringJobItem), item_values)
+        db.session.commit()
+    
+    stats_accumulator.record([row['prediction'] for row in rows])
+    metrics.record_predictions([result for result in results if result['prediction'] != 'Error'], 'job')
+    return True
+
+def _release_job(job_id, owner, error=None):
+    """Put a job owned by owner back in the queue; an error counts as a failed attempt"""
+    with app.app_context():
+        if error is None:
+            values = {'status': jobs.QUEUED, 'owner': None}
+        else:
+            exhausted = ScoringJob.attempts + 1 >= JOBS_CONFIG['max_attempts']
+            values = {
+                'status': db.case((exhausted, jobs.FAILED), else_=jobs.QUEUED),
+                'finished_at': db.case((exhausted, datetime.utcnow()), else_=None),
+                'attempts': ScoringJob.attempts + 1,
+                'error': error,
+                'owner': None
+            }
+        db.session.execute(_owned_job(job_id, owner).values(**values))
+        db.session.commit()
+
+def _heartbeat_job(job_id, owner):
+    """Renew owner's lease on a running job; False once it is no longer owned"""
+    with app.app_context():
+        owned = db.session.execute(_owned_job(job_id, owner).values(heartbeat_at=datetime.utcnow())).rowcount
+        db.session.commit()
+        return bool(owned)
+
+job_runner = None
+if JOBS_CONFIG['enabled']:
+    job_runner = jobs.JobRunner(
+        _claim_job, _run_job_chunk, _release_job, _heartbeat_job,
+        workers=JOBS_CONFIG['workers'],
+        poll_interval=JOBS_CONFIG['poll_interval'],
+        heartbeat_interval=JOBS_CONFIG['lease_seconds'] / 3
+    )
+
+    # Runners start in serving processes only: gunicorn's post_fork hook or
+    # the first request, never in a master that preloads the app and forks
+    @app.before_request
+    def _start_job_runner():
+        job_runner.start()
+
+
+HISTORY_MAX_PER_PAGE = 100
+
 @app.route('/history')
 def history():
     """View analysis history"""
-    page = request.args.get('page', 1, type=int)
-    analyses = NewsAnalysis.query.order_by(NewsAnalysis.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
-    return render_template('history.html', analyses=analyses)
+    if 'page' in request.args and not _history_cursor_given():
+        # Compatibility path: OFFSET pagination with page numbers
+        page = request.args.get('page', 1, type=int)
+        analyses = _history_query().order_by(NewsAnalysis.created_at.desc(), NewsAnalysis.id.desc()).paginate(
+            page=page, per_page=20, error_out=False
+        )
+    else:
+        try:
+            analyses = _history_page(per_page=20)
+        except LookupError:
+            return redirect(url_for('history', prediction=request.args.get('prediction')))
+    return render_template('history.html', analyses=analyses, prediction=request.args.get('prediction'))
 
 @app.route('/api/history')
 def api_history():
     """API endpoint for analysis history"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), HISTORY_MAX_PER_PAGE)
     
-    analyses = NewsAnalysis.query.order_by(NewsAnalysis.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    if 'page' in request.args and not _history_cursor_given():
+        # Compatibility path: OFFSET pagination with page numbers and totals
+        page = request.args.get('page', 1, type=int)
+        analyses = _history_query().order_by(NewsAnalysis.created_at.desc(), NewsAnalysis.id.desc()).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        return jsonify({
+            'analyses': [analysis.to_dict() for analysis in analyses.items],
+            'total': analyses.total,
+            'pages': analyses.pages,
+            'current_page': page
+        })
     
-    return jsonify({
+    try:
+        analyses = _history_page(per_page=per_page)
+    except LookupError:
+        return jsonify({
+            'success': False,
+            'message': 'Unknown pagination cursor'
+        }), 400
+    
+    response = {
         'analyses': [analysis.to_dict() for analysis in analyses.items],
-        'total': analyses.total,
-        'pages': analyses.pages,
-        'current_page': page
-    })
+        'per_page': per_page,
+        'has_more': analyses.has_next,
+        'next_after': analyses.next_after,
+        'prev_before': analyses.prev_before
+    }
+    if analyses.total is not None:
+        response['total'] = analyses.total
+    return jsonify(response)
+
+def _history_cursor_given():
+    return 'after' in request.args or 'before' in request.args
+
+def _history_query():
+    """Analyses matching the ?prediction= filter, on both pagination paths"""
+    query = NewsAnalysis.query
+    prediction = request.args.get('prediction')
+    if prediction:
+        query = query.filter(NewsAnalysis.prediction == prediction)
+    return query
+
+def _history_page(per_page):
+    """Keyset page of analyses for the ?after=/?before=/?prediction= arguments"""
+    query = _history_query()
+    
+    cursors = {}
+    for name in ('after', 'before'):
+        cursor_id = request.args.get(name, type=int)
+        if cursor_id is None:
+            continue
+        cursor = db.session.get(NewsAnalysis, cursor_id)
+        if cursor is None or cursor.created_at is None:
+            raise LookupError(f"Unknown cursor {cursor_id}")
+        cursors[name] = cursor
+    
+    with_total = request.args.get('total', 'false').lower() in ('1', 'true', 'yes')
+    return keyset_paginate(
+        query, NewsAnalysis.created_at, NewsAnalysis.id, per_page,
+        after=cursors.get('after'), before=cursors.get('before'), with_total=with_total
+    )
 
 @app.route('/stats')
 def stats():
     """Statistics page"""
-    stats = SystemStats.query.first()
-    if not stats:
-        stats = SystemStats(total_analyses=0, fake_detected=0, real_detected=0)
+    stats = _current_stats()
     
     # Get recent activity
     recent_analyses = NewsAnalysis.query.order_by(NewsAnalysis.created_at.desc()).limit(10).all()
@@ -225,23 +962,38 @@ def stats():
 @app.route('/api/stats')
 def api_stats():
     """API endpoint for statistics"""
-    stats = SystemStats.query.first()
-    if not stats:
-        return jsonify({
+    stats = _current_stats()
+    if not stats.total_analyses and not stats.last_updated:
+        response = {
             'total_analyses': 0,
             'fake_detected': 0,
             'real_detected': 0,
             'accuracy_note': 'No analyses performed yet'
-        })
+        }
+    else:
+        response = {
+            'total_analyses': stats.total_analyses,
+            'fake_detected': stats.fake_detected,
+            'real_detected': stats.real_detected,
+            'fake_percentage': round((stats.fake_detected / stats.total_analyses) * 100, 1) if stats.total_analyses > 0 else 0,
+            'real_percentage': round((stats.real_detected / stats.total_analyses) * 100, 1) if stats.total_analyses > 0 else 0,
+            'last_updated': stats.last_updated.isoformat() if stats.last_updated else None
+        }
     
-    return jsonify({
-        'total_analyses': stats.total_analyses,
-        'fake_detected': stats.fake_detected,
-        'real_detected': stats.real_detected,
-        'fake_percentage': round((stats.fake_detected / stats.total_analyses) * 100, 1) if stats.total_analyses > 0 else 0,
-        'real_percentage': round((stats.real_detected / stats.total_analyses) * 100, 1) if stats.total_analyses > 0 else 0,
-        'last_updated': stats.last_updated.isoformat() if stats.last_updated else None
-    })
+    if result_cache is not None:
+        response['cache'] = result_cache.stats()
+    if persistent_cache is not None:
+        response['persistent_cache'] = persistent_cache.stats()
+    if micro_batcher is not None:
+        response['micro_batching'] = micro_batcher.metrics()
+    if inference_executor is not None:
+        response['inference_executor'] = dict(inference_executor.stats(), threads=thread_plan)
+    if analysis_writer is not None:
+        response['write_behind'] = analysis_writer.stats()
+    if job_runner is not None:
+        response['jobs'] = job_runner.stats()
+    
+    return jsonify(response)
 
 # Error handlers
 @app.errorhandler(404)
@@ -252,9 +1004,60 @@ def not_found(error):
 def internal_error(error):
     return render_template('error.html', error='Internal server error'), 500
 
+def _upgrade_schema():
+    """Add nullable columns introduced after a table was first created"""
+    inspector = db.inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            with db.engine.begin() as connection:
+                connection.execute(db.text(
+                    f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                ))
+            logger.info(f"✅ Added column {table.name}.{column.name}")
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+def _ensure_stats_row():
+    """Create the single SystemStats row; another worker may win the race"""
+    if db.session.get(SystemStats, STATS_ROW_ID) is not None:
+        return
+    # No last_updated until the first analysis, so /api/stats reports an empty database
+    db.session.add(SystemStats(id=STATS_ROW_ID, total_analyses=0, fake_detected=0, real_detected=0, last_updated=None))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+
+def _prewarm_persistent_cache(limit):
+    """Seed the shared cache from the most recent analyses of the current model"""
+    if detector.long_document_enabled:
+        # Rows do not store the per-window scores, so a rebuilt result would
+        # differ from a fresh prediction under the same model_version
+        logger.info("Persistent cache prewarm skipped in long-document mode")
+        return
+    model_version = detector.model_version
+    recent = (NewsAnalysis.query
+              .filter(NewsAnalysis.model_version == model_version)
+              .order_by(NewsAnalysis.id.desc())
+              .limit(limit)
+              .all())
+    persistent_cache.put_many(
+        [(content_key(row.title, row.content), model_version, row.to_result()) for row in recent],
+        replace=False
+    )
+    logger.info(f"✅ Persistent cache prewarmed from {len(recent)} recent analyses")
+
 # Create database tables
-with app.app_context():
+with startup_timer.phase('database'), app.app_context():
     db.create_all()
+    _upgrade_schema()
+    _ensure_stats_row()
     logger.info("✅ Database tables created")
 
 # Health check endpoint for GCP
@@ -276,10 +1079,232 @@ def health_check():
             'error': str(e)
         }), 500
 
+@app.route('/health/live')
+def liveness_check():
+    """Liveness probe: the web process is up, whether or not the model is loaded"""
+    return jsonify({
+        'status': 'alive',
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
+@app.route('/health/ready')
+def readiness_check():
+    """Readiness probe: only succeeds once the model is loaded and warm"""
+    response = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'model': detector_loader.status(),
+        'startup_phases': startup_timer.phases
+    }
+    if detector is None:
+        response['status'] = 'loading' if detector_loader.state != BackgroundLoader.FAILED else 'failed'
+        return jsonify(response), 503, {'Retry-After': '5'}
+    try:
+        db.session.execute(db.text('SELECT 1'))
+    except Exception as e:
+        response.update(status='unhealthy', error=str(e))
+        return jsonify(response), 503
+    response['status'] = 'ready'
+    return jsonify(response), 200
+
+# Prometheus metrics
+def _refresh_metric_gauges():
+    """Copy this process's cache and queue sizes into the metric gauges"""
+    if result_cache is not None:
+        metrics.set_cache_entries('memory', result_cache.stats()['entries'])
+    if micro_batcher is not None:
+        metrics.set_queue_depth('micro_batch', micro_batcher.metrics()['queue_depth'])
+    if inference_executor is not None:
+        metrics.set_queue_depth('inference', inference_executor.stats()['queue_depth'])
+    if analysis_writer is not None:
+        metrics.set_queue_depth('write_behind', analysis_writer.stats()['queue_depth'])
+    metrics.set_queue_depth('stats_pending', stats_accumulator.pending()['total_analyses'])
+
+metrics_enabled = METRICS_CONFIG['enabled'] and metrics.AVAILABLE
+if metrics_enabled:
+    add_stage_observer(metrics.observe_detector_stage)
+    metrics.set_gauge_callback(_refresh_metric_gauges, METRICS_CONFIG['gauge_refresh_interval'])
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request_metrics(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            metrics.record_request(request.endpoint, request.method, response.status_code,
+                                   time.perf_counter() - started)
+        return response
+elif METRICS_CONFIG['enabled']:
+    logger.warning("⚠️ prometheus_client is not installed, /metrics is disabled")
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    if not metrics_enabled:
+        return 'metrics are disabled\n', 503, {'Content-Type': 'text/plain; charset=utf-8'}
+    if persistent_cache is not None:
+        # The on-disk cache is shared, so it is only counted when scraped
+        metrics.set_persistent_cache_entries(persistent_cache.stats()['entries'])
+    body, content_type = metrics.render()
+    return body, 200, {'Content-Type': content_type}
+
+# Stored request profiles
+@app.route('/api/profiles')
+def list_profiles():
+    """Stored profiles, newest first (localhost or admin token only)"""
+    if request_profiler is None:
+        return jsonify({'success': False, 'message': 'Profiling is disabled'}), 404
+    if not request_profiler.is_authorized(request):
+        return jsonify({'success': False, 'message': 'Forbidden'}), 403
+    return jsonify({'success': True, 'profiles': request_profiler.list_profiles()})
+
+@app.route('/api/profiles/<profile_id>/<filename>')
+def download_profile(profile_id, filename):
+    """Download one file of a stored profile"""
+    if request_profiler is None:
+        return jsonify({'success': False, 'message': 'Profiling is disabled'}), 404
+    if not request_profiler.is_authorized(request):
+        return jsonify({'success': False, 'message': 'Forbidden'}), 403
+    path = request_profiler.file_path(profile_id, filename)
+    if path is None:
+        return jsonify({'success': False, 'message': 'Profile not found'}), 404
+    return send_file(path, as_attachment=True, download_name=f'{profile_id}_{filename}')
+
+# Background scoring jobs
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue a list of articles or an uploaded CSV/JSONL file for background scoring"""
+    if job_runner is None:
+        return jsonify({'success': False, 'message': 'Background jobs are disabled'}), 404
+    
+    upload = request.files.get('file')
+    try:
+        if upload is not None:
+            source, filename = 'file', upload.filename
+            articles = jobs.read_articles(upload.stream, upload.filename)
+        else:
+            data = request.get_json(silent=True)
+            items = data.get('articles') if isinstance(data, dict) else None
+            if not isinstance(items, list):
+                items = []
+            source, filename = 'batch', None
+            articles = list(zip(*_parse_articles(items)))
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({'success': False, 'message': f'Invalid articles: {e}'}), 400
+    
+    if not articles:
+        return jsonify({
+            'success': False,
+            'message': 'A non-empty list of articles or a CSV/JSONL file is required'
+        }), 400
+    if len(articles) > JOBS_CONFIG['max_articles']:
+        return jsonify({
+            'success': False,
+            'message': f"At most {JOBS_CONFIG['max_articles']} articles can be submitted per job"
+        }), 400
+    
+    pending = db.session.execute(
+        db.select(db.func.count()).select_from(ScoringJob)
+        .where(ScoringJob.status.in_([jobs.QUEUED, jobs.RUNNING]))
+    ).scalar()
+    if pending >= JOBS_CONFIG['max_pending_jobs']:
+        return _busy_response(QueueFullError("Too many pending jobs", queue='jobs'))
+    
+    job = ScoringJob(
+        id=uuid.uuid4().hex, status=jobs.QUEUED, source=source, filename=filename,
+        total=len(articles), ip_address=request.remote_addr, created_at=datetime.utcnow()
+    )
+    db.session.add(job)
+    db.session.flush()
+    db.session.execute(db.insert(ScoringJobItem), [
+        {'job_id': job.id, 'position': position, 'title': title, 'content': content, 'status': jobs.ITEM_PENDING}
+        for position, (title, content) in enumerate(articles)
+    ])
+    db.session.commit()
+    
+    job_runner.wake()
+    status_url = url_for('job_status', job_id=job.id)
+    return jsonify({'success': True, 'job': job.to_dict(), 'status_url': status_url}), 202, {'Location': status_url}
+
+@app.route('/api/jobs')
+def list_jobs():
+    """Most recent jobs, optionally filtered by ?status="""
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    query = ScoringJob.query
+    status = request.args.get('status')
+    if status:
+        query = query.filter(ScoringJob.status == status)
+    recent = query.order_by(ScoringJob.created_at.desc()).limit(limit).all()
+    return jsonify({'success': True, 'jobs': [job.to_dict() for job in recent]})
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """Progress, throughput and results scored so far (?after=<position>&per_page=)"""
+    job = db.session.get(ScoringJob, job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    
+    per_page = min(max(request.args.get('per_page', 50, type=int), 0), JOBS_CONFIG['max_results_per_page'])
+    after = request.args.get('after', -1, type=int)
+    scored = (ScoringJobItem.query
+              .filter(ScoringJobItem.job_id == job_id,
+                      ScoringJobItem.position > after,
+                      ScoringJobItem.status != jobs.ITEM_PENDING)
+              .order_by(ScoringJobItem.position)
+              .limit(per_page + 1)
+              .all())
+    has_more = len(scored) > per_page
+    scored = scored[:per_page]
+    return jsonify({
+        'success': True,
+        'job': job.to_dict(),
+        'results': [item.to_dict() for item in scored],
+        'has_more': has_more,
+        'next_after': scored[-1].position if scored else (after if after >= 0 else None)
+    })
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued or running job; chunks already scored are kept"""
+    cancelled = db.session.execute(
+        db.update(ScoringJob)
+        .where(ScoringJob.id == job_id, ScoringJob.status.in_([jobs.QUEUED, jobs.RUNNING]))
+        .values(status=jobs.CANCELLED, finished_at=datetime.utcnow(), owner=None)
+    ).rowcount
+    db.session.commit()
+    job = db.session.get(ScoringJob, job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    if not cancelled:
+        return jsonify({'success': False, 'message': f'Job is already {job.status}', 'job': job.to_dict()}), 409
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+def _busy_response(error):
+    metrics.record_rejection(error.queue)
+    return jsonify({
+        'success': False,
+        'message': 'Server is busy, please retry shortly'
+    }), 503, {'Retry-After': str(EXECUTOR_CONFIG['retry_after'])}
+
+def _not_ready_response():
+    return jsonify({
+        'success': False,
+        'message': 'The model is still loading, please retry shortly'
+    }), 503, {'Retry-After': '5'}
+
+# Load the model: in the background (the app answers /health/live at once
+# and prediction requests get 503 until it is ready) or before serving
+detector_loader.start()
+if STARTUP_CONFIG['lazy_model_loading']:
+    logger.info(f"🔄 Loading the model in the background, web layer ready after {startup_timer.elapsed():.2f}s")
+else:
+    detector_loader.wait()
+
 if __name__ == '__main__':
     # Get port from environment variable (for GCP deployment)
     port = int(os.environ.get('PORT', 5000))
-    debug_mode = os.environ.get('FLASK_ENV') != 'production'
+    debug_mode = app.config.get('DEBUG', False)
     
     print("🚀 Starting Flask Fake News Detection Application...")
     print(f"🔗 Access the application at: http://localhost:{port}")
@@ -3,6 +3,8 @@ from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import os
 import re
+from config import SUSPICIOUS_PATTERNS
+from patterns import get_matcher
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -46,27 +48,13 @@ class SystemStats(db.Model):
 # Simple Fake News Detector (Demo Version)
 class SimpleFakeNewsDetector:
     def __init__(self):
-        self.suspicious_patterns = [
-            'shocking', 'exclusive', 'secret', 'urgent', 'miracle', 'breaking',
-            'doctors hate', 'one weird trick', 'you won\'t believe', 'leaked',
-            'government cover', 'big pharma', 'they don\'t want you to know',
-            'amazing discovery', 'scientists shocked', 'unbelievable', 'incredible'
-        ]
+        self.suspicious_patterns = list(SUSPICIOUS_PATTERNS)
     
     def analyze_suspicious_patterns(self, text):
         """Analyze text for suspicious patterns common in fake news"""
-        text_lower = text.lower()
-        
-        # Count suspicious patterns
-        pattern_count = sum(1 for pattern in self.suspicious_patterns 
-                          if pattern in text_lower)
-        
-        # Check for excessive capitalization
-        words = text.split()
-        caps_ratio = sum(1 for word in words if word.isupper()) / len(words) if words else 0
-        
-        # Check for excessive punctuation
-        exclamation_count = text.count('!')
+        # Pattern hits, capitalization and punctuation counts
+        matcher = get_matcher(tuple(self.suspicious_patterns))
+        pattern_count, caps_ratio, exclamation_count = matcher.features(text)
         
         # Calculate suspicion score
         suspicion_score = (
@@ -0,0 +1,181 @@
+"""
+Inference Backends
+==================
+Pluggable runtimes for the detector's classification model.
+
+A backend turns a tokenized batch (``input_ids`` and ``attention_mask``)
+into pipeline-style ``{'label', 'score'}`` dictionaries:
+
+- ``'torch'`` runs the Hugging Face model in eager PyTorch (default)
+- ``'onnx'``  exports the model to ONNX once, caches the file next to the
+  model and runs it with ONNX Runtime's graph optimizations and a tunable
+  number of intra-op threads
+
+Register further runtimes in ``BACKENDS``.
+"""
+
+import hashlib
+import inspect
+from abc import ABC, abstractmethod
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+ONNX_OPSET = 14
+
+
+class InferenceBackend(ABC):
+    """Base class: subclasses compute logits, scoring is shared"""
+
+    name = None
+
+    def __init__(self, model, **options):
+        self.model = model
+        self.id2label = model.config.id2label
+
+    @abstractmethod
+    def logits(self, input_ids, attention_mask):
+        """Float logits tensor of shape (batch, labels)"""
+
+    def classify(self, encoded):
+        import torch
+
+        logits = self.logits(encoded['input_ids'], encoded['attention_mask']).float()
+        if logits.shape[-1] == 1:
+            probabilities = torch.sigmoid(logits)
+        else:
+            probabilities = torch.softmax(logits, dim=-1)
+        scores, label_ids = probabilities.max(dim=-1)
+        return [
+            {'label': self.id2label[label_id], 'score': score}
+            for label_id, score in zip(label_ids.tolist(), scores.tolist())
+        ]
+
+
+class TorchBackend(InferenceBackend):
+    name = 'torch'
+
+    def logits(self, input_ids, attention_mask):
+        import torch
+
+        with torch.no_grad():
+            return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+class OnnxBackend(InferenceBackend):
+    """ONNX Runtime session over an exported copy of the model"""
+
+    name = 'onnx'
+
+    def __init__(self, model, cache_dir='models/onnx', intra_op_threads=0, **options):
+        super().__init__(model)
+        import onnxruntime
+
+        self.path = onnx_model_path(model, cache_dir)
+        if not os.path.exists(self.path):
+            export_onnx(model, self.path)
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            session_options.intra_op_num_threads = intra_op_threads
+        session_options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            self.path, session_options, providers=['CPUExecutionProvider']
+        )
+
+    def logits(self, input_ids, attention_mask):
+        import torch
+
+        outputs = self.session.run(['logits'], {
+            'input_ids': input_ids.numpy(),
+            'attention_mask': attention_mask.numpy()
+        })
+        return torch.from_numpy(outputs[0])
+
+
+BACKENDS = {
+    'torch': TorchBackend,
+    'onnx': OnnxBackend
+}
+
+
+def create_backend(name, model, **options):
+    """Instantiate a backend, falling back to torch if it cannot be built"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {name}")
+    try:
+        start = time.perf_counter()
+        backend = BACKENDS[name](model, **options)
+        logger.info(f"✅ {name} inference backend ready ({time.perf_counter() - start:.2f}s)")
+        return backend
+    except Exception as e:
+        if name == 'torch':
+            raise
+        logger.warning(f"⚠️ {name} backend unavailable, using torch: {e}")
+        return TorchBackend(model)
+
+
+def onnx_model_path(model, cache_dir):
+    """Cache location of a model's ONNX export.
+
+    Models loaded from a local directory (e.g. a bundle) keep the export next
+    to their weights; hub models use ``cache_dir``. The file name carries a
+    fingerprint of the model identity, so a changed model is exported again.
+    """
+    name = getattr(model, 'name_or_path', '') or model.config.model_type
+    local_dir = getattr(model, 'bundle_path', None) or (name if os.path.isdir(name) else None)
+    identity = '\n'.join([
+        name,
+        str(getattr(model.config, '_commit_hash', None)),
+        model.config.to_json_string(use_diff=False)
+    ])
+    fingerprint = hashlib.sha1(identity.encode('utf-8')).hexdigest()[:12]
+    if local_dir:
+        directory = local_dir
+    else:
+        directory = os.path.join(cache_dir, re.sub(r'[^A-Za-z0-9_.-]+', '_', name))
+    return os.path.join(directory, f'model-{fingerprint}.onnx')
+
+
+def export_onnx(model, path):
+    """Export a sequence-classification model with dynamic batch and length axes"""
+    import torch
+
+    class LogitsOnly(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask):
+            return self.inner(input_ids=input_ids, attention_mask=attention_mask).logits
+
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    sample = torch.ones((2, 8), dtype=torch.long)
+    kwargs = {}
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        kwargs['dynamo'] = False
+
+    # Export to a temporary file first so other workers never see a partial file
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    with torch.no_grad():
+        torch.onnx.export(
+            LogitsOnly(model).eval(),
+            (sample, sample),
+            temporary_path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch'}
+            },
+            opset_version=ONNX_OPSET,
+            **kwargs
+        )
+    os.replace(temporary_path, path)
+    logger.info(f"✅ Exported classifier to {path} ({time.perf_counter() - start:.2f}s)")
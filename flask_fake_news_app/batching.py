@@ -0,0 +1,202 @@
+"""
+Dynamic Micro-Batching
+======================
+Groups concurrent single-article prediction requests into batched forward
+passes through ``BERTFakeNewsDetector.predict_batch``.
+
+Request threads call ``MicroBatcher.submit`` and block until their own result
+is ready. A single worker thread drains the queue, waiting at most
+``max_wait_ms`` after the first queued request (or until ``max_batch_size``
+requests are waiting), groups the requests by approximate token length and
+scores each group in one batched call (on the inference executor, if given).
+"""
+
+import math
+import os
+import queue
+import threading
+import time
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio used to bucket requests before tokenization
+CHARS_PER_TOKEN = 4
+LENGTH_BUCKETS = (64, 128, 256)
+
+
+class QueueFullError(Exception):
+    """Raised when the inference queue cannot accept more requests"""
+
+    def __init__(self, message, queue='micro_batch'):
+        super().__init__(message)
+        # Which queue rejected the request (for metrics)
+        self.queue = queue
+
+
+class _PendingRequest:
+    __slots__ = ('title', 'text', 'enqueued_at', 'done', 'result', 'error')
+
+    def __init__(self, title, text):
+        self.title = title
+        self.text = text
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SampleWindow:
+    """Fixed-size window of recent samples with percentile summaries"""
+
+    def __init__(self, size=1000):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, value):
+        with self._lock:
+            self._samples.append(value)
+            self.count += 1
+
+    def summary(self):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {'count': self.count, 'p50': None, 'p99': None, 'max': None}
+        return {
+            'count': self.count,
+            'p50': round(percentile(samples, 50), 3),
+            'p99': round(percentile(samples, 99), 3),
+            'max': round(samples[-1], 3)
+        }
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return None
+    rank = math.ceil(pct / 100 * len(sorted_samples))
+    return sorted_samples[min(max(rank, 1), len(sorted_samples)) - 1]
+
+
+class MicroBatcher:
+    """Collect concurrent predictions into short-lived batches"""
+
+    def __init__(self, detector, max_batch_size=16, max_wait_ms=10, max_queue_size=256, executor=None):
+        self.detector = detector
+        # Optional InferenceExecutor that runs the batched forward passes
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._worker = None
+        self._worker_pid = None
+        self._start_lock = threading.Lock()
+
+        self.queue_wait_ms = SampleWindow()
+        self.batch_sizes = SampleWindow()
+        self.batch_latency_ms = SampleWindow()
+        self.rejected = 0
+        self._rejected_lock = threading.Lock()
+
+    def submit(self, title, text, timeout=None):
+        """Queue one article and block until its prediction is available"""
+        self._ensure_worker()
+
+        pending = _PendingRequest(title, text)
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            with self._rejected_lock:
+                self.rejected += 1
+            raise QueueFullError("Inference queue is full")
+
+        if not pending.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for batched prediction")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def metrics(self):
+        """Queue and batch statistics (milliseconds for latencies)"""
+        return {
+            'queue_depth': self._queue.qsize(),
+            'rejected': self.rejected,
+            'queue_wait_ms': self.queue_wait_ms.summary(),
+            'batch_size': self.batch_sizes.summary(),
+            'batch_latency_ms': self.batch_latency_ms.summary()
+        }
+
+    def _ensure_worker(self):
+        # Threads do not survive fork, so (re)start the worker in each process
+        if self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or self._worker_pid != os.getpid() or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._worker_pid = os.getpid()
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._process(batch)
+            except Exception as e:
+                logger.error(f"Micro-batch worker error: {e}")
+
+    def _collect(self):
+        """Block for the first request, then gather more until the window closes"""
+        first = self._queue.get()
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Window closed: still take whatever is already waiting
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _process(self, batch):
+        started = time.perf_counter()
+        for pending in batch:
+            self.queue_wait_ms.add((started - pending.enqueued_at) * 1000)
+
+        for group in self._group_by_length(batch):
+            group_started = time.perf_counter()
+            try:
+                titles = [pending.title for pending in group]
+                texts = [pending.text for pending in group]
+                if self.executor is not None:
+                    results = self.executor.submit(
+                        self.detector.predict_batch, titles, texts, batch_size=len(group), block=True
+                    )
+                else:
+                    results = self.detector.predict_batch(titles, texts, batch_size=len(group))
+                for pending, result in zip(group, results):
+                    pending.result = result
+            except Exception as e:
+                logger.error(f"Batched prediction failed: {e}")
+                for pending in group:
+                    pending.error = e
+            finally:
+                self.batch_sizes.add(len(group))
+                self.batch_latency_ms.add((time.perf_counter() - group_started) * 1000)
+                for pending in group:
+                    pending.done.set()
+
+    def _group_by_length(self, batch):
+        """Split a batch into groups of similar estimated token length"""
+        groups = {}
+        for pending in batch:
+            estimated_tokens = (len(pending.title) + len(pending.text)) // CHARS_PER_TOKEN
+            bucket = sum(1 for boundary in LENGTH_BUCKETS if estimated_tokens > boundary)
+            groups.setdefault(bucket, []).append(pending)
+        return [groups[bucket] for bucket in sorted(groups)]
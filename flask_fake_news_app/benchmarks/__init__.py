@@ -0,0 +1,8 @@
+"""
+Performance Benchmarks
+======================
+Standalone benchmark scripts for the detector and the web application.
+
+Run them from the ``flask_fake_news_app`` directory, for example:
+    python -m benchmarks.micro_batching --threads 8 --requests 400
+"""
@@ -0,0 +1,118 @@
+"""
+Inference backend benchmark
+===========================
+Compares the PyTorch and ONNX Runtime backends on the same detector at batch
+sizes 1, 8 and 32: model-only latency on pre-tokenized batches, end-to-end
+``predict_batch`` throughput, and the largest probability difference between
+the two runtimes.
+
+Usage:
+    python -m benchmarks.backends --articles 64 --repeats 5
+    python -m benchmarks.backends --model models/bert_fake_news_detector_YYYYMMDD_HHMMSS --threads 4
+"""
+
+import argparse
+import json
+
+from benchmarks.common import sample_articles, summarize, print_summary, timed
+
+BATCH_SIZES = (1, 8, 32)
+BACKEND_NAMES = ('torch', 'onnx')
+
+
+def build_detector(model_path):
+    if model_path:
+        from model_loader import load_model
+        return load_model(model_path)
+    from bert_detector import create_detector
+    return create_detector()
+
+
+def run_backend(detector, name, articles, batch_sizes, repeats):
+    detector.set_backend(name)
+    detector._inference_backend()  # export / session creation is not timed
+    report = {'backend': detector._backend.name}
+    probabilities = {}
+
+    for batch_size in batch_sizes:
+        batches = [articles[i:i + batch_size] for i in range(0, len(articles), batch_size)]
+        encodings = [
+            detector.encode([title for title, _ in batch], [text for _, text in batch])
+            for batch in batches
+        ]
+        detector._classify(encodings[0])  # warm-up
+
+        model_latencies = []
+        model_elapsed = 0.0
+        for _ in range(repeats):
+            for encoded in encodings:
+                outputs, seconds = timed(detector._classify, encoded)
+                model_latencies.append(seconds)
+                model_elapsed += seconds
+
+        titles = [title for title, _ in articles]
+        texts = [text for _, text in articles]
+        end_to_end = []
+        for _ in range(repeats):
+            results, seconds = timed(detector.predict_batch, titles, texts, batch_size=batch_size)
+            end_to_end.append(seconds)
+        probabilities[batch_size] = [result['fake_probability'] for result in results]
+
+        best = min(end_to_end)
+        report[f'batch_{batch_size}'] = {
+            'model_batch': summarize(model_latencies, model_elapsed),
+            'predict_batch_articles_per_s': round(len(articles) / best, 2)
+        }
+    return report, probabilities
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--articles', type=int, default=64)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=list(BATCH_SIZES))
+    parser.add_argument('--model', help='bundle or .pkl to load instead of building from the hub')
+    parser.add_argument('--threads', type=int, help='ONNX Runtime intra-op threads (default: config)')
+    parser.add_argument('--output', help='write the report as JSON')
+    args = parser.parse_args()
+
+    from config import INFERENCE_CONFIG
+    if args.threads is not None:
+        INFERENCE_CONFIG['onnx_intra_op_threads'] = args.threads
+
+    detector = build_detector(args.model)
+    if detector is None or detector.classifier_pipeline is None:
+        raise SystemExit("Classifier could not be loaded; this benchmark needs the BERT models")
+
+    articles = sample_articles(args.articles)
+    report = {}
+    probabilities = {}
+    for name in BACKEND_NAMES:
+        report[name], probabilities[name] = run_backend(detector, name, articles, args.batch_sizes, args.repeats)
+        for batch_size in args.batch_sizes:
+            entry = report[name][f'batch_{batch_size}']
+            print_summary(f'{name} model batch={batch_size}', entry['model_batch'])
+            print(f"{name + ' predict_batch':<28} batch={batch_size}, "
+                  f"articles_per_s={entry['predict_batch_articles_per_s']}")
+
+    report['max_fake_probability_diff'] = max(
+        abs(expected - actual)
+        for batch_size in args.batch_sizes
+        for expected, actual in zip(probabilities['torch'][batch_size], probabilities['onnx'][batch_size])
+    )
+    report['speedup'] = {
+        f'batch_{batch_size}': round(
+            report['torch'][f'batch_{batch_size}']['model_batch']['mean_ms'] /
+            report['onnx'][f'batch_{batch_size}']['model_batch']['mean_ms'], 2
+        )
+        for batch_size in args.batch_sizes
+    }
+    print(f"{'max_fake_probability_diff':<28} {report['max_fake_probability_diff']:.2e}")
+    print(f"{'onnx speedup (model)':<28} {report['speedup']}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
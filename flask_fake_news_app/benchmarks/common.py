@@ -0,0 +1,130 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+
+import os
+import random
+import sys
+import time
+
+# Allow "python benchmarks/<name>.py" as well as "python -m benchmarks.<name>"
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from batching import percentile
+
+WORDS = (
+    'the government said on tuesday that the new policy would take effect next year '
+    'according to officials researchers at the university published a study in the journal '
+    'shocking secret breaking urgent miracle you won\'t believe big pharma leaked exclusive'
+).split()
+
+
+def sample_articles(count, min_words=20, max_words=400, seed=42):
+    """Deterministic synthetic (title, text) pairs with varied lengths"""
+    rng = random.Random(seed)
+    articles = []
+    for _ in range(count):
+        title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 15))).capitalize()
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+        articles.append((title, text))
+    return articles
+
+
+def summarize(latencies, elapsed=None):
+    """Latency percentiles in milliseconds plus throughput for a list of seconds"""
+    samples = sorted(latency * 1000 for latency in latencies)
+    summary = {
+        'count': len(samples),
+        'p50_ms': round(percentile(samples, 50), 3) if samples else None,
+        'p95_ms': round(percentile(samples, 95), 3) if samples else None,
+        'p99_ms': round(percentile(samples, 99), 3) if samples else None,
+        'mean_ms': round(sum(samples) / len(samples), 3) if samples else None
+    }
+    if elapsed:
+        summary['throughput_per_s'] = round(len(samples) / elapsed, 2)
+    return summary
+
+
+def timed(func, *args, **kwargs):
+    """Call func and return (result, seconds)"""
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def stub_detector():
+    """Detector with pattern analysis only, so web benchmarks run without model downloads"""
+    from bert_detector import BERTFakeNewsDetector
+    from config import SUSPICIOUS_PATTERNS
+
+    detector = BERTFakeNewsDetector.__new__(BERTFakeNewsDetector)
+    detector.model_name = 'stub'
+    detector.tokenizer = None
+    detector._tokenizer_failed = True  # no fallback tokenizer download either
+    detector.classifier_pipeline = None
+    detector.suspicious_patterns = list(SUSPICIOUS_PATTERNS)
+    return detector
+
+
+def tiny_detector(model_path=None, seed=0):
+    """Detector with a small deterministic classifier, built offline.
+    
+    With ``model_path`` a locally cached Hugging Face classification model is
+    used instead; either way nothing is downloaded.
+    """
+    import torch
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors
+    from transformers import (AutoModelForSequenceClassification, AutoTokenizer, DistilBertConfig,
+                              DistilBertForSequenceClassification, PreTrainedTokenizerFast, pipeline)
+    from bert_detector import BERTFakeNewsDetector
+
+    if model_path:
+        tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
+        model = AutoModelForSequenceClassification.from_pretrained(model_path, local_files_only=True)
+    else:
+        # Whole-word vocabulary over the sample articles plus single characters
+        # for WordPiece fallback, so tokenization does real work
+        specials = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]']
+        words = sorted(set(word.lower().strip("'") for word in WORDS))
+        characters = list('abcdefghijklmnopqrstuvwxyz0123456789')
+        vocab = specials + words + characters + [f'##{char}' for char in characters]
+        vocab = {token: index for index, token in enumerate(dict.fromkeys(vocab))}
+
+        backend = Tokenizer(models.WordPiece(vocab, unk_token='[UNK]'))
+        backend.normalizer = normalizers.BertNormalizer(lowercase=True)
+        backend.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+        backend.post_processor = processors.TemplateProcessing(
+            single='[CLS] $A [SEP]', pair='[CLS] $A [SEP] $B [SEP]',
+            special_tokens=[('[CLS]', vocab['[CLS]']), ('[SEP]', vocab['[SEP]'])]
+        )
+        tokenizer = PreTrainedTokenizerFast(
+            tokenizer_object=backend, model_max_length=512, unk_token='[UNK]', pad_token='[PAD]',
+            cls_token='[CLS]', sep_token='[SEP]', mask_token='[MASK]'
+        )
+        config = DistilBertConfig(
+            vocab_size=len(tokenizer), dim=64, n_layers=2, n_heads=2, hidden_dim=128,
+            id2label={0: 'NON_TOXIC', 1: 'TOXIC'}, label2id={'NON_TOXIC': 0, 'TOXIC': 1}
+        )
+        torch.manual_seed(seed)
+        model = DistilBertForSequenceClassification(config)
+        model.name_or_path = 'tiny-stub'
+    model.eval()
+
+    classifier = pipeline('text-classification', model=model, tokenizer=tokenizer, device=-1)
+    return BERTFakeNewsDetector.from_components('tiny-stub', tokenizer, classifier)
+
+
+def load_app(database_path):
+    """Import the Flask app against a scratch SQLite database with the stub detector"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{database_path}'
+    import app as app_module
+
+    app_module.detector = stub_detector()
+    return app_module
+
+
+def print_summary(name, summary):
+    fields = ', '.join(f"{key}={value}" for key, value in summary.items())
+    print(f"{name:<28} {fields}")
@@ -0,0 +1,140 @@
+"""
+Database engine read/write load test
+====================================
+Runs concurrent writers (one ``news_analysis`` insert and commit each, like
+``/analyze``) against concurrent readers (the ``/history`` first page and the
+``/stats`` recent-activity query) on a file-backed SQLite database, once with
+SQLAlchemy's default engine settings (rollback journal, no PRAGMAs) and once
+with the tuned engine from ``database.py`` (WAL, synchronous=NORMAL, mmap,
+busy timeout, larger pool).
+
+Usage:
+    python -m benchmarks.db_engine --writers 4 --readers 8 --seconds 10
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+
+from benchmarks.common import load_app, summarize, print_summary
+
+
+def make_engine(path, tuned):
+    from config import get_config
+    from database import engine_options, install_sqlite_pragmas
+
+    uri = f'sqlite:///{path}'
+    config = get_config()
+    if not tuned:
+        return create_engine(uri)
+    engine = create_engine(uri, **engine_options(uri, config))
+    install_sqlite_pragmas(engine, config.SQLITE_PRAGMAS)
+    return engine
+
+
+def run_load(app_module, engine, writers, readers, seconds, seed_rows):
+    table = app_module.NewsAnalysis.__table__
+    table.metadata.create_all(engine)
+
+    def row(i):
+        return {
+            'title': f'Load test article {i}',
+            'content': 'Synthetic load test content ' * 20,
+            'prediction': 'Fake' if i % 2 else 'Real',
+            'confidence': 0.8,
+            'fake_probability': 0.8 if i % 2 else 0.2,
+            'real_probability': 0.2 if i % 2 else 0.8,
+            'suspicious_patterns_score': 0.1,
+            'pipeline_score': 0.5,
+            'created_at': datetime.utcnow()
+        }
+
+    with engine.begin() as connection:
+        connection.execute(table.insert(), [row(i) for i in range(seed_rows)])
+
+    history_query = select(table).order_by(table.c.created_at.desc(), table.c.id.desc()).limit(21)
+    stats_query = select(table).order_by(table.c.created_at.desc()).limit(10)
+
+    latencies = {'write': [], 'read': []}
+    errors = {'write': 0, 'read': 0}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def writer(worker):
+        i = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with engine.begin() as connection:
+                    connection.execute(table.insert(), row(worker * 1000000 + i))
+                ok = True
+            except OperationalError:
+                ok = False
+            record('write', ok, time.perf_counter() - start)
+            i += 1
+
+    def reader(worker):
+        i = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with engine.connect() as connection:
+                    connection.execute(history_query if i % 2 else stats_query).fetchall()
+                ok = True
+            except OperationalError:
+                ok = False
+            record('read', ok, time.perf_counter() - start)
+            i += 1
+
+    def record(kind, ok, latency):
+        with lock:
+            if ok:
+                latencies[kind].append(latency)
+            else:
+                errors[kind] += 1
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+
+    return {
+        kind: dict(summarize(samples, elapsed), errors=errors[kind])
+        for kind, samples in latencies.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--seed-rows', type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app_module = load_app(os.path.join(tmp, 'app.sqlite'))
+        for tuned in (False, True):
+            name = 'tuned' if tuned else 'default'
+            engine = make_engine(os.path.join(tmp, f'{name}.sqlite'), tuned)
+            results = run_load(app_module, engine, args.writers, args.readers, args.seconds, args.seed_rows)
+            print(f"\n=== {name} engine ({args.writers} writers, {args.readers} readers) ===")
+            for kind, summary in results.items():
+                print_summary(kind, summary)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+History pagination benchmark
+============================
+Grows a scratch ``news_analysis`` table and times ``/api/history`` at each
+size, comparing the ``?page=`` compatibility path (OFFSET scan plus
+``COUNT(*)``) with keyset pages (``?after=<id>``), both near the start and
+halfway through the table.
+
+Usage:
+    python -m benchmarks.history_pagination --sizes 10000 100000 1000000 10000000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import load_app, summarize, print_summary
+
+INSERT_CHUNK = 50000
+
+
+def grow_table(app_module, start, stop, seed=42):
+    """Insert synthetic analyses with ids start+1..stop, one per second"""
+    rng = random.Random(seed + start)
+    epoch = datetime(2024, 1, 1)
+    table = app_module.NewsAnalysis.__table__
+    with app_module.app.app_context():
+        for chunk_start in range(start, stop, INSERT_CHUNK):
+            rows = []
+            for i in range(chunk_start, min(chunk_start + INSERT_CHUNK, stop)):
+                fake = rng.random()
+                rows.append({
+                    'id': i + 1,
+                    'title': f'Article {i}',
+                    'content': 'Synthetic benchmark content',
+                    'prediction': 'Fake' if fake > 0.5 else 'Real',
+                    'confidence': max(fake, 1 - fake),
+                    'fake_probability': fake,
+                    'real_probability': 1 - fake,
+                    'suspicious_patterns_score': 0.0,
+                    'pipeline_score': 0.5,
+                    'created_at': epoch + timedelta(seconds=i)
+                })
+            app_module.db.session.execute(table.insert(), rows)
+            app_module.db.session.commit()
+
+
+def time_requests(client, url, repeats):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        response = client.get(url)
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return summarize(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app_module = load_app(os.path.join(tmp, 'bench.sqlite'))
+        client = app_module.app.test_client()
+
+        rows = 0
+        for size in sorted(args.sizes):
+            grow_table(app_module, rows, size)
+            rows = size
+            middle_page = size // args.per_page // 2
+            # Row ids are assigned oldest first, so the middle page starts after this id
+            middle_id = size - middle_page * args.per_page + 1
+            per_page = f'per_page={args.per_page}'
+
+            print(f"\n=== {size:,} rows ===")
+            cases = {
+                'page=1 (offset)': f'/api/history?page=1&{per_page}',
+                f'page={middle_page} (offset)': f'/api/history?page={middle_page}&{per_page}',
+                'first page (keyset)': f'/api/history?{per_page}',
+                'middle page (keyset)': f'/api/history?after={middle_id}&{per_page}',
+                'middle page, Fake only (keyset)': f'/api/history?after={middle_id}&prediction=Fake&{per_page}',
+                'first page + total (keyset)': f'/api/history?total=true&{per_page}',
+            }
+            for name, url in cases.items():
+                print_summary(name, time_requests(client, url, args.repeats))
+
+
+if __name__ == '__main__':
+    main()
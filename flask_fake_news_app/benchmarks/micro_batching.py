@@ -0,0 +1,61 @@
+"""
+Micro-batching benchmark
+========================
+Compares p50/p99 latency and throughput of concurrent single-article
+predictions called directly on the detector (the current gunicorn thread
+behaviour) against the same load routed through ``MicroBatcher``.
+
+Usage:
+    python -m benchmarks.micro_batching --threads 8 --requests 400
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import sample_articles, summarize, print_summary
+from batching import MicroBatcher
+from bert_detector import create_detector
+
+
+def run_load(predict, articles, threads):
+    """Fire all articles from a thread pool and collect per-request latency"""
+    def call(article):
+        started = time.perf_counter()
+        predict(*article)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(call, articles))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--max-batch-size', type=int, default=16)
+    parser.add_argument('--max-wait-ms', type=float, default=10)
+    args = parser.parse_args()
+
+    detector = create_detector()
+    articles = sample_articles(args.requests)
+
+    # Warm up both paths so lazy initialisation is not measured
+    detector.predict(*articles[0])
+    batcher = MicroBatcher(detector, max_batch_size=args.max_batch_size,
+                           max_wait_ms=args.max_wait_ms, max_queue_size=args.requests)
+    batcher.submit(*articles[0])
+
+    print_summary('direct predict', run_load(detector.predict, articles, args.threads))
+    print_summary('micro-batched', run_load(batcher.submit, articles, args.threads))
+
+    metrics = batcher.metrics()
+    print_summary('  queue wait (ms)', metrics['queue_wait_ms'])
+    print_summary('  batch size', metrics['batch_size'])
+    print_summary('  batch latency (ms)', metrics['batch_latency_ms'])
+
+
+if __name__ == '__main__':
+    main()
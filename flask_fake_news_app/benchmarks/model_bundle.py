@@ -0,0 +1,125 @@
+"""
+Model bundle load benchmark
+===========================
+Compares loading a pickled detector with loading a memory-mapped bundle.
+It reports load time, peak resident memory during the load, resident memory
+(RSS) after one prediction, and proportional set size (PSS). PSS splits
+shared pages between the processes using them. Several processes hold the
+model at the same time, as gunicorn workers would.
+
+Without --pickle/--bundle both are created from ``create_detector()`` in a
+temporary directory.
+
+Usage:
+    python -m benchmarks.model_bundle --processes 4
+    python -m benchmarks.model_bundle --pickle models/x.pkl --bundle models/x
+"""
+
+import argparse
+import json
+import os
+import pickle
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import APP_DIR
+
+
+def memory_kb():
+    """(rss_kb, pss_kb) of this process; PSS is None where smaps_rollup is unavailable"""
+    values = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if parts[0] in ('Rss:', 'Pss:'):
+                    values[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        values['Rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return values.get('Rss'), values.get('Pss')
+
+
+def child(model_path):
+    """Load one model, score one article, report, then wait for the parent"""
+    from model_loader import load_model
+
+    start = time.perf_counter()
+    detector = load_model(model_path)
+    load_seconds = time.perf_counter() - start
+    # High-water mark of the load itself, before inference allocates anything
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    detector.predict("Benchmark", "A short article used to touch the model weights once.")
+    rss, pss = memory_kb()
+    print(json.dumps({'load_s': round(load_seconds, 3), 'peak_rss_mb': round(peak_rss / 1024, 1),
+                      'rss_mb': rss and round(rss / 1024, 1), 'pss_mb': pss and round(pss / 1024, 1)}), flush=True)
+    sys.stdin.read()
+
+
+def read_report(process):
+    for line in process.stdout:
+        if line.startswith('{'):
+            return json.loads(line)
+    raise RuntimeError(f"Benchmark child exited with code {process.wait()}")
+
+
+def measure(model_path, processes):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([APP_DIR, os.path.dirname(APP_DIR)]))
+    children = [
+        subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.model_bundle', '--child', model_path],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            cwd=APP_DIR, env=env, text=True
+        )
+        for _ in range(processes)
+    ]
+    # Read each report; all children keep the model loaded until every one reported
+    reports = [read_report(process) for process in children]
+    for process in children:
+        process.stdin.close()
+        process.wait()
+
+    def mean(key):
+        values = [report[key] for report in reports if report[key] is not None]
+        return round(sum(values) / len(values), 3) if values else None
+
+    total_pss = sum(report['pss_mb'] for report in reports) if all(r['pss_mb'] for r in reports) else None
+    return {'processes': processes, 'load_s': mean('load_s'), 'peak_rss_mb': mean('peak_rss_mb'),
+            'rss_mb': mean('rss_mb'), 'pss_mb': mean('pss_mb'), 'total_pss_mb': total_pss and round(total_pss, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pickle', help='pickled detector (.pkl)')
+    parser.add_argument('--bundle', help='bundle directory')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_path, bundle_path = args.pickle, args.bundle
+        if not pickle_path or not bundle_path:
+            from bert_detector import create_detector
+            from model_bundle import save_bundle
+            detector = create_detector()
+            if not pickle_path:
+                pickle_path = os.path.join(tmp, 'bert_fake_news_detector_bench.pkl')
+                with open(pickle_path, 'wb') as f:
+                    pickle.dump(detector, f)
+            if not bundle_path:
+                bundle_path = save_bundle(detector, os.path.join(tmp, 'bert_fake_news_detector_bench'))
+
+        for name, path in (('pickle', pickle_path), ('bundle', bundle_path)):
+            for processes in sorted({1, args.processes}):
+                summary = measure(path, processes)
+                print(f"{name:<8} " + ', '.join(f"{key}={value}" for key, value in summary.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Suspicious pattern benchmark
+============================
+Compares the original per-pattern substring scan with the compiled
+``PatternMatcher``, for the configured phrase list and for a large
+synthetic list such as an editorial team might maintain.
+
+Usage:
+    python -m benchmarks.patterns --articles 500 --phrases 5000
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.common import sample_articles, print_summary
+from config import SUSPICIOUS_PATTERNS
+from patterns import PatternMatcher
+
+
+def legacy_features(patterns, text):
+    """The original implementation: one substring scan per pattern"""
+    text_lower = text.lower()
+    pattern_count = sum(1 for pattern in patterns if pattern in text_lower)
+    words = text.split()
+    caps_ratio = sum(1 for word in words if word.isupper()) / len(words) if words else 0
+    return (pattern_count, caps_ratio, text.count('!'))
+
+
+def synthetic_phrases(count, seed=7):
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    phrases = set(SUSPICIOUS_PATTERNS)
+    while len(phrases) < count:
+        words = [''.join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(rng.randint(1, 3))]
+        phrases.add(' '.join(words))
+    return sorted(phrases)
+
+
+def measure(label, func, texts):
+    started = time.perf_counter()
+    result = func(texts)
+    elapsed = time.perf_counter() - started
+    print_summary(label, {
+        'total_ms': round(elapsed * 1000, 3),
+        'per_article_us': round(elapsed / len(texts) * 1e6, 2)
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--articles', type=int, default=500)
+    parser.add_argument('--phrases', type=int, default=5000)
+    args = parser.parse_args()
+
+    texts = [f"{title} {text}" for title, text in sample_articles(args.articles)]
+
+    for patterns in (list(SUSPICIOUS_PATTERNS), synthetic_phrases(args.phrases)):
+        print(f"\n{len(patterns)} patterns")
+        legacy = measure('  legacy substring scan', lambda items: [legacy_features(patterns, text) for text in items], texts)
+
+        for strategy in ('substring', 'regex'):
+            started = time.perf_counter()
+            matcher = PatternMatcher(patterns, strategy=strategy)
+            print(f"  {strategy} matcher build: {(time.perf_counter() - started) * 1000:.1f} ms")
+            single = measure(f'  {strategy}, per article', lambda items: [matcher.features(text) for text in items], texts)
+            batch = measure(f'  {strategy}, batch mode', matcher.features_batch, texts)
+            assert legacy == single == batch, "matcher results differ from the substring scan"
+
+        print(f"  default strategy: {PatternMatcher(patterns).strategy}")
+
+
+if __name__ == '__main__':
+    main()
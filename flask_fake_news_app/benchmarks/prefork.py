@@ -0,0 +1,250 @@
+"""
+Pre-fork model sharing: memory and throughput per worker count
+===============================================================
+Starts gunicorn with 1, 2, 4 and 8 workers, once with pre-fork sharing
+(``PREFORK_MODEL=true``: the master loads the detector and workers share it
+copy-on-write) and once with a private copy per worker. Each server is
+driven with concurrent ``POST /analyze`` requests for ``--duration`` seconds.
+The report then lists the server's memory after serving:
+
+- RSS: resident pages summed over master and workers (shared pages are
+  counted once per process, so this overstates the real cost)
+- PSS: proportional set size, where shared pages are split between the
+  processes that map them. Its sum is the memory the server really uses
+- USS per worker: pages private to one worker (what each extra worker costs)
+
+The served model is saved into a scratch ``models/`` directory and loaded by
+the app's usual startup path: the seeded stub classifier, or ``--model`` (a
+local Hugging Face model directory). ``--format pickle`` (default) loads the
+weights into private memory like a hub download. ``bundle`` memory-maps them,
+so they are shared through the page cache in either mode.
+
+Usage:
+    python -m benchmarks.prefork --model /path/to/model --workers 1 2 4 8 --output prefork.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import pickle
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import APP_DIR, sample_articles, summarize, tiny_detector
+
+MODES = {'prefork': 'true', 'per-worker': 'false'}
+
+
+def save_model(models_dir, model_path, model_format):
+    from model_bundle import BUNDLE_PREFIX, save_bundle
+
+    detector = tiny_detector(model_path)
+    os.makedirs(models_dir, exist_ok=True)
+    path = os.path.join(models_dir, f'{BUNDLE_PREFIX}20000101_000000')
+    if model_format == 'bundle':
+        save_bundle(detector, path)
+    else:
+        with open(f'{path}.pkl', 'wb') as f:
+            pickle.dump(detector, f)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(workdir, port, workers, mode, threads):
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join([APP_DIR, os.environ.get('PYTHONPATH', '')]),
+        HF_HUB_OFFLINE='1',
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.sqlite')}",
+        PERSISTENT_CACHE='false',
+        RESULT_CACHE='false',
+        PREFORK_MODEL=MODES[mode],
+        WEB_CONCURRENCY=str(workers),
+        PROMETHEUS_MULTIPROC_DIR=os.path.join(workdir, 'prometheus')
+    )
+    env.pop('FAKE_NEWS_METRICS_DIR_READY', None)
+    command = [
+        sys.executable, '-m', 'gunicorn', '-c', os.path.join(APP_DIR, 'gunicorn.conf.py'),
+        '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--threads', str(threads),
+        '--timeout', '300', 'app:app'
+    ]
+    return subprocess.Popen(
+        command, cwd=workdir, env=env, stdout=subprocess.DEVNULL,
+        stderr=open(os.path.join(workdir, 'gunicorn.log'), 'w')
+    )
+
+
+def worker_pids(master_pid):
+    try:
+        with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+            return [int(pid) for pid in f.read().split()]
+    except OSError:
+        return []
+
+
+def wait_until_ready(server, port, workers, timeout):
+    """Wait until every worker is forked and the app answers readiness checks"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {server.returncode}")
+        if len(worker_pids(server.pid)) >= workers:
+            ready = 0
+            # Readiness is per worker; several answers make it likely all are up
+            for _ in range(workers * 4):
+                status, _ = request(port, 'GET', '/health/ready')
+                ready += status == 200
+            if ready == workers * 4:
+                return
+        time.sleep(0.5)
+    raise TimeoutError("gunicorn did not become ready")
+
+
+def request(port, method, path, body=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    try:
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = connection.getresponse()
+        return response.status, response.read()
+    except OSError:
+        return None, b''
+    finally:
+        connection.close()
+
+
+def drive(port, concurrency, duration):
+    """Send distinct /analyze requests from several threads for duration seconds"""
+    articles = sample_articles(4096, seed=2)
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(index):
+        sent = 0
+        while time.perf_counter() < deadline:
+            title, text = articles[(index * 997 + sent) % len(articles)]
+            sent += 1
+            started = time.perf_counter()
+            status, _ = request(port, 'POST', '/analyze', {'title': f'{title} #{index}-{sent}', 'content': text})
+            with lock:
+                if status == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors.append(status)
+
+    started = time.perf_counter()
+    clients = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    summary = summarize(latencies, time.perf_counter() - started)
+    summary['errors'] = len(errors)
+    return summary
+
+
+def memory(pids):
+    """Sum RSS and PSS (MB) over the processes, plus each process's USS"""
+    totals = {'rss_mb': 0.0, 'pss_mb': 0.0}
+    uss = []
+    for pid in pids:
+        values = {}
+        try:
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) >= 2 and parts[0].endswith(':'):
+                        values[parts[0][:-1]] = int(parts[1]) / 1024
+        except OSError:
+            continue
+        totals['rss_mb'] += values.get('Rss', 0)
+        totals['pss_mb'] += values.get('Pss', 0)
+        uss.append(values.get('Private_Clean', 0) + values.get('Private_Dirty', 0))
+    return {key: round(value, 1) for key, value in totals.items()}, uss
+
+
+def run(workdir, mode, workers, args):
+    port = free_port()
+    server = start_server(workdir, port, workers, mode, args.threads)
+    try:
+        started = time.perf_counter()
+        wait_until_ready(server, port, workers, args.startup_timeout)
+        startup_s = time.perf_counter() - started
+        load = drive(port, args.concurrency or min(2 * workers, 16), args.duration)
+        pids = worker_pids(server.pid)
+        totals, uss = memory([server.pid] + pids)
+        return dict(
+            totals,
+            mode=mode,
+            workers=workers,
+            startup_s=round(startup_s, 1),
+            pss_per_worker_mb=round(totals['pss_mb'] / workers, 1),
+            worker_uss_mb=round(sum(uss[1:]) / max(1, len(uss) - 1), 1),
+            throughput_per_s=load['throughput_per_s'],
+            p50_ms=load['p50_ms'],
+            p95_ms=load['p95_ms'],
+            errors=load['errors']
+        )
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def print_table(rows):
+    header = (f"{'mode':<11} {'workers':>7} {'RSS MB':>9} {'PSS MB':>9} {'PSS/worker':>10} "
+              f"{'USS/worker':>10} {'req/s':>8} {'p50 ms':>8} {'startup s':>9}")
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        print(f"{row['mode']:<11} {row['workers']:>7} {row['rss_mb']:>9.1f} {row['pss_mb']:>9.1f} "
+              f"{row['pss_per_worker_mb']:>10.1f} {row['worker_uss_mb']:>10.1f} "
+              f"{row['throughput_per_s']:>8.1f} {row['p50_ms']:>8.1f} {row['startup_s']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--model', help='local Hugging Face model directory instead of the stub')
+    parser.add_argument('--format', choices=['pickle', 'bundle'], default='pickle')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--concurrency', type=int, default=0, help='client threads (default 2 per worker, max 16)')
+    parser.add_argument('--duration', type=float, default=15.0, help='seconds of load per server')
+    parser.add_argument('--startup-timeout', type=float, default=600.0)
+    parser.add_argument('--output', help='write the report as JSON')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='prefork-bench-')
+    try:
+        save_model(os.path.join(workdir, 'models'), args.model, args.format)
+        rows = []
+        for workers in args.workers:
+            for mode in args.modes:
+                rows.append(run(workdir, mode, workers, args))
+                print(f"{mode} x{workers}: PSS {rows[-1]['pss_mb']} MB, {rows[-1]['throughput_per_s']} req/s", flush=True)
+        print()
+        print_table(rows)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump({'settings': vars(args), 'cpu_count': os.cpu_count(), 'results': rows}, f, indent=2)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
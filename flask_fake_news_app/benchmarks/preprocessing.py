@@ -0,0 +1,127 @@
+"""
+Text preprocessing benchmark
+============================
+Times the notebook's cleaning (``df[col].apply(clean_text)`` over titles and
+texts, code copied verbatim) against ``preprocessing.preprocess_frame`` with
+1 and more worker processes, and checks that every cleaned string is
+byte-identical to the notebook's.
+
+Pass the dataset's ``Fake.csv`` and ``True.csv`` to run on the full dataset,
+loaded like the notebook does; without them synthetic articles are used.
+Needs the NLTK ``stopwords`` and ``punkt`` data (``punkt_tab`` on nltk >= 3.8.2).
+
+Usage:
+    python -m benchmarks.preprocessing --fake Fake.csv --true True.csv --workers 1 2 4 --output preprocessing.json
+"""
+
+import argparse
+import json
+import os
+import re
+
+import pandas as pd
+from nltk.corpus import stopwords
+from nltk.stem import PorterStemmer
+from nltk.tokenize import word_tokenize
+
+from benchmarks.common import sample_articles, timed
+from preprocessing import preprocess_frame
+
+COLUMNS = ('cleaned_text', 'cleaned_title', 'combined_text')
+
+stop_words = set(stopwords.words('english'))
+stemmer = PorterStemmer()
+
+
+def notebook_clean_text(text):
+    """
+    Clean and preprocess text data
+    """
+    # Convert to lowercase
+    text = text.lower()
+
+    # Remove URLs
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+
+    # Remove user mentions and hashtags
+    text = re.sub(r'@\w+|#\w+', '', text)
+
+    # Remove special characters and digits
+    text = re.sub(r'[^a-zA-Z\s]', '', text)
+
+    # Remove extra whitespace
+    text = re.sub(r'\s+', ' ', text).strip()
+
+    # Tokenize
+    tokens = word_tokenize(text)
+
+    # Remove stopwords and stem
+    tokens = [stemmer.stem(token) for token in tokens if token not in stop_words and len(token) > 2]
+
+    return ' '.join(tokens)
+
+
+def notebook_preprocess(df):
+    df['cleaned_text'] = df['text'].apply(notebook_clean_text)
+    df['cleaned_title'] = df['title'].apply(notebook_clean_text)
+    df['combined_text'] = df['cleaned_title'] + ' ' + df['cleaned_text']
+    return df
+
+
+def load_frame(args):
+    if args.fake and args.true:
+        fake_df = pd.read_csv(args.fake)
+        true_df = pd.read_csv(args.true)
+        fake_df['label'] = 0
+        true_df['label'] = 1
+        df = pd.concat([fake_df, true_df], ignore_index=True)
+    else:
+        df = pd.DataFrame(sample_articles(args.synthetic, seed=7), columns=['title', 'text'])
+    if args.limit:
+        df = df.head(args.limit)
+    return df[['title', 'text']].fillna('')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fake', help="the dataset's Fake.csv")
+    parser.add_argument('--true', help="the dataset's True.csv")
+    parser.add_argument('--limit', type=int, help='only the first N articles')
+    parser.add_argument('--synthetic', type=int, default=5000, help='synthetic articles when no CSVs are given')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--output', help='write the report as JSON')
+    args = parser.parse_args()
+
+    df = load_frame(args)
+    print(f"{len(df)} articles, {int(df['text'].str.len().sum() + df['title'].str.len().sum())} characters")
+
+    expected, baseline_s = timed(notebook_preprocess, df.copy())
+    rows = [{'implementation': 'notebook apply', 'workers': 1, 'seconds': round(baseline_s, 2),
+             'articles_per_s': round(len(df) / baseline_s, 1), 'speedup': 1.0, 'identical': True}]
+
+    for workers in sorted(set(args.workers)):
+        result, seconds = timed(preprocess_frame, df.copy(), workers=workers)
+        mismatches = sum(int((result[column] != expected[column]).sum()) for column in COLUMNS)
+        rows.append({
+            'implementation': 'preprocess_frame', 'workers': workers, 'seconds': round(seconds, 2),
+            'articles_per_s': round(len(df) / seconds, 1), 'speedup': round(baseline_s / seconds, 1),
+            'identical': mismatches == 0
+        })
+        if mismatches:
+            print(f"⚠️ {mismatches} cleaned values differ from the notebook's with {workers} workers")
+
+    print(f"\n{'implementation':<18} {'workers':>7} {'seconds':>9} {'articles/s':>11} {'speedup':>8} {'identical':>9}")
+    for row in rows:
+        print(f"{row['implementation']:<18} {row['workers']:>7} {row['seconds']:>9.2f} {row['articles_per_s']:>11.1f} "
+              f"{row['speedup']:>7.1f}x {str(row['identical']):>9}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'settings': vars(args), 'articles': len(df), 'cpu_count': os.cpu_count(), 'results': rows},
+                      f, indent=2)
+    if not all(row['identical'] for row in rows):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
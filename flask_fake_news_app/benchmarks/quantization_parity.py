@@ -0,0 +1,118 @@
+"""
+Quantization accuracy-parity report
+===================================
+Runs the labeled Fake/True dataset from the notebook through an fp32
+detector and a reduced-precision one (int8 or bf16) and reports how often
+they agree, the accuracy of each against the labels, the latency gain and
+the size of the classifier weights.
+
+Usage:
+    python -m benchmarks.quantization_parity --fake data/Fake.csv --true data/True.csv \\
+        --limit 2000 --precision int8 --output parity.json
+    python -m benchmarks.quantization_parity ... --model models/bert_fake_news_detector_YYYYMMDD_HHMMSS
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks.common import summarize, print_summary
+from dataset import LABEL_NAMES, batched, iter_labeled_articles
+
+
+def build_detector(model_path, precision):
+    if model_path:
+        from model_loader import load_model
+        detector = load_model(model_path)
+        detector.set_precision(precision)
+        return detector
+    from bert_detector import create_detector
+    return create_detector(precision=precision)
+
+
+def score(detector, batch, batch_size):
+    start = time.perf_counter()
+    results = detector.predict_batch(
+        [article['title'] for article in batch],
+        [article['text'] for article in batch],
+        batch_size=batch_size
+    )
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fake', required=True, help='path to Fake.csv')
+    parser.add_argument('--true', required=True, help='path to True.csv')
+    parser.add_argument('--limit', type=int, default=2000, help='articles to score (balanced)')
+    parser.add_argument('--precision', choices=('int8', 'bf16'), default='int8')
+    parser.add_argument('--model', help='bundle or .pkl to load instead of building from the hub')
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--output', help='write the report as JSON')
+    args = parser.parse_args()
+
+    from quantization import model_size_bytes
+
+    reference = build_detector(args.model, 'fp32')
+    candidate = build_detector(args.model, args.precision)
+
+    counts = {'articles': 0, 'agree': 0, 'reference_correct': 0, 'candidate_correct': 0}
+    max_probability_diff = 0.0
+    latencies = {'reference': [], 'candidate': []}
+    elapsed = {'reference': 0.0, 'candidate': 0.0}
+
+    for batch in batched(iter_labeled_articles(args.fake, args.true, args.limit), args.batch_size):
+        reference_results, reference_seconds = score(reference, batch, args.batch_size)
+        candidate_results, candidate_seconds = score(candidate, batch, args.batch_size)
+        for name, seconds in (('reference', reference_seconds), ('candidate', candidate_seconds)):
+            elapsed[name] += seconds
+            latencies[name].extend([seconds / len(batch)] * len(batch))
+
+        for article, expected, actual in zip(batch, reference_results, candidate_results):
+            label = LABEL_NAMES[article['label']]
+            counts['articles'] += 1
+            counts['agree'] += expected['prediction'] == actual['prediction']
+            counts['reference_correct'] += expected['prediction'] == label
+            counts['candidate_correct'] += actual['prediction'] == label
+            max_probability_diff = max(
+                max_probability_diff, abs(expected['fake_probability'] - actual['fake_probability'])
+            )
+
+    total = counts['articles']
+    if not total:
+        parser.error('no articles found in the dataset files')
+
+    reference_size = model_size_bytes(reference.classifier_pipeline.model)
+    candidate_size = model_size_bytes(candidate.classifier_pipeline.model)
+    reference_latency = summarize(latencies['reference'], elapsed['reference'])
+    candidate_latency = summarize(latencies['candidate'], elapsed['candidate'])
+    report = {
+        'precision': candidate.precision,
+        'articles': total,
+        'agreement_rate': round(counts['agree'] / total, 4),
+        'fp32_accuracy': round(counts['reference_correct'] / total, 4),
+        f'{candidate.precision}_accuracy': round(counts['candidate_correct'] / total, 4),
+        'accuracy_diff': round((counts['candidate_correct'] - counts['reference_correct']) / total, 4),
+        'max_fake_probability_diff': round(max_probability_diff, 4),
+        'latency': {'fp32': reference_latency, candidate.precision: candidate_latency},
+        'speedup': round(reference_latency['mean_ms'] / candidate_latency['mean_ms'], 2),
+        'model_size_mb': {
+            'fp32': round(reference_size / 2 ** 20, 1),
+            candidate.precision: round(candidate_size / 2 ** 20, 1)
+        },
+        'size_reduction': round(reference_size / candidate_size, 2)
+    }
+
+    for key, value in report.items():
+        if key == 'latency':
+            for name, summary in value.items():
+                print_summary(f'latency {name}', summary)
+        else:
+            print(f"{key:<28} {value}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+SystemStats contention benchmark
+================================
+Drives concurrent ``/analyze`` requests through Flask's test client and
+compares throughput of the legacy write path, which read, incremented and
+committed the single ``SystemStats`` row in every request transaction, with
+the buffered ``StatsAccumulator`` path.
+
+The detector is replaced by a pattern-only stub so the database dominates.
+
+Usage:
+    python -m benchmarks.stats_contention --threads 8 --requests 800
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from benchmarks.common import load_app, sample_articles, summarize, print_summary
+
+
+def register_legacy_route(app_module):
+    """The pre-change /analyze: stats row updated inside the request transaction"""
+    db = app_module.db
+    SystemStats = app_module.SystemStats
+
+    def legacy_analyze():
+        data = app_module.request.get_json()
+        result = app_module.detector.predict(data['title'], data['content'])
+        analysis = app_module._build_analysis(data['title'], data['content'], result)
+        db.session.add(analysis)
+
+        stats = SystemStats.query.first()
+        if not stats:
+            stats = SystemStats(total_analyses=0, fake_detected=0, real_detected=0)
+            db.session.add(stats)
+        stats.total_analyses += 1
+        if result['prediction'] == 'Fake':
+            stats.fake_detected += 1
+        else:
+            stats.real_detected += 1
+        stats.last_updated = datetime.utcnow()
+
+        db.session.commit()
+        return app_module.jsonify({'success': True, 'analysis_id': analysis.id})
+
+    app_module.app.add_url_rule('/_bench/legacy_analyze', 'legacy_analyze', legacy_analyze, methods=['POST'])
+
+
+def run_load(app_module, url, articles, threads):
+    def call(article):
+        client = app_module.app.test_client()
+        started = time.perf_counter()
+        response = client.post(url, json={'title': article[0], 'content': article[1]})
+        elapsed = time.perf_counter() - started
+        return elapsed, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        outcomes = list(pool.map(call, articles))
+    summary = summarize([elapsed for elapsed, _ in outcomes], time.perf_counter() - started)
+    summary['errors'] = sum(1 for _, status in outcomes if status != 200)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=800)
+    args = parser.parse_args()
+
+    database_path = os.path.join(tempfile.mkdtemp(), 'bench.sqlite')
+    app_module = load_app(database_path)
+    register_legacy_route(app_module)
+    # Every article is unique so the result caches never short-circuit the write path
+    articles = [(f"{title} #{i}", text) for i, (title, text) in enumerate(sample_articles(args.requests, max_words=60))]
+
+    print_summary('legacy stats row update', run_load(app_module, '/_bench/legacy_analyze', articles, args.threads))
+    articles = [(f"{title} (repeat)", text) for title, text in articles]
+    print_summary('buffered stats', run_load(app_module, '/analyze', articles, args.threads))
+
+    app_module.stats_accumulator.flush()
+    with app_module.app.app_context():
+        stored = app_module.SystemStats.query.first().total_analyses
+    print(f"SystemStats total after flush: {stored} (expected {2 * args.requests})")
+
+
+if __name__ == '__main__':
+    main()
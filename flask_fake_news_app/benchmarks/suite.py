@@ -0,0 +1,248 @@
+"""
+Performance benchmark suite
+===========================
+Offline, reproducible benchmarks of the detector and web paths:
+
+- ``patterns``      ``analyze_suspicious_patterns`` per article
+- ``tokenization``  ``encode`` of one article
+- ``predict``       ``predict`` of one article
+- ``analyze``       ``POST /analyze`` through Flask's test client
+- ``history_<N>``   ``GET /api/history`` (first keyset page) with N stored rows
+
+The classifier is a small, seeded stub (``benchmarks.common.tiny_detector``)
+unless ``--model`` points at a locally cached model, so nothing is
+downloaded. Each case runs in its own process, which also makes its peak RSS
+meaningful. Results are written as JSON (p50/p95/p99, throughput, peak RSS);
+with ``--baseline`` they are compared against a stored run and the suite
+exits with status 1 on a regression beyond the tolerances.
+
+Usage:
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --save-baseline benchmarks/baseline-ci.json
+    python -m benchmarks.suite --baseline benchmarks/baseline-ci.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.common import APP_DIR, sample_articles, summarize, print_summary, tiny_detector
+
+DEFAULT_CASES = ('patterns', 'tokenization', 'predict', 'analyze')
+DEFAULT_HISTORY_SIZES = (1000, 10000, 100000)
+WARMUP_CALLS = 3
+
+# Metrics compared against the baseline: (higher is better, tolerance argument)
+GATED_METRICS = {
+    'p50_ms': (False, 'tolerance'),
+    'p95_ms': (False, 'tail_tolerance'),
+    'throughput_per_s': (True, 'tolerance'),
+    'peak_rss_mb': (False, 'rss_tolerance')
+}
+
+
+def peak_rss_mb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return round(usage / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+
+
+def run_timed(func, items):
+    """Call func on the first WARMUP_CALLS items untimed, then time the rest"""
+    for item in items[:WARMUP_CALLS]:
+        func(item)
+    latencies = []
+    started = time.perf_counter()
+    for item in items[WARMUP_CALLS:]:
+        call_started = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def case_patterns(args):
+    detector = tiny_detector(args.model)
+    texts = [f"{title} {text}" for title, text in sample_articles(args.articles + WARMUP_CALLS)]
+    return run_timed(detector.analyze_suspicious_patterns, texts)
+
+
+def case_tokenization(args):
+    detector = tiny_detector(args.model)
+    return run_timed(lambda article: detector.encode([article[0]], [article[1]]), sample_articles(args.articles + WARMUP_CALLS))
+
+
+def case_predict(args):
+    detector = tiny_detector(args.model)
+    return run_timed(lambda article: detector.predict(*article), sample_articles(args.articles + WARMUP_CALLS))
+
+
+def case_analyze(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        app_module = load_benchmark_app(os.path.join(tmp, 'bench.sqlite'), args.model)
+        client = app_module.app.test_client()
+        # Distinct articles, so every request misses the result caches
+        articles = sample_articles(args.articles + WARMUP_CALLS, seed=1)
+
+        def post(article):
+            response = client.post('/analyze', json={'title': article[0], 'content': article[1]})
+            assert response.status_code == 200, response.get_data(as_text=True)
+
+        return run_timed(post, articles)
+
+
+def case_history(args, size):
+    from benchmarks.history_pagination import grow_table
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app_module = load_benchmark_app(os.path.join(tmp, 'bench.sqlite'), args.model)
+        grow_table(app_module, 0, size)
+        client = app_module.app.test_client()
+
+        def get(_):
+            response = client.get('/api/history?per_page=20')
+            assert response.status_code == 200, response.get_data(as_text=True)
+
+        return run_timed(get, list(range(args.articles + WARMUP_CALLS)))
+
+
+def load_benchmark_app(database_path, model_path=None):
+    """The Flask app against a scratch database, serving the stub classifier"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{database_path}'
+    import app as app_module
+
+    # The startup load of the hub models fails fast offline; make sure it has
+    # finished so it cannot replace the stub afterwards
+    app_module.detector_loader.wait()
+    app_module.detector = tiny_detector(model_path)
+    return app_module
+
+
+def run_case(name, args):
+    """Run one case in this process and return its summary"""
+    import torch
+    torch.manual_seed(0)
+    torch.set_num_threads(args.threads)
+
+    if name.startswith('history_'):
+        summary = case_history(args, int(name[len('history_'):]))
+    else:
+        summary = globals()[f'case_{name}'](args)
+    summary['peak_rss_mb'] = peak_rss_mb()
+    return summary
+
+
+def run_case_in_child(name, args):
+    command = [
+        sys.executable, '-m', 'benchmarks.suite', '--child', name,
+        '--articles', str(args.articles), '--threads', str(args.threads)
+    ]
+    if args.model:
+        command += ['--model', args.model]
+    # No persistent result cache: it lives in instance/ and would turn a
+    # second run's /analyze calls into cache hits
+    env = dict(
+        os.environ, HF_HUB_OFFLINE='1', PERSISTENT_CACHE='false',
+        PYTHONPATH=os.pathsep.join([APP_DIR, os.path.dirname(APP_DIR)])
+    )
+    completed = subprocess.run(command, cwd=APP_DIR, env=env, capture_output=True, text=True)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    raise RuntimeError(f"Benchmark case {name} failed:\n{completed.stderr[-2000:]}")
+
+
+def environment():
+    import torch
+    import transformers
+
+    return {
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'torch': torch.__version__,
+        'transformers': transformers.__version__
+    }
+
+
+def compare(results, baseline, tolerances):
+    """Regressions of the gated metrics, as human-readable strings"""
+    regressions = []
+    for name, current in results['cases'].items():
+        reference = baseline.get('cases', {}).get(name)
+        if not reference:
+            continue
+        for metric, (higher_is_better, tolerance) in GATED_METRICS.items():
+            if current.get(metric) is None or not reference.get(metric):
+                continue
+            allowed = tolerances[tolerance]
+            change = current[metric] / reference[metric] - 1
+            if (higher_is_better and change < -allowed) or (not higher_is_better and change > allowed):
+                regressions.append(
+                    f"{name} {metric}: {reference[metric]} -> {current[metric]} ({change:+.0%}, allowed {allowed:.0%})"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', nargs='+', default=list(DEFAULT_CASES), help='cases to run')
+    parser.add_argument('--history-sizes', type=int, nargs='*', default=list(DEFAULT_HISTORY_SIZES))
+    parser.add_argument('--articles', type=int, default=200, help='timed calls per case')
+    parser.add_argument('--threads', type=int, default=1, help='torch threads (1 keeps runs comparable)')
+    parser.add_argument('--model', help='local Hugging Face model directory instead of the stub')
+    parser.add_argument('--output', help='write the results as JSON')
+    parser.add_argument('--baseline', help='fail if results regress against this JSON file')
+    parser.add_argument('--save-baseline', help='write the results as a new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p50/throughput change')
+    parser.add_argument('--tail-tolerance', type=float, default=0.5, help='allowed p95 growth')
+    parser.add_argument('--rss-tolerance', type=float, default=0.10, help='allowed peak RSS growth')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_case(args.child, args)))
+        return
+
+    names = list(args.cases) + [f'history_{size}' for size in args.history_sizes]
+    results = {
+        'environment': environment(),
+        'settings': {'articles': args.articles, 'threads': args.threads, 'model': args.model or 'tiny-stub'},
+        'cases': {}
+    }
+    for name in names:
+        results['cases'][name] = run_case_in_child(name, args)
+        print_summary(name, results['cases'][name])
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('settings') != results['settings']:
+            print(f"⚠️ Baseline settings differ: {baseline.get('settings')}")
+        regressions = compare(results, baseline, {
+            'tolerance': args.tolerance,
+            'tail_tolerance': args.tail_tolerance,
+            'rss_tolerance': args.rss_tolerance
+        })
+        if regressions:
+            print("❌ Performance regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("✅ No regressions against the baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Tokenization benchmark
+======================
+Measures per-article ``predict`` latency at several article lengths for the
+legacy path (512-token ``max_length`` padding for the statistics plus a
+second tokenization inside ``classifier_pipeline``) against the current
+single-encoding, dynamically padded path.
+
+Usage:
+    python -m benchmarks.tokenization --repeats 20
+"""
+
+import argparse
+
+import torch
+
+from benchmarks.common import sample_articles, summarize, print_summary, timed
+from bert_detector import create_detector
+
+ARTICLE_LENGTHS = (10, 50, 200, 1000)
+
+
+def legacy_predict(detector, title, text):
+    """The pre-refactor predict: two tokenizations, statistics over 512 padded tokens"""
+    combined_text = f"{title} {text}"
+    suspicion_score = detector.analyze_suspicious_patterns(combined_text)
+
+    encoded = detector._fallback_tokenizer()(
+        f"{title} [SEP] {text}",
+        add_special_tokens=True,
+        max_length=512,
+        padding='max_length',
+        truncation=True,
+        return_tensors='pt'
+    )
+    input_ids = encoded['input_ids'][0]
+    attention_mask = encoded['attention_mask'][0]
+    unique_tokens = len(torch.unique(input_ids))
+    total_tokens = len(input_ids[attention_mask == 1])
+    bert_features = {
+        'token_diversity': unique_tokens / total_tokens if total_tokens > 0 else 0,
+        'text_length': total_tokens
+    }
+
+    pipeline_score = 0.5
+    if detector.classifier_pipeline is not None:
+        result = detector.classifier_pipeline(combined_text[:512])
+        pipeline_score = detector._pipeline_score(result[0])
+
+    return detector._build_result(suspicion_score, pipeline_score, bert_features)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    detector = create_detector()
+    if detector._fallback_tokenizer() is None:
+        raise SystemExit("Tokenizer could not be loaded; this benchmark needs the BERT models")
+
+    for words in ARTICLE_LENGTHS:
+        articles = sample_articles(args.repeats, min_words=words, max_words=words)
+        legacy_predict(detector, *articles[0])
+        detector.predict(*articles[0])
+
+        legacy = [timed(legacy_predict, detector, *article)[1] for article in articles]
+        current = [timed(detector.predict, *article)[1] for article in articles]
+
+        legacy_summary = summarize(legacy)
+        current_summary = summarize(current)
+        print(f"\n{words} words per article")
+        print_summary('  legacy (512 padding)', legacy_summary)
+        print_summary('  single encoding', current_summary)
+        print(f"  p50 saved: {legacy_summary['p50_ms'] - current_summary['p50_ms']:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,56 +3,215 @@ BERT-based Fake News Detector
 ============================
 Implementation based on the Jupyter notebook without pickle dependencies.
 This avoids CUDA/CPU compatibility issues.
+
+torch and transformers are imported when the models are first loaded, so
+importing this module stays cheap.
 """
 
 import re
-import torch
-import nltk
-from transformers import AutoTokenizer, pipeline
+import hashlib
+import json
 import logging
+import math
+import time
+from contextlib import contextmanager
+
+from config import SUSPICIOUS_PATTERNS, INFERENCE_CONFIG, LONG_DOCUMENT_CONFIG
+from patterns import get_matcher
+from quantization import convert_model
+from backends import create_backend
 
 logger = logging.getLogger(__name__)
 
+MAX_SEQUENCE_LENGTH = 512
+
+# Bump whenever the scoring logic changes so cached results are invalidated
+SCORING_VERSION = 1
+
+WINDOW_AGGREGATIONS = ('max', 'mean', 'attention')
+
+# Weights of the method scores in the final fake probability, and the
+# weights used when BERT features are not available
+SCORE_WEIGHTS = {'suspicion': 0.4, 'pipeline': 0.4, 'token_diversity': 0.2}
+FALLBACK_SCORE_WEIGHTS = {'suspicion': 0.6, 'pipeline': 0.4}
+FAKE_THRESHOLD = 0.5
+
+
+def patterns_digest(suspicious_patterns):
+    """Short hash of the pattern list; part of ``score_version``"""
+    return hashlib.sha1(json.dumps(list(suspicious_patterns)).encode('utf-8')).hexdigest()[:12]
+
+
+def scoring_digest(suspicious_patterns):
+    """Short hash of the pattern list and score weights; part of ``model_version``"""
+    settings = {
+        'patterns': list(suspicious_patterns),
+        'weights': SCORE_WEIGHTS,
+        'fallback_weights': FALLBACK_SCORE_WEIGHTS,
+        'threshold': FAKE_THRESHOLD
+    }
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+# Callbacks called as ``observer(stage, seconds, articles)`` after each
+# prediction stage ('patterns', 'tokenize', 'token_features', 'classify')
+_stage_observers = []
+
+
+def add_stage_observer(observer):
+    """Register a callback for per-stage prediction timings (e.g. metrics)"""
+    if observer not in _stage_observers:
+        _stage_observers.append(observer)
+
+
+def remove_stage_observer(observer):
+    if observer in _stage_observers:
+        _stage_observers.remove(observer)
+
+
+@contextmanager
+def _stage(name, articles):
+    if not _stage_observers:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _notify_stage(name, time.perf_counter() - start, articles)
+
+
+def _notify_stage(name, seconds, articles):
+    for observer in list(_stage_observers):
+        try:
+            observer(name, seconds, articles)
+        except Exception as e:
+            logger.debug(f"Stage observer failed: {e}")
+
+
 class BERTFakeNewsDetector:
-    def __init__(self, model_name='distilbert-base-uncased'):
+    def __init__(self, model_name='distilbert-base-uncased', precision=None, backend=None):
         """Initialize BERT-based fake news classifier"""
         self.model_name = model_name
         self.tokenizer = None
         self.classifier_pipeline = None
-        self.suspicious_patterns = [
-            'shocking', 'exclusive', 'secret', 'urgent', 'miracle', 'breaking',
-            'doctors hate', 'one weird trick', 'you won\'t believe', 'leaked',
-            'government cover', 'big pharma', 'they don\'t want you to know',
-            'amazing discovery', 'scientists shocked', 'unbelievable', 'incredible'
-        ]
+        self.suspicious_patterns = list(SUSPICIOUS_PATTERNS)
+        self.precision = 'fp32'
+        self.backend_name = backend or INFERENCE_CONFIG['backend']
+        self._backend = None
+        self.long_document = dict(LONG_DOCUMENT_CONFIG)
         
         self._initialize_model()
+        try:
+            self.set_precision(precision or INFERENCE_CONFIG['precision'])
+        except Exception as e:
+            logger.warning(f"⚠️ Keeping fp32 classifier: {e}")
+    
+    @classmethod
+    def from_components(cls, model_name, tokenizer, classifier_pipeline, suspicious_patterns=None):
+        """Assemble a detector from already loaded models (e.g. a saved bundle)"""
+        detector = cls.__new__(cls)
+        detector.model_name = model_name
+        detector.tokenizer = tokenizer
+        detector.classifier_pipeline = classifier_pipeline
+        detector.suspicious_patterns = list(suspicious_patterns if suspicious_patterns is not None else SUSPICIOUS_PATTERNS)
+        detector.precision = 'fp32'
+        detector.backend_name = INFERENCE_CONFIG['backend']
+        detector._backend = None
+        detector.long_document = dict(LONG_DOCUMENT_CONFIG)
+        return detector
+    
+    def __getstate__(self):
+        # Runtime sessions are rebuilt after unpickling
+        state = self.__dict__.copy()
+        state['_backend'] = None
+        return state
+    
+    def __setstate__(self, state):
+        # Digests are recomputed; detectors pickled before they were cached kept the plain list
+        patterns = state.pop('suspicious_patterns', state.get('_suspicious_patterns'))
+        self.__dict__.update(state)
+        if patterns is not None:
+            self.suspicious_patterns = patterns
+    
+    @property
+    def suspicious_patterns(self):
+        """Pattern list; assign a new list to change it so the version follows"""
+        return self._suspicious_patterns
+    
+    @suspicious_patterns.setter
+    def suspicious_patterns(self, patterns):
+        self._suspicious_patterns = list(patterns)
+        # Hashed once here instead of on every model_version lookup
+        self._patterns_digest = patterns_digest(self._suspicious_patterns)
+        self._scoring_digest = scoring_digest(self._suspicious_patterns)
+    
+    def set_precision(self, precision):
+        """Convert the classification model to 'fp32', 'int8' or 'bf16' (CPU permitting)"""
+        current = getattr(self, 'precision', 'fp32')
+        if precision == current or self.classifier_pipeline is None:
+            return
+        if current != 'fp32':
+            raise ValueError(f"Cannot convert a {current} model to {precision}")
+        
+        start = time.perf_counter()
+        model, self.precision = convert_model(self.classifier_pipeline.model, precision)
+        self.classifier_pipeline.model = model
+        self._backend = None
+        logger.info(f"✅ Classifier running in {self.precision} ({time.perf_counter() - start:.2f}s)")
+    
+    def set_backend(self, name):
+        """Switch the runtime used for the classification model ('torch' or 'onnx')"""
+        self.backend_name = name
+        self._backend = None
+    
+    def set_long_document(self, enabled=True, **settings):
+        """Enable, disable or tune sliding-window scoring (keys of ``LONG_DOCUMENT_CONFIG``)"""
+        config = dict(self._long_document_config(), enabled=enabled, **settings)
+        if config['aggregation'] not in WINDOW_AGGREGATIONS:
+            raise ValueError(f"Unknown window aggregation: {config['aggregation']}")
+        if not 0 <= config['stride'] < config['window_length'] - 2:
+            raise ValueError("stride must be smaller than the window's content length")
+        self.long_document = config
+    
+    def _long_document_config(self):
+        # Detectors pickled before long-document mode existed use the defaults
+        return getattr(self, 'long_document', None) or LONG_DOCUMENT_CONFIG
+    
+    @property
+    def long_document_enabled(self):
+        """Whether long articles are scored over windows (results then carry ``windows``)"""
+        return self._long_document_config()['enabled']
+    
+    def _inference_backend(self):
+        backend = getattr(self, '_backend', None)
+        if backend is None:
+            name = getattr(self, 'backend_name', 'torch')
+            if name != 'torch' and getattr(self, 'precision', 'fp32') != 'fp32':
+                logger.warning(f"⚠️ The {name} backend only runs fp32 models, using torch for {self.precision}")
+                name = 'torch'
+            backend = create_backend(
+                name,
+                self.classifier_pipeline.model,
+                cache_dir=INFERENCE_CONFIG['onnx_cache_dir'],
+                intra_op_threads=INFERENCE_CONFIG['onnx_intra_op_threads']
+            )
+            self._backend = backend
+        return backend
     
     def _initialize_model(self):
-        """Initialize the BERT model and tokenizer"""
+        """Initialize the classification pipeline.
+        
+        The ``model_name`` tokenizer is only a fallback for when the pipeline
+        cannot be created (see ``_encoding_tokenizer``), so it is not loaded here.
+        """
         try:
-            # Download NLTK data if not present
-            try:
-                nltk.data.find('tokenizers/punkt')
-                nltk.data.find('corpora/stopwords')
-            except LookupError:
-                logger.info("Downloading NLTK data...")
-                nltk.download('punkt')
-                nltk.download('stopwords')
-                nltk.download('wordnet')
-                nltk.download('omw-1.4')
-                try:
-                    nltk.download('punkt_tab')
-                except:
-                    pass  # punkt_tab might not be available in older versions
-            
-            # Load tokenizer with CPU-only setup
-            logger.info(f"Loading BERT tokenizer: {self.model_name}")
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            logger.info(f"✅ BERT tokenizer loaded: {self.model_name}")
+            start = time.perf_counter()
+            from transformers import pipeline
+            logger.info(f"⏱️ transformers imported in {time.perf_counter() - start:.2f}s")
             
             # Initialize classification pipeline with CPU device
             try:
+                start = time.perf_counter()
                 device = -1  # Force CPU usage
                 self.classifier_pipeline = pipeline(
                     "text-classification",
@@ -60,52 +219,138 @@ class BERTFakeNewsDetector:
                     tokenizer="martin-ha/toxic-comment-model",
                     device=device
                 )
-                logger.info("✅ Classification pipeline initialized (CPU)")
+                logger.info(f"✅ Classification pipeline initialized (CPU, {time.perf_counter() - start:.2f}s)")
             except Exception as e:
                 logger.warning(f"⚠️ Pipeline not available: {e}")
                 self.classifier_pipeline = None
                 
         except Exception as e:
             logger.error(f"❌ Error loading BERT model: {e}")
-            self.tokenizer = None
+            self.classifier_pipeline = None
     
-    def preprocess_text(self, title, text, max_length=512):
+    def _fallback_tokenizer(self):
+        """The ``model_name`` tokenizer, loaded on first use"""
+        if self.tokenizer is None and not getattr(self, '_tokenizer_failed', False):
+            try:
+                start = time.perf_counter()
+                from transformers import AutoTokenizer
+                logger.info(f"Loading BERT tokenizer: {self.model_name}")
+                self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                logger.info(f"✅ BERT tokenizer loaded: {self.model_name} ({time.perf_counter() - start:.2f}s)")
+            except Exception as e:
+                # Do not retry on every request
+                logger.error(f"❌ Error loading BERT tokenizer: {e}")
+                self._tokenizer_failed = True
+        return self.tokenizer
+    
+    def preprocess_text(self, title, text, max_length=MAX_SEQUENCE_LENGTH):
         """Preprocess text for BERT input"""
-        if self.tokenizer is None:
-            return None
-        
-        combined_text = f"{title} [SEP] {text}"
-        
         try:
-            encoded = self.tokenizer(
-                combined_text,
-                add_special_tokens=True,
-                max_length=max_length,
-                padding='max_length',
-                truncation=True,
-                return_tensors='pt'
-            )
-            return encoded
+            return self.encode([title], [text], max_length=max_length)
         except Exception as e:
             logger.error(f"Error in text preprocessing: {e}")
             return None
     
-    def analyze_suspicious_patterns(self, text):
-        """Analyze text for suspicious patterns common in fake news"""
-        text_lower = text.lower()
+    def encode(self, titles, texts, max_length=MAX_SEQUENCE_LENGTH):
+        """Tokenize a batch of articles once, padded only to the longest article.
         
-        # Count suspicious patterns
-        pattern_count = sum(1 for pattern in self.suspicious_patterns 
-                          if pattern in text_lower)
+        The same encoding feeds the classifier and the token statistics, so the
+        classifier's own tokenizer is used whenever the pipeline is available.
+        """
+        tokenizer = self._encoding_tokenizer()
+        if tokenizer is None:
+            return None
         
-        # Check for excessive capitalization
-        words = text.split()
-        caps_ratio = sum(1 for word in words if word.isupper()) / len(words) if words else 0
+        return tokenizer(
+            [f"{title} [SEP] {text}" for title, text in zip(titles, texts)],
+            add_special_tokens=True,
+            max_length=max_length,
+            padding='longest',
+            truncation=True,
+            return_tensors='pt'
+        )
+    
+    def encode_token_ids(self, token_ids):
+        """Batch encoding from already tokenized articles, padded like ``encode``.
         
-        # Check for excessive punctuation
-        exclamation_count = text.count('!')
+        ``token_ids`` holds one sequence of ids per article, e.g. views into a
+        ``corpus_store.CorpusStore``.
+        """
+        tokenizer = self._encoding_tokenizer()
+        if tokenizer is None:
+            return None
+        
+        import numpy as np
+        import torch
         
-        # Calculate suspicion score
+        longest = max(len(ids) for ids in token_ids)
+        input_ids = np.full((len(token_ids), longest), tokenizer.pad_token_id or 0, dtype=np.int64)
+        attention_mask = np.zeros((len(token_ids), longest), dtype=np.int64)
+        for row, ids in enumerate(token_ids):
+            if tokenizer.padding_side == 'left':
+                columns = slice(longest - len(ids), longest)
+            else:
+                columns = slice(0, len(ids))
+            input_ids[row, columns] = ids
+            attention_mask[row, columns] = 1
+        return {'input_ids': torch.from_numpy(input_ids), 'attention_mask': torch.from_numpy(attention_mask)}
+    
+    @property
+    def model_version(self):
+        """Identifier of the models, patterns and scoring logic behind a result"""
+        return self._version(self._scoring_digest)
+    
+    @property
+    def score_version(self):
+        """Like ``model_version`` but without the score weights and threshold.
+        
+        Identifies the per-method scores (pattern score, pipeline score, token
+        diversity), which do not change with the way they are combined.
+        """
+        return self._version(self._patterns_digest)
+    
+    def _version(self, digest):
+        classifier = getattr(getattr(self.classifier_pipeline, 'model', None), 'name_or_path', None)
+        version = f"v{SCORING_VERSION}:{self.model_name}:{classifier}:{digest}"
+        precision = getattr(self, 'precision', 'fp32')
+        if precision != 'fp32':
+            version = f"{version}:{precision}"
+        backend = getattr(self, '_backend', None)
+        backend = backend.name if backend is not None else getattr(self, 'backend_name', 'torch')
+        if backend != 'torch':
+            version = f"{version}:{backend}"
+        long_document = self._long_document_config()
+        if long_document['enabled']:
+            version = (
+                f"{version}:long-{long_document['aggregation']}-{long_document['window_length']}"
+                f"-{long_document['stride']}-{long_document['max_windows']}"
+            )
+            if long_document['aggregation'] == 'attention':
+                version = f"{version}-t{long_document['attention_temperature']}"
+        return version
+    
+    def _encoding_tokenizer(self):
+        if self.classifier_pipeline is not None:
+            return self.classifier_pipeline.tokenizer
+        return self._fallback_tokenizer()
+    
+    def analyze_suspicious_patterns(self, text):
+        """Analyze text for suspicious patterns common in fake news"""
+        return self._suspicion_score(*self._pattern_matcher().features(text))
+    
+    def analyze_suspicious_patterns_batch(self, texts):
+        """Vectorized ``analyze_suspicious_patterns`` over a list of texts"""
+        return [
+            self._suspicion_score(*features)
+            for features in self._pattern_matcher().features_batch(texts)
+        ]
+    
+    def _pattern_matcher(self):
+        # Compiled once per pattern list and shared between detector instances
+        return get_matcher(tuple(self.suspicious_patterns))
+    
+    def _suspicion_score(self, pattern_count, caps_ratio, exclamation_count):
+        """Combine pattern hits, capitalization and punctuation into one score"""
         suspicion_score = (
             pattern_count * 0.3 +
             caps_ratio * 0.4 +
@@ -117,88 +362,305 @@ class BERTFakeNewsDetector:
     def predict(self, title, text):
         """Predict if news is fake or real using BERT-based approach"""
         try:
-            combined_text = f"{title} {text}"
-            
-            # Method 1: Pattern-based analysis
-            suspicion_score = self.analyze_suspicious_patterns(combined_text)
-            
-            # Method 2: BERT tokenizer analysis
-            bert_features = None
-            if self.tokenizer is not None:
-                encoded = self.preprocess_text(title, text)
-                if encoded is not None:
-                    input_ids = encoded['input_ids'][0]
-                    attention_mask = encoded['attention_mask'][0]
-                    
-                    unique_tokens = len(torch.unique(input_ids))
-                    total_tokens = len(input_ids[attention_mask == 1])
-                    token_diversity = unique_tokens / total_tokens if total_tokens > 0 else 0
-                    
-                    bert_features = {
-                        'token_diversity': token_diversity,
-                        'text_length': total_tokens
-                    }
-            
-            # Method 3: Classification pipeline
-            pipeline_score = 0.5
-            if self.classifier_pipeline is not None:
-                try:
-                    result = self.classifier_pipeline(combined_text[:512])
-                    if result and len(result) > 0:
-                        if result[0]['label'] == 'TOXIC':
-                            pipeline_score = result[0]['score'] * 0.7
-                        else:
-                            pipeline_score = 0.5
-                except Exception as e:
-                    logger.warning(f"Pipeline prediction failed: {e}")
-                    pipeline_score = 0.5
-            
-            # Combine all methods
-            if bert_features:
-                final_score = (
-                    suspicion_score * 0.4 +
-                    pipeline_score * 0.4 +
-                    (1 - bert_features['token_diversity']) * 0.2
-                )
-            else:
-                # Fallback when BERT features are not available
-                final_score = (
-                    suspicion_score * 0.6 +
-                    pipeline_score * 0.4
-                )
-            
-            is_fake = final_score > 0.5
-            confidence = abs(final_score - 0.5) * 2
-            
-            return {
-                'prediction': 'Fake' if is_fake else 'Real',
-                'confidence': confidence,
-                'fake_probability': final_score,
-                'real_probability': 1 - final_score,
-                'analysis': {
-                    'suspicion_patterns': suspicion_score,
-                    'pipeline_score': pipeline_score,
-                    'bert_features': bert_features
-                },
-                'method': 'Enhanced BERT-based Analysis'
-            }
-            
+            return self._predict_chunk([title], [text])[0]
         except Exception as e:
             logger.error(f"Error in prediction: {e}")
-            return {
-                'prediction': 'Error',
-                'confidence': 0.0,
-                'fake_probability': 0.5,
-                'real_probability': 0.5,
-                'analysis': {
-                    'suspicion_patterns': 0.0,
-                    'pipeline_score': 0.0,
-                    'bert_features': None
-                },
-                'method': 'Error in Analysis',
-                'error': str(e)
-            }
-
-def create_detector():
+            return self._error_result(e)
+    
+    def predict_batch(self, titles, texts, batch_size=16, token_ids=None):
+        """Predict a list of articles, tokenizing and classifying each batch in one pass.
+        
+        Articles are grouped by length so each batch is padded as little as
+        possible. Returns one result per article, in input order, matching
+        ``predict`` on each within floating-point tolerance (padding and batch
+        composition change the classifier's arithmetic slightly).
+        
+        ``token_ids`` optionally gives each article's ids as ``encode`` would
+        produce them (see ``corpus_store``); the tokenizer is then skipped,
+        except in long-document mode, which needs the whole article.
+        """
+        if len(titles) != len(texts):
+            raise ValueError("titles and texts must have the same length")
+        if token_ids is not None and len(token_ids) != len(titles):
+            raise ValueError("token_ids must have one entry per article")
+        
+        order = sorted(range(len(titles)), key=lambda i: len(titles[i]) + len(texts[i]))
+        results = [None] * len(titles)
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            batch_titles = [titles[i] for i in indices]
+            batch_texts = [texts[i] for i in indices]
+            batch_token_ids = [token_ids[i] for i in indices] if token_ids is not None else None
+            try:
+                batch_results = self._predict_chunk(batch_titles, batch_texts, batch_token_ids)
+            except Exception as e:
+                # Fall back to per-article scoring so one bad batch does not fail the others
+                logger.warning(f"Batch prediction failed, scoring articles one by one: {e}")
+                batch_results = [self.predict(title, text) for title, text in zip(batch_titles, batch_texts)]
+            for i, result in zip(indices, batch_results):
+                results[i] = result
+        return results
+    
+    def _predict_chunk(self, titles, texts, token_ids=None):
+        """Score one batch of articles from a single tokenization pass"""
+        combined_texts = [f"{title} {text}" for title, text in zip(titles, texts)]
+        
+        # Method 1: Pattern-based analysis
+        with _stage('patterns', len(titles)):
+            suspicion_scores = self.analyze_suspicious_patterns_batch(combined_texts)
+        
+        # Long articles: token features and classifier scores over all windows
+        windowed = self._predict_windows(titles, texts)
+        if windowed is not None:
+            bert_features, pipeline_scores, windows = windowed
+            return [
+                self._build_result(suspicion_score, pipeline_score, features, article_windows)
+                for suspicion_score, pipeline_score, features, article_windows
+                in zip(suspicion_scores, pipeline_scores, bert_features, windows)
+            ]
+        
+        # Method 2: BERT tokenizer analysis, on the encoding the classifier consumes
+        bert_features = [None] * len(combined_texts)
+        with _stage('tokenize', len(titles)):
+            if token_ids is not None:
+                encoded = self.encode_token_ids(token_ids)
+            else:
+                encoded = self.encode(titles, texts)
+        if encoded is not None:
+            with _stage('token_features', len(titles)):
+                bert_features = [
+                    self._token_features(input_ids, attention_mask)
+                    for input_ids, attention_mask in zip(encoded['input_ids'], encoded['attention_mask'])
+                ]
+        
+        # Method 3: Classification model
+        pipeline_scores = [0.5] * len(combined_texts)
+        if self.classifier_pipeline is not None and encoded is not None:
+            try:
+                with _stage('classify', len(titles)):
+                    outputs = self._classify(encoded)
+                pipeline_scores = [self._pipeline_score(output) for output in outputs]
+            except Exception as e:
+                logger.warning(f"Pipeline prediction failed: {e}")
+        
+        return [
+            self._build_result(suspicion_score, pipeline_score, features)
+            for suspicion_score, pipeline_score, features
+            in zip(suspicion_scores, pipeline_scores, bert_features)
+        ]
+    
+    def _predict_windows(self, titles, texts):
+        """Long-document mode: classify overlapping token windows of every article.
+        
+        Each article is split into ``window_length``-token windows that overlap
+        by ``stride`` tokens. At most ``max_windows`` evenly spaced windows per
+        article are classified, all articles' windows in shared forward passes,
+        and the window scores are aggregated into the article's pipeline score.
+        Returns (bert_features, pipeline_scores, windows), or None when the
+        mode is off or unavailable.
+        """
+        config = self._long_document_config()
+        tokenizer = self._encoding_tokenizer()
+        if not config['enabled'] or self.classifier_pipeline is None or tokenizer is None:
+            return None
+        if not getattr(tokenizer, 'is_fast', False):
+            logger.warning("⚠️ Long-document mode needs a fast tokenizer, classifying the first window only")
+            return None
+        
+        import torch
+        
+        with _stage('tokenize', len(titles)):
+            encoded = tokenizer(
+                [f"{title} [SEP] {text}" for title, text in zip(titles, texts)],
+                add_special_tokens=True,
+                max_length=config['window_length'],
+                stride=config['stride'],
+                truncation=True,
+                return_overflowing_tokens=True,
+                padding='longest',
+                return_tensors='pt'
+            )
+        input_ids = encoded['input_ids']
+        attention_mask = encoded['attention_mask']
+        article_rows = [[] for _ in titles]
+        for row, article in enumerate(encoded['overflow_to_sample_mapping'].tolist()):
+            article_rows[article].append(row)
+        
+        with _stage('token_features', len(titles)):
+            bert_features = [
+                self._window_token_features(input_ids, attention_mask, rows, config['stride'])
+                for rows in article_rows
+            ]
+        selected = [spread_windows(len(rows), config['max_windows']) for rows in article_rows]
+        
+        # One forward pass per window batch, each trimmed to its longest window
+        flat_rows = [rows[index] for rows, indices in zip(article_rows, selected) for index in indices]
+        window_scores = {}
+        try:
+            classify_started = time.perf_counter()
+            for start in range(0, len(flat_rows), config['window_batch_size']):
+                rows = torch.tensor(flat_rows[start:start + config['window_batch_size']])
+                batch_mask = attention_mask[rows]
+                length = input_ids.shape[1]
+                if tokenizer.padding_side == 'right':
+                    length = int(batch_mask.sum(dim=1).max())
+                outputs = self._classify({
+                    'input_ids': input_ids[rows, :length],
+                    'attention_mask': batch_mask[:, :length]
+                })
+                for row, output in zip(rows.tolist(), outputs):
+                    window_scores[row] = self._pipeline_score(output)
+            _notify_stage('classify', time.perf_counter() - classify_started, len(titles))
+        except Exception as e:
+            logger.warning(f"Pipeline prediction failed: {e}")
+            window_scores = None
+        
+        pipeline_scores = []
+        windows = []
+        for rows, indices in zip(article_rows, selected):
+            if window_scores is None:
+                pipeline_scores.append(0.5)
+                windows.append(None)
+                continue
+            scores = [window_scores[rows[index]] for index in indices]
+            pipeline_scores.append(aggregate_window_scores(
+                scores, config['aggregation'], config['attention_temperature']
+            ))
+            windows.append({
+                'aggregation': config['aggregation'],
+                'total': len(rows),
+                'scored': len(indices),
+                'scores': [{'window': index, 'score': score} for index, score in zip(indices, scores)]
+            })
+        return bert_features, pipeline_scores, windows
+    
+    def _window_token_features(self, input_ids, attention_mask, rows, stride):
+        """Token statistics for a whole article from its overlapping windows"""
+        import torch
+        
+        if len(rows) == 1:
+            return self._token_features(input_ids[rows[0]], attention_mask[rows[0]])
+        
+        # Rebuild the article's token sequence: strip each window's [CLS]/[SEP]
+        # and the ``stride`` tokens it repeats from the previous window
+        parts = []
+        for position, row in enumerate(rows):
+            tokens = input_ids[row][attention_mask[row] == 1]
+            if position == 0:
+                parts.append(tokens[:-1])
+            else:
+                parts.append(tokens[1 + stride:-1])
+        parts.append(tokens[-1:])
+        return self._token_statistics(torch.cat(parts))
+    
+    def _classify(self, encoded):
+        """Run the classification model on an existing encoding.
+        
+        Returns pipeline-style ``{'label', 'score'}`` dictionaries without
+        tokenizing the text a second time.
+        """
+        return self._inference_backend().classify(encoded)
+    
+    def _token_features(self, input_ids, attention_mask):
+        """Compute token statistics for one encoded article, ignoring padding"""
+        return self._token_statistics(input_ids[attention_mask == 1])
+    
+    def _token_statistics(self, tokens):
+        total_tokens = len(tokens)
+        unique_tokens = len(tokens.unique())
+        token_diversity = unique_tokens / total_tokens if total_tokens > 0 else 0
+        
+        return {
+            'token_diversity': token_diversity,
+            'text_length': total_tokens
+        }
+    
+    def _pipeline_score(self, output):
+        """Convert one classification pipeline output into a fake-news score"""
+        if output['label'] == 'TOXIC':
+            return output['score'] * 0.7
+        return 0.5
+    
+    def _build_result(self, suspicion_score, pipeline_score, bert_features, windows=None):
+        """Combine the individual method scores into the prediction result"""
+        token_diversity = bert_features['token_diversity'] if bert_features else None
+        final_score = combine_scores(suspicion_score, pipeline_score, token_diversity)
+        
+        is_fake = final_score > FAKE_THRESHOLD
+        confidence = abs(final_score - 0.5) * 2
+        
+        analysis = {
+            'suspicion_patterns': suspicion_score,
+            'pipeline_score': pipeline_score,
+            'bert_features': bert_features
+        }
+        if windows is not None:
+            analysis['windows'] = windows
+        
+        return {
+            'prediction': 'Fake' if is_fake else 'Real',
+            'confidence': confidence,
+            'fake_probability': final_score,
+            'real_probability': 1 - final_score,
+            'analysis': analysis,
+            'method': 'Enhanced BERT-based Analysis'
+        }
+    
+    def _error_result(self, error):
+        """Result returned when an article could not be analyzed"""
+        return {
+            'prediction': 'Error',
+            'confidence': 0.0,
+            'fake_probability': 0.5,
+            'real_probability': 0.5,
+            'analysis': {
+                'suspicion_patterns': 0.0,
+                'pipeline_score': 0.0,
+                'bert_features': None
+            },
+            'method': 'Error in Analysis',
+            'error': str(error)
+        }
+
+def combine_scores(suspicion_score, pipeline_score, token_diversity=None,
+                   weights=SCORE_WEIGHTS, fallback_weights=FALLBACK_SCORE_WEIGHTS):
+    """Final fake probability from the individual method scores"""
+    if token_diversity is not None:
+        return (
+            suspicion_score * weights['suspicion'] +
+            pipeline_score * weights['pipeline'] +
+            (1 - token_diversity) * weights['token_diversity']
+        )
+    # Fallback when BERT features are not available
+    return (
+        suspicion_score * fallback_weights['suspicion'] +
+        pipeline_score * fallback_weights['pipeline']
+    )
+
+
+def spread_windows(count, limit):
+    """Indices of at most ``limit`` windows spread evenly over ``count``, first and last included"""
+    if count <= limit:
+        return list(range(count))
+    if limit == 1:
+        return [0]
+    return sorted({round(i * (count - 1) / (limit - 1)) for i in range(limit)})
+
+
+def aggregate_window_scores(scores, aggregation='max', temperature=0.1):
+    """Combine per-window pipeline scores into one article score"""
+    if aggregation == 'max':
+        return max(scores)
+    if aggregation == 'mean':
+        return sum(scores) / len(scores)
+    if aggregation == 'attention':
+        # Softmax weights: the most suspicious windows dominate without
+        # discarding the rest of the article
+        peak = max(scores)
+        weights = [math.exp((score - peak) / temperature) for score in scores]
+        return sum(weight * score for weight, score in zip(weights, scores)) / sum(weights)
+    raise ValueError(f"Unknown window aggregation: {aggregation}")
+
+def create_detector(precision=None):
     """Factory function to create a new detector instance"""
-    return BERTFakeNewsDetector()
+    return BERTFakeNewsDetector(precision=precision)
@@ -0,0 +1,374 @@
+"""
+Bulk Scoring
+============
+Offline scoring of large CSV or JSONL article dumps (e.g. the notebook's
+``Fake.csv``/``True.csv``).
+
+- input is streamed record by record, never loaded as a whole
+- chunks of records are scored in a process pool, one detector per process
+- results are written in input order as they complete: JSONL lines, or a
+  directory of Parquet part files (one per chunk)
+- a checkpoint next to the output records how far the output is complete,
+  so ``--resume`` continues after a crash without duplicates or gaps
+- progress is reported as articles/sec with an ETA based on input bytes
+
+Usage:
+    python model_loader.py score Fake.csv --output fake_scores.jsonl --workers 4
+    python model_loader.py score dump.jsonl --output scores.parquet --format parquet --resume
+"""
+
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from datetime import timedelta
+from itertools import islice
+
+import dataset  # noqa: F401  (raises the csv field size limit for long articles)
+from dataset import batched
+
+CHECKPOINT_SUFFIX = '.checkpoint.json'
+CHECKPOINT_VERSION = 1
+OUTPUT_FORMATS = ('jsonl', 'parquet')
+
+# Output columns and their Parquet types; JSONL rows omit empty id/label/error
+COLUMNS = (
+    ('index', 'int64'), ('id', 'string'), ('label', 'string'),
+    ('prediction', 'string'), ('confidence', 'float64'),
+    ('fake_probability', 'float64'), ('real_probability', 'float64'),
+    ('suspicion_patterns', 'float64'), ('pipeline_score', 'float64'),
+    ('token_diversity', 'float64'), ('text_length', 'int64'),
+    ('model_version', 'string'), ('error', 'string')
+)
+
+
+class CountingReader:
+    """Iterate a binary file as decoded lines while counting the bytes consumed"""
+
+    def __init__(self, f, encoding='utf-8'):
+        self.f = f
+        self.encoding = encoding
+        self.bytes_read = 0
+
+    def __iter__(self):
+        for raw in self.f:
+            self.bytes_read += len(raw)
+            yield raw.decode(self.encoding)
+
+
+def input_format(path, explicit=None):
+    if explicit:
+        return explicit
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def iter_records(reader, fmt):
+    """Yield dictionaries from a CSV or JSONL line stream"""
+    if fmt == 'csv':
+        yield from csv.DictReader(reader)
+        return
+    for line in reader:
+        if line.strip():
+            yield json.loads(line)
+
+
+_worker_detector = None
+_worker_error = None
+
+
+def _init_worker(model_path, threads):
+    """Pool initializer: load one detector per process"""
+    global _worker_detector, _worker_error
+
+    # An exception here would make the pool respawn workers forever, so it is
+    # kept and raised from the first task instead
+    try:
+        import torch
+        torch.set_num_threads(threads)
+
+        if model_path:
+            from model_loader import load_model
+            _worker_detector = load_model(model_path)
+        else:
+            from bert_detector import create_detector
+            _worker_detector = create_detector()
+        if _worker_detector is None:
+            raise RuntimeError(f"Could not load model {model_path}")
+    except Exception as e:
+        _worker_error = repr(e)
+
+
+def _score_chunk(articles, batch_size, token_ids=None):
+    if _worker_detector is None:
+        raise RuntimeError(f"Worker could not load the detector: {_worker_error}")
+    detector = _worker_detector
+    results = detector.predict_batch(
+        [article['title'] for article in articles],
+        [article['text'] for article in articles],
+        batch_size=batch_size,
+        token_ids=token_ids
+    )
+    model_version = detector.model_version
+    return [result_row(article, result, model_version) for article, result in zip(articles, results)]
+
+
+def result_row(article, result, model_version):
+    """Flat output record for one scored article"""
+    analysis = result.get('analysis') or {}
+    bert_features = analysis.get('bert_features') or {}
+    row = {'index': article['index']}
+    for key in ('id', 'label'):
+        if article.get(key) is not None:
+            row[key] = article[key]
+    row.update({
+        'prediction': result['prediction'],
+        'confidence': result['confidence'],
+        'fake_probability': result['fake_probability'],
+        'real_probability': result['real_probability'],
+        'suspicion_patterns': analysis.get('suspicion_patterns'),
+        'pipeline_score': analysis.get('pipeline_score'),
+        'token_diversity': bert_features.get('token_diversity'),
+        'text_length': bert_features.get('text_length'),
+        'model_version': model_version
+    })
+    if 'error' in result:
+        row['error'] = result['error']
+    return row
+
+
+class JsonlWriter:
+    """Appends JSON lines; the checkpoint position is the file's byte size"""
+
+    def __init__(self, path, position=None):
+        self.path = path
+        mode = 'r+b' if position is not None else 'wb'
+        self.f = open(path, mode)
+        if position is not None:
+            # Drop anything written after the last checkpoint
+            self.f.truncate(position)
+            self.f.seek(position)
+
+    def write(self, rows):
+        self.f.write(b''.join(
+            json.dumps(row, ensure_ascii=False).encode('utf-8') + b'\n' for row in rows
+        ))
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    @property
+    def position(self):
+        return self.f.tell()
+
+    def close(self):
+        self.f.close()
+
+
+class ParquetWriter:
+    """One part file per chunk in a directory; the checkpoint position is the part count"""
+
+    def __init__(self, path, position=None):
+        import pyarrow  # noqa: F401  (fail before any scoring if Parquet is unavailable)
+
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.parts = position or 0
+        # Remove parts written after the last checkpoint (or all of them when starting over)
+        for name in os.listdir(path):
+            if name.startswith('part-') and name.endswith('.parquet'):
+                if int(name[len('part-'):-len('.parquet')]) >= self.parts:
+                    os.remove(os.path.join(path, name))
+
+    def write(self, rows):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # A fixed schema keeps every part readable as one dataset
+        schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in COLUMNS])
+        table = pa.Table.from_pydict({
+            name: [None if row.get(name) is None else (str(row[name]) if type_name == 'string' else row[name])
+                   for row in rows]
+            for name, type_name in COLUMNS
+        }, schema=schema)
+        part = os.path.join(self.path, f'part-{self.parts:05d}.parquet')
+        temporary_path = f'{part}.tmp'
+        pq.write_table(table, temporary_path)
+        os.replace(temporary_path, part)
+        self.parts += 1
+
+    @property
+    def position(self):
+        return self.parts
+
+    def close(self):
+        pass
+
+
+WRITERS = {'jsonl': JsonlWriter, 'parquet': ParquetWriter}
+
+
+def checkpoint_path(output):
+    return output.rstrip('/\\') + CHECKPOINT_SUFFIX
+
+
+def read_checkpoint(output):
+    path = checkpoint_path(output)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_checkpoint(output, state):
+    path = checkpoint_path(output)
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(temporary_path, path)
+
+
+class Progress:
+    """Articles/sec and an ETA from the share of input bytes processed"""
+
+    def __init__(self, total_bytes, start_bytes, start_records, interval=5.0, stream=sys.stderr):
+        self.total_bytes = total_bytes
+        self.start_bytes = start_bytes
+        self.start_records = start_records
+        self.interval = interval
+        self.stream = stream
+        self.started = time.perf_counter()
+        self.last_report = 0.0
+
+    def update(self, records, bytes_done, force=False):
+        now = time.perf_counter()
+        if not force and now - self.last_report < self.interval:
+            return
+        self.last_report = now
+        elapsed = max(now - self.started, 1e-9)
+        rate = (records - self.start_records) / elapsed
+        byte_rate = (bytes_done - self.start_bytes) / elapsed
+        eta = '?'
+        if byte_rate > 0:
+            eta = str(timedelta(seconds=int(max(self.total_bytes - bytes_done, 0) / byte_rate)))
+        percent = 100 * bytes_done / self.total_bytes if self.total_bytes else 100.0
+        print(f"📈 {records:,} articles ({percent:.1f}%), {rate:.1f} articles/s, ETA {eta}", file=self.stream)
+
+
+def score_file(input_path, output_path, output_format='jsonl', input_fmt=None, model_path=None,
+               workers=1, chunk_size=256, batch_size=16, title_field='title', text_field='text',
+               id_field=None, label=None, limit=None, resume=False, overwrite=False, progress_interval=5.0):
+    """Score every article of ``input_path`` into ``output_path``; returns a summary dict"""
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+    fmt = input_format(input_path, input_fmt)
+    input_size = os.path.getsize(input_path)
+    identity = {
+        'version': CHECKPOINT_VERSION,
+        'input': os.path.abspath(input_path),
+        'input_size': input_size,
+        'output_format': output_format
+    }
+
+    checkpoint = read_checkpoint(output_path)
+    if resume and checkpoint:
+        mismatched = [key for key, value in identity.items() if checkpoint.get(key) != value]
+        if mismatched:
+            raise ValueError(f"Checkpoint does not match this run ({', '.join(mismatched)} changed)")
+        records_done = checkpoint['records']
+        position = checkpoint['position']
+        bytes_done = checkpoint['bytes']
+    else:
+        if os.path.exists(output_path) and not overwrite and not resume:
+            raise FileExistsError(f"{output_path} exists; pass --resume to continue or --overwrite")
+        records_done, position, bytes_done = 0, None, 0
+        if checkpoint:
+            os.remove(checkpoint_path(output_path))
+
+    writer = WRITERS[output_format](output_path, position)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(model_path, threads))
+    progress = Progress(input_size, bytes_done, records_done, progress_interval)
+    started = time.perf_counter()
+
+    try:
+        with open(input_path, 'rb') as f:
+            reader = CountingReader(f)
+            records = iter_records(reader, fmt)
+            articles = (
+                {
+                    'index': index,
+                    'id': record.get(id_field) if id_field else None,
+                    'label': label,
+                    'title': (record.get(title_field) or '').strip(),
+                    'text': (record.get(text_field) or '').strip()
+                }
+                for index, record in enumerate(records)
+            )
+            # Already-written records are read past, not scored again
+            articles = islice(articles, records_done, limit)
+
+            # Keep a bounded number of chunks in flight so the reader never runs far ahead
+            pending = deque()
+            chunks = batched(articles, chunk_size)
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < workers * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                        break
+                    pending.append((
+                        pool.apply_async(_score_chunk, (chunk, batch_size)),
+                        len(chunk),
+                        reader.bytes_read
+                    ))
+                if not pending:
+                    break
+
+                result, count, chunk_end_bytes = pending.popleft()
+                writer.write(result.get())
+                records_done += count
+                bytes_done = chunk_end_bytes
+                write_checkpoint(output_path, dict(
+                    identity, records=records_done, position=writer.position, bytes=bytes_done
+                ))
+                progress.update(records_done, bytes_done)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        writer.close()
+
+    progress.update(records_done, bytes_done, force=True)
+    elapsed = time.perf_counter() - started
+    return {
+        'records': records_done,
+        'scored_this_run': records_done - progress.start_records,
+        'seconds': round(elapsed, 2),
+        'articles_per_s': round((records_done - progress.start_records) / elapsed, 2) if elapsed else None,
+        'output': output_path
+    }
+
+
+def add_arguments(parser):
+    """Arguments of the ``model_loader.py score`` subcommand"""
+    parser.add_argument('input', help='CSV or JSONL file of articles')
+    parser.add_argument('--output', required=True, help='JSONL file or Parquet directory to write')
+    parser.add_argument('--format', dest='output_format', choices=OUTPUT_FORMATS, default='jsonl')
+    parser.add_argument('--input-format', choices=('csv', 'jsonl'), help='default: from the file extension')
+    parser.add_argument('--model', help='bundle or .pkl (default: latest in models/, else the hub models)')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument('--chunk-size', type=int, default=256, help='articles per pool task and output write')
+    parser.add_argument('--batch-size', type=int, default=16, help='articles per model forward pass')
+    parser.add_argument('--title-field', default='title')
+    parser.add_argument('--text-field', default='text')
+    parser.add_argument('--id-field', help='input column copied to the output as "id"')
+    parser.add_argument('--label', help='constant label written with every row (e.g. Fake)')
+    parser.add_argument('--limit', type=int, help='stop after this many articles')
+    parser.add_argument('--resume', action='store_true', help='continue from the checkpoint')
+    parser.add_argument('--overwrite', action='store_true', help='replace an existing output')
+    parser.add_argument('--progress-interval', type=float, default=5.0, help='seconds between progress lines')
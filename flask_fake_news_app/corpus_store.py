@@ -0,0 +1,263 @@
+"""
+Pre-tokenized Corpus Store
+==========================
+Tokenizes the labeled dataset's ``bert_input`` (``title + " [SEP] " + text``)
+once into flat memory-mapped numpy files, so experiments and batch scorers
+read token ids instead of running the tokenizer again::
+
+    instance/corpus/
+        manifest.json   tokenizer name, fingerprint and transformers version,
+                        max_length, source files, article and token counts
+        ids.int32       every article's token ids, concatenated
+        lengths.int32   tokens per article (its attention length)
+        offsets.int64   start of each article in ids.int32 (articles + 1 entries)
+        labels.int32    dataset label per article (0 = Fake, 1 = Real)
+
+Articles are stored in ``dataset.iter_labeled_articles`` order. Article
+``i``'s ids are ``ids[offsets[i]:offsets[i + 1]]``, a view of the memory map
+rather than a copy. They are encoded like ``BERTFakeNewsDetector.encode``
+(special tokens, truncated to ``max_length``) but not padded.
+
+``open_or_build`` reuses a store only when its manifest matches the
+tokenizer, the max length and the source files (path, size, mtime); on any
+mismatch the store is rebuilt.
+
+Usage:
+    python corpus_store.py build --fake Fake.csv --true True.csv
+    python corpus_store.py info instance/corpus
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+from itertools import chain
+
+import numpy as np
+
+from config import Config
+from dataset import batched, iter_labeled_articles
+
+logger = logging.getLogger(__name__)
+
+STORE_FORMAT = 'fake-news-corpus-store'
+STORE_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'corpus')
+BERT_INPUT_TEMPLATE = '{title} [SEP] {text}'
+
+# Array name -> dtype; each array lives in "<name>.<dtype>"
+ARRAYS = {'ids': 'int32', 'lengths': 'int32', 'offsets': 'int64', 'labels': 'int32'}
+
+
+def bert_input(title, text):
+    return BERT_INPUT_TEMPLATE.format(title=title, text=text)
+
+
+def tokenizer_info(tokenizer):
+    """Name, class, transformers version and a hash of everything that affects the ids"""
+    import transformers
+
+    backend = getattr(tokenizer, 'backend_tokenizer', None)
+    if backend is not None:
+        # Full serialized fast tokenizer: vocabulary, normalizer, pre-tokenizer, post-processor
+        state = backend.to_str()
+    else:
+        state = json.dumps(sorted(tokenizer.get_vocab().items()))
+    digest = hashlib.sha256(state.encode('utf-8'))
+    digest.update(json.dumps(tokenizer.special_tokens_map, sort_keys=True).encode('utf-8'))
+    return {
+        'name': tokenizer.name_or_path,
+        'class': type(tokenizer).__name__,
+        'transformers_version': transformers.__version__,
+        'fingerprint': digest.hexdigest()
+    }
+
+
+def source_info(fake_path, true_path):
+    """Identity of the dataset files the store was built from"""
+    sources = []
+    for path in (fake_path, true_path):
+        stat = os.stat(path)
+        sources.append({'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime})
+    return sources
+
+
+def is_store(path):
+    return os.path.isfile(os.path.join(path, MANIFEST_NAME))
+
+
+def read_manifest(path):
+    """Load and validate a store manifest"""
+    with open(os.path.join(path, MANIFEST_NAME), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != STORE_FORMAT:
+        raise ValueError(f"{path} is not a corpus store")
+    if manifest.get('format_version') != STORE_VERSION:
+        raise ValueError(f"Corpus store format version {manifest.get('format_version')} is not {STORE_VERSION}")
+    return manifest
+
+
+class CorpusStore:
+    """Read-only view of a built store; every array is memory-mapped"""
+
+    def __init__(self, path):
+        self.path = path
+        self.manifest = read_manifest(path)
+        self.ids = self._map('ids', self.manifest['tokens'])
+        self.lengths = self._map('lengths', self.manifest['articles'])
+        self.offsets = self._map('offsets', self.manifest['articles'] + 1)
+        self.labels = self._map('labels', self.manifest['articles'])
+
+    def _map(self, name, count):
+        dtype = ARRAYS[name]
+        if count == 0:
+            # numpy cannot map an empty file
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, f'{name}.{dtype}'), dtype=dtype, mode='r', shape=(count,))
+
+    def __len__(self):
+        return self.manifest['articles']
+
+    @property
+    def max_length(self):
+        return self.manifest['max_length']
+
+    def token_ids(self, index):
+        """Article ``index``'s token ids (a view, no copy)"""
+        return self.ids[self.offsets[index]:self.offsets[index + 1]]
+
+    def slice(self, start, stop):
+        """Token ids of articles ``start`` to ``stop`` as (ids view, offsets relative to it)"""
+        offsets = self.offsets[start:stop + 1]
+        return self.ids[offsets[0]:offsets[-1]], offsets - offsets[0]
+
+    def mismatch(self, tokenizer, max_length, sources=None):
+        """Why the store does not fit these settings, or None if it does"""
+        built_with = self.manifest['tokenizer']
+        current = tokenizer_info(tokenizer)
+        # The name is informational: a local copy of the same tokenizer still matches
+        for key in ('class', 'transformers_version', 'fingerprint'):
+            if built_with.get(key) != current[key]:
+                if key == 'fingerprint':
+                    return "tokenizer files changed"
+                return f"tokenizer {key} changed: {built_with.get(key)} -> {current[key]}"
+        if self.manifest['max_length'] != max_length:
+            return f"max_length changed: {self.manifest['max_length']} -> {max_length}"
+        if sources is not None and self.manifest['sources'] != sources:
+            return "source files changed"
+        return None
+
+
+def build(path, tokenizer, fake_path, true_path, max_length=Config.MAX_SEQUENCE_LENGTH, batch_size=1000):
+    """Tokenize the dataset into a new store at path (replacing any existing one)"""
+    started = time.perf_counter()
+    building = f"{path}.building-{os.getpid()}"
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+
+    lengths, labels = [], []
+    with open(os.path.join(building, 'ids.int32'), 'wb') as ids_file:
+        for batch in batched(iter_labeled_articles(fake_path, true_path), batch_size):
+            encoded = tokenizer(
+                [bert_input(article['title'], article['text']) for article in batch],
+                add_special_tokens=True,
+                truncation=max_length is not None,
+                max_length=max_length
+            )['input_ids']
+            batch_lengths = [len(ids) for ids in encoded]
+            np.fromiter(chain.from_iterable(encoded), dtype=np.int32, count=sum(batch_lengths)).tofile(ids_file)
+            lengths.extend(batch_lengths)
+            labels.extend(article['label'] for article in batch)
+
+    lengths = np.asarray(lengths, dtype=np.int32)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    lengths.tofile(os.path.join(building, 'lengths.int32'))
+    offsets.tofile(os.path.join(building, 'offsets.int64'))
+    np.asarray(labels, dtype=np.int32).tofile(os.path.join(building, 'labels.int32'))
+
+    manifest = {
+        'format': STORE_FORMAT,
+        'format_version': STORE_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'bert_input': BERT_INPUT_TEMPLATE,
+        'tokenizer': tokenizer_info(tokenizer),
+        'max_length': max_length,
+        'add_special_tokens': True,
+        'sources': source_info(fake_path, true_path),
+        'articles': len(lengths),
+        'tokens': int(offsets[-1]),
+        'arrays': ARRAYS
+    }
+    with open(os.path.join(building, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Swap the finished directory in; readers of the old store keep their maps
+    if os.path.exists(path):
+        retired = f"{path}.old-{os.getpid()}"
+        os.replace(path, retired)
+        os.replace(building, path)
+        shutil.rmtree(retired, ignore_errors=True)
+    else:
+        os.replace(building, path)
+    logger.info(f"✅ Corpus store built: {manifest['articles']:,} articles, {manifest['tokens']:,} tokens "
+                f"in {time.perf_counter() - started:.1f}s")
+    return CorpusStore(path)
+
+
+def open_or_build(path, tokenizer, fake_path, true_path, max_length=Config.MAX_SEQUENCE_LENGTH):
+    """Open the store at path, rebuilding it first if it is missing or out of date"""
+    reason = 'no store yet'
+    if is_store(path):
+        try:
+            store = CorpusStore(path)
+            reason = store.mismatch(tokenizer, max_length, source_info(fake_path, true_path))
+            if reason is None:
+                return store
+        except (ValueError, KeyError, OSError) as e:
+            reason = f"unreadable store: {e}"
+    logger.info(f"🔄 Building corpus store {path} ({reason})")
+    return build(path, tokenizer, fake_path, true_path, max_length=max_length)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help='build the store, or rebuild it if it is out of date')
+    build_parser.add_argument('--fake', required=True, help="the dataset's Fake.csv")
+    build_parser.add_argument('--true', required=True, help="the dataset's True.csv")
+    build_parser.add_argument('--output', default=DEFAULT_STORE_PATH, help='store directory')
+    build_parser.add_argument('--tokenizer', default=Config.CLASSIFICATION_MODEL,
+                              help="tokenizer name or directory (default: the classifier's)")
+    build_parser.add_argument('--max-length', type=int, default=Config.MAX_SEQUENCE_LENGTH,
+                              help='truncate articles to this many tokens (0: keep whole articles)')
+    build_parser.add_argument('--force', action='store_true', help='rebuild even if the store is current')
+    info_parser = commands.add_parser('info', help="print a store's manifest")
+    info_parser.add_argument('path', nargs='?', default=DEFAULT_STORE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == 'info':
+        print(json.dumps(read_manifest(args.path), indent=2))
+        return 0
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    max_length = args.max_length or None
+    if args.force:
+        store = build(args.output, tokenizer, args.fake, args.true, max_length=max_length)
+    else:
+        store = open_or_build(args.output, tokenizer, args.fake, args.true, max_length=max_length)
+    print(f"{args.output}: {len(store):,} articles, {store.manifest['tokens']:,} tokens")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+Labeled News Dataset
+====================
+Streaming reader for the Fake/True news CSV files used in the notebook
+(Kaggle "Fake News Detection Datasets": ``Fake.csv`` and ``True.csv`` with
+``title``, ``text``, ``subject`` and ``date`` columns).
+
+Rows are read one at a time with the ``csv`` module, so the full dataset
+never has to fit in memory. Labels follow the notebook: 0 = Fake, 1 = Real.
+"""
+
+import csv
+import sys
+from itertools import islice, zip_longest
+
+FAKE_LABEL = 0
+REAL_LABEL = 1
+LABEL_NAMES = {FAKE_LABEL: 'Fake', REAL_LABEL: 'Real'}
+
+# Article bodies can be longer than the csv module's default field limit
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+
+def iter_articles(path, label=None):
+    """Yield {'title', 'text', 'label'} dictionaries from one CSV file"""
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            yield {
+                'title': (row.get('title') or '').strip(),
+                'text': (row.get('text') or '').strip(),
+                'label': label
+            }
+
+
+def iter_labeled_articles(fake_path, true_path, limit=None):
+    """Yield labeled articles alternating between the two files.
+
+    Interleaving keeps any prefix of the stream (e.g. ``limit``) balanced
+    between fake and real articles; the longer file's remainder follows.
+    """
+    pairs = zip_longest(iter_articles(fake_path, FAKE_LABEL), iter_articles(true_path, REAL_LABEL))
+    articles = (article for pair in pairs for article in pair if article is not None)
+    return islice(articles, limit)
+
+
+def batched(iterable, size):
+    """Yield lists of up to ``size`` items"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
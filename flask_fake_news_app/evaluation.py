@@ -0,0 +1,400 @@
+"""
+Offline Evaluation
+==================
+Scores the full labeled dataset (the notebook's ``Fake.csv`` + ``True.csv``)
+and reports accuracy, precision, recall, F1, the confusion matrix and
+throughput.
+
+- articles are streamed with ``dataset.iter_labeled_articles`` and scored in
+  chunks across a process pool (one detector per process, as in
+  ``bulk_scoring``)
+- the per-article method scores (pattern score, pipeline score, token
+  diversity) are cached in SQLite, keyed by the article's content hash and
+  the detector's ``score_version``, which leaves out the score weights and
+  threshold
+- the final prediction is recomputed from those scores with
+  ``bert_detector.combine_scores``, so a re-run with another ``--threshold``
+  or ``--weights`` only reads the cache and does not load the model
+- with ``--corpus`` the token ids come from a pre-tokenized
+  ``corpus_store`` (built on first use, rebuilt when the tokenizer changes)
+  instead of the tokenizer
+
+Usage:
+    python evaluation.py --fake Fake.csv --true True.csv --workers 4 --output report.json
+    python evaluation.py --fake Fake.csv --true True.csv --threshold 0.45 --weights 0.5 0.3 0.2
+    python evaluation.py --fake Fake.csv --true True.csv --corpus --no-cache
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+
+import bulk_scoring
+import corpus_store
+from bert_detector import (FALLBACK_SCORE_WEIGHTS, FAKE_THRESHOLD, MAX_SEQUENCE_LENGTH, SCORE_WEIGHTS,
+                           SCORING_VERSION, combine_scores, patterns_digest)
+from config import INFERENCE_CONFIG, LONG_DOCUMENT_CONFIG, SUSPICIOUS_PATTERNS
+from dataset import FAKE_LABEL, LABEL_NAMES, REAL_LABEL, batched, iter_labeled_articles
+from result_cache import content_key
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'evaluation_cache.sqlite')
+
+# The model_version columns hold the detector's score_version
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    key TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    suspicion_patterns REAL NOT NULL,
+    pipeline_score REAL NOT NULL,
+    token_diversity REAL,
+    text_length INTEGER,
+    PRIMARY KEY (key, model_version)
+);
+CREATE TABLE IF NOT EXISTS sources (
+    fingerprint TEXT PRIMARY KEY,
+    model_version TEXT NOT NULL
+);
+"""
+
+# SQLite's default limit on bound parameters per statement is 999
+LOOKUP_BATCH = 900
+
+
+class ScoreCache:
+    """SQLite store of per-article method scores"""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+
+    def score_version(self, fingerprint):
+        """score_version recorded for a model source, or None"""
+        row = self.connection.execute(
+            'SELECT model_version FROM sources WHERE fingerprint = ?', (fingerprint,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_score_version(self, fingerprint, score_version):
+        self.connection.execute(
+            'INSERT OR REPLACE INTO sources (fingerprint, model_version) VALUES (?, ?)',
+            (fingerprint, score_version)
+        )
+
+    def get_many(self, keys, score_version):
+        """{key: scores} for the cached keys"""
+        found = {}
+        keys = list(dict.fromkeys(keys))
+        for start in range(0, len(keys), LOOKUP_BATCH):
+            part = keys[start:start + LOOKUP_BATCH]
+            rows = self.connection.execute(
+                f"SELECT key, suspicion_patterns, pipeline_score, token_diversity, text_length FROM scores "
+                f"WHERE model_version = ? AND key IN ({', '.join('?' * len(part))})",
+                [score_version, *part]
+            )
+            for key, suspicion, pipeline_score, token_diversity, text_length in rows:
+                found[key] = {
+                    'suspicion_patterns': suspicion,
+                    'pipeline_score': pipeline_score,
+                    'token_diversity': token_diversity,
+                    'text_length': text_length
+                }
+        return found
+
+    def put_many(self, entries, score_version):
+        """Store (key, scores) pairs in one transaction"""
+        with self.connection:
+            self.connection.execute('BEGIN')
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (key, score_version, scores['suspicion_patterns'], scores['pipeline_score'],
+                     scores['token_diversity'], scores['text_length'])
+                    for key, scores in entries
+                ]
+            )
+
+    def close(self):
+        self.connection.close()
+
+
+def model_fingerprint(model_path):
+    """Identity of the model source and the settings behind the method scores, known without loading the model"""
+    if model_path:
+        source = os.path.abspath(model_path)
+        try:
+            source = f"{source}@{os.path.getmtime(model_path)}"
+        except OSError:
+            pass
+    else:
+        source = 'hub'
+    settings = {
+        'source': source,
+        'scoring_version': SCORING_VERSION,
+        # Editing the patterns rescores; weights and threshold only recombine
+        'patterns': patterns_digest(SUSPICIOUS_PATTERNS),
+        'precision': INFERENCE_CONFIG['precision'],
+        'backend': INFERENCE_CONFIG['backend'],
+        'long_document': LONG_DOCUMENT_CONFIG
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _worker_score_version():
+    """Pool task: score_version of this worker's detector"""
+    if bulk_scoring._worker_detector is None:
+        raise RuntimeError(f"Worker could not load the detector: {bulk_scoring._worker_error}")
+    return bulk_scoring._worker_detector.score_version
+
+
+_worker_corpus = None
+
+
+def _worker_prepare_corpus(corpus_path, fake_path, true_path):
+    """Pool task: open (or build) the token store for this worker's tokenizer.
+    
+    Returns the number of stored articles, or None when the store cannot be
+    used: no tokenizer, or long-document mode, which tokenizes whole articles.
+    """
+    detector = bulk_scoring._worker_detector
+    if detector is None:
+        raise RuntimeError(f"Worker could not load the detector: {bulk_scoring._worker_error}")
+    tokenizer = detector._encoding_tokenizer()
+    if tokenizer is None or LONG_DOCUMENT_CONFIG['enabled']:
+        return None
+    store = corpus_store.open_or_build(corpus_path, tokenizer, fake_path, true_path, max_length=MAX_SEQUENCE_LENGTH)
+    return len(store)
+
+
+def _score_chunk_from_corpus(articles, batch_size, corpus_path):
+    """Pool task: ``bulk_scoring._score_chunk`` with token ids read from the store"""
+    global _worker_corpus
+    if _worker_corpus is None or _worker_corpus.path != corpus_path:
+        _worker_corpus = corpus_store.CorpusStore(corpus_path)
+    token_ids = [_worker_corpus.token_ids(article['index']) for article in articles]
+    return bulk_scoring._score_chunk(articles, batch_size, token_ids)
+
+
+class Metrics:
+    """Confusion matrix with Fake as the positive class"""
+
+    def __init__(self):
+        self.matrix = {actual: {predicted: 0 for predicted in LABEL_NAMES} for actual in LABEL_NAMES}
+        self.errors = 0
+
+    def add(self, label, predicted):
+        self.matrix[label][predicted] += 1
+
+    def report(self):
+        tp = self.matrix[FAKE_LABEL][FAKE_LABEL]
+        fn = self.matrix[FAKE_LABEL][REAL_LABEL]
+        fp = self.matrix[REAL_LABEL][FAKE_LABEL]
+        tn = self.matrix[REAL_LABEL][REAL_LABEL]
+        total = tp + fn + fp + tn
+
+        def ratio(numerator, denominator):
+            return round(numerator / denominator, 4) if denominator else None
+
+        precision = ratio(tp, tp + fp)
+        recall = ratio(tp, tp + fn)
+        f1 = ratio(2 * tp, 2 * tp + fp + fn)
+        return {
+            'articles': total,
+            'errors': self.errors,
+            'accuracy': ratio(tp + tn, total),
+            'precision': precision,
+            'recall': recall,
+            'f1': f1,
+            'real_precision': ratio(tn, tn + fn),
+            'real_recall': ratio(tn, tn + fp),
+            # rows: actual label, columns: predicted label
+            'confusion_matrix': {
+                LABEL_NAMES[actual]: {LABEL_NAMES[predicted]: count for predicted, count in row.items()}
+                for actual, row in self.matrix.items()
+            }
+        }
+
+
+def evaluate(fake_path, true_path, model_path=None, workers=1, chunk_size=256, batch_size=16,
+             limit=None, cache_path=DEFAULT_CACHE_PATH, threshold=FAKE_THRESHOLD, weights=None,
+             fallback_weights=None, progress_interval=5.0, corpus_path=None):
+    """Score the labeled dataset (cached where possible) and return the report"""
+    weights = weights or SCORE_WEIGHTS
+    fallback_weights = fallback_weights or FALLBACK_SCORE_WEIGHTS
+    cache = ScoreCache(cache_path) if cache_path else None
+    fingerprint = model_fingerprint(model_path)
+    score_version = cache.score_version(fingerprint) if cache else None
+
+    pool = None
+    corpus = None
+
+    def start_pool():
+        nonlocal pool, score_version, corpus
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        pool = multiprocessing.Pool(workers, initializer=bulk_scoring._init_worker, initargs=(model_path, threads))
+        loaded_version = pool.apply(_worker_score_version)
+        if score_version is not None and loaded_version != score_version:
+            print(f"⚠️ Score version changed: {score_version} -> {loaded_version}", file=sys.stderr)
+        score_version = loaded_version
+        if cache:
+            cache.set_score_version(fingerprint, score_version)
+        if corpus_path:
+            # Built (or rebuilt) by one worker before any scoring task reads it
+            if pool.apply(_worker_prepare_corpus, (corpus_path, fake_path, true_path)) is not None:
+                corpus = corpus_path
+            else:
+                print("⚠️ Corpus store not used: no tokenizer or long-document mode", file=sys.stderr)
+
+    # Without a known score version nothing can be looked up: load the model first
+    if score_version is None:
+        start_pool()
+
+    metrics = Metrics()
+    counts = {'cached': 0, 'scored': 0}
+    started = time.perf_counter()
+    last_report = started
+
+    def add(label, scores):
+        final_score = combine_scores(
+            scores['suspicion_patterns'], scores['pipeline_score'], scores['token_diversity'],
+            weights=weights, fallback_weights=fallback_weights
+        )
+        metrics.add(label, FAKE_LABEL if final_score > threshold else REAL_LABEL)
+
+    def collect(task):
+        result, articles = task
+        rows = result.get()
+        scored = []
+        for article, row in zip(articles, rows):
+            if row['prediction'] == 'Error':
+                metrics.errors += 1
+                continue
+            scores = {name: row[name] for name in ('suspicion_patterns', 'pipeline_score', 'token_diversity', 'text_length')}
+            scored.append((article['key'], scores))
+            add(article['label'], scores)
+        counts['scored'] += len(articles)
+        if cache and scored:
+            cache.put_many(scored, score_version)
+
+    try:
+        pending = deque()
+        for index_base, chunk in enumerate(batched(iter_labeled_articles(fake_path, true_path, limit), chunk_size)):
+            for offset, article in enumerate(chunk):
+                article['index'] = index_base * chunk_size + offset
+                article['key'] = content_key(article['title'], article['text'])
+            cached = cache.get_many([article['key'] for article in chunk], score_version) if cache else {}
+            missing = []
+            for article in chunk:
+                if article['key'] in cached:
+                    add(article['label'], cached[article['key']])
+                    counts['cached'] += 1
+                else:
+                    missing.append(article)
+
+            if missing:
+                if pool is None:
+                    start_pool()
+                if corpus:
+                    task = pool.apply_async(_score_chunk_from_corpus, (missing, batch_size, corpus))
+                else:
+                    task = pool.apply_async(bulk_scoring._score_chunk, (missing, batch_size))
+                pending.append((task, missing))
+                # Keep a bounded number of chunks in flight
+                while len(pending) >= workers * 2:
+                    collect(pending.popleft())
+
+            now = time.perf_counter()
+            if now - last_report >= progress_interval:
+                last_report = now
+                done = counts['cached'] + counts['scored']
+                print(f"📈 {done:,} articles ({counts['cached']:,} cached), "
+                      f"{done / (now - started):.1f} articles/s", file=sys.stderr)
+        while pending:
+            collect(pending.popleft())
+        if pool is not None:
+            pool.close()
+    except BaseException:
+        if pool is not None:
+            pool.terminate()
+        raise
+    finally:
+        if pool is not None:
+            pool.join()
+        if cache:
+            cache.close()
+
+    elapsed = time.perf_counter() - started
+    report = metrics.report()
+    report.update({
+        'score_version': score_version,
+        'threshold': threshold,
+        'weights': weights,
+        'fallback_weights': fallback_weights,
+        'cached': counts['cached'],
+        'scored': counts['scored'],
+        'seconds': round(elapsed, 2),
+        'articles_per_s': round((counts['cached'] + counts['scored']) / elapsed, 1) if elapsed else None,
+        'scored_per_s': round(counts['scored'] / elapsed, 1) if elapsed and counts['scored'] else None,
+        'workers': workers if pool is not None else 0,
+        'corpus': corpus
+    })
+    return report
+
+
+def print_report(report):
+    matrix = report['confusion_matrix']
+    print(f"Articles: {report['articles']:,} ({report['cached']:,} cached, {report['scored']:,} scored, "
+          f"{report['errors']} errors) in {report['seconds']}s = {report['articles_per_s']} articles/s")
+    print(f"Accuracy:  {report['accuracy']}")
+    print(f"Precision: {report['precision']}  Recall: {report['recall']}  F1: {report['f1']}  (Fake = positive)")
+    print()
+    print(f"{'actual / predicted':<20}{'Fake':>10}{'Real':>10}")
+    for actual in ('Fake', 'Real'):
+        print(f"{actual:<20}{matrix[actual]['Fake']:>10}{matrix[actual]['Real']:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fake', required=True, help='path to Fake.csv')
+    parser.add_argument('--true', required=True, help='path to True.csv')
+    parser.add_argument('--limit', type=int, help='evaluate only the first N articles (balanced)')
+    parser.add_argument('--model', help='bundle or .pkl (default: build from the hub)')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument('--chunk-size', type=int, default=256, help='articles per pool task')
+    parser.add_argument('--batch-size', type=int, default=16, help='articles per model forward pass')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help='score cache database')
+    parser.add_argument('--no-cache', action='store_true', help='score every article again')
+    parser.add_argument('--threshold', type=float, default=FAKE_THRESHOLD, help='fake probability above which an article is Fake')
+    parser.add_argument('--weights', type=float, nargs=3, metavar=('PATTERNS', 'PIPELINE', 'DIVERSITY'),
+                        help=f"score weights (default: {SCORE_WEIGHTS['suspicion']} {SCORE_WEIGHTS['pipeline']} "
+                             f"{SCORE_WEIGHTS['token_diversity']})")
+    parser.add_argument('--corpus', nargs='?', const=corpus_store.DEFAULT_STORE_PATH,
+                        help=f'read token ids from a pre-tokenized store (default: {corpus_store.DEFAULT_STORE_PATH})')
+    parser.add_argument('--output', help='write the report as JSON')
+    args = parser.parse_args(argv)
+
+    weights = None
+    if args.weights:
+        weights = dict(zip(('suspicion', 'pipeline', 'token_diversity'), args.weights))
+
+    report = evaluate(
+        args.fake, args.true, model_path=args.model, workers=args.workers, chunk_size=args.chunk_size,
+        batch_size=args.batch_size, limit=args.limit, cache_path=None if args.no_cache else args.cache,
+        threshold=args.threshold, weights=weights, corpus_path=args.corpus
+    )
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
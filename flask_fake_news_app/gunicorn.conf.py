@@ -0,0 +1,60 @@
+"""
+Gunicorn settings
+=================
+Loaded automatically by ``gunicorn app:app`` from this directory; command line
+flags (e.g. the Dockerfile's ``--workers``/``--threads``) still take precedence.
+
+Enables Prometheus multiprocess mode so ``/metrics`` on any worker reports
+the samples of all workers, and pre-fork model sharing (see ``prefork.py``):
+the master loads the detector once and the workers share it copy-on-write.
+Set ``PREFORK_MODEL=false`` to have every worker load its own copy; this is
+also what happens with ``LAZY_MODEL_LOADING=true``.
+"""
+
+import os
+import shutil
+import tempfile
+
+# Every worker writes its metric samples to files in this directory. It has
+# to be set before the app (and prometheus_client) is imported.
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'fake_news_prometheus')
+)
+
+# Samples left by a previous server would be added to the new ones. The
+# marker keeps a config reload (SIGHUP) from wiping the running workers' files.
+if not os.environ.get('FAKE_NEWS_METRICS_DIR_READY'):
+    shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+    os.environ['FAKE_NEWS_METRICS_DIR_READY'] = '1'
+
+# The master loads the detector before forking (see prefork.py); not with
+# LAZY_MODEL_LOADING=true, where the workers must fork before the model is loaded
+import prefork
+prefork_model = prefork.wanted()
+if prefork_model:
+    prefork.enable()
+    preload_app = True
+
+
+def pre_fork(server, worker):
+    """Load, warm and freeze the detector in the master before forking"""
+    if prefork_model:
+        import app as app_module
+        prefork.prepare_master(app_module)
+
+
+def post_fork(server, worker):
+    if prefork_model:
+        prefork.init_worker()
+    # Threads do not survive fork: each worker starts its own job runner, also
+    # with --preload and PREFORK_MODEL=false (the master never starts one)
+    import app as app_module
+    if app_module.job_runner is not None:
+        app_module.job_runner.start()
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited"""
+    from metrics import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -0,0 +1,214 @@
+"""
+Inference Executor
+==================
+Runs model inference on a small, fixed pool of dedicated threads.
+
+Request threads hand their prediction to ``InferenceExecutor.submit`` and
+block until it is done. With the pool and torch's intra-op/inter-op thread
+pools sized together (``plan_threads``), a burst of requests waits in a queue
+instead of oversubscribing the cores. The queue is bounded: when it is full,
+or a task has waited longer than ``max_queue_wait`` seconds without starting,
+``submit`` raises ``QueueFullError`` so the caller can answer HTTP 503 with
+``Retry-After`` instead of holding the connection until gunicorn's timeout.
+"""
+
+import logging
+import math
+import os
+import queue
+import threading
+import time
+
+from batching import QueueFullError, SampleWindow
+
+logger = logging.getLogger(__name__)
+
+
+class _Task:
+    __slots__ = ('func', 'args', 'kwargs', 'enqueued_at', 'done', 'running', 'cancelled', 'result', 'error')
+
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.running = False
+        self.cancelled = False
+        self.result = None
+        self.error = None
+
+
+class InferenceExecutor:
+    """Fixed pool of inference threads behind a bounded queue"""
+
+    def __init__(self, workers=1, max_queue_size=32, max_queue_wait=30.0, name='inference'):
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.max_queue_wait = max_queue_wait
+        self.name = name
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._threads = []
+        self._threads_pid = None
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.expired = 0
+        self.queue_wait_ms = SampleWindow()
+        self.run_ms = SampleWindow()
+
+    def submit(self, func, *args, block=False, **kwargs):
+        """Run ``func(*args, **kwargs)`` on an inference thread and return its result
+
+        Raises ``QueueFullError`` when the queue is full or the task could not
+        start within ``max_queue_wait``. With ``block=True`` (for internal
+        callers that have their own admission control) it waits for a free
+        slot and never expires.
+        """
+        self._ensure_workers()
+
+        task = _Task(func, args, kwargs)
+        try:
+            if block:
+                self._queue.put(task)
+            else:
+                self._queue.put_nowait(task)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise QueueFullError("Inference queue is full", queue=self.name)
+
+        if not task.done.wait(None if block else self.max_queue_wait):
+            with self._lock:
+                if not task.running:
+                    task.cancelled = True
+                    self.expired += 1
+            if task.cancelled:
+                raise QueueFullError("Inference request waited too long in the queue", queue=self.name)
+            # Already running: its result is on the way
+            task.done.wait()
+
+        if task.error is not None:
+            raise task.error
+        return task.result
+
+    def stats(self):
+        """Pool, queue and latency statistics (milliseconds for latencies)"""
+        return {
+            'workers': self.workers,
+            'active': self.active,
+            'queue_depth': self._queue.qsize(),
+            'max_queue_size': self.max_queue_size,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'expired': self.expired,
+            'queue_wait_ms': self.queue_wait_ms.summary(),
+            'run_ms': self.run_ms.summary()
+        }
+
+    def _ensure_workers(self):
+        # Threads do not survive fork, so (re)start the pool in each process
+        if self._threads_pid == os.getpid() and all(thread.is_alive() for thread in self._threads):
+            return
+        with self._start_lock:
+            if self._threads_pid != os.getpid():
+                self._threads = []
+                self._threads_pid = os.getpid()
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._run, name=f'{self.name}-{len(self._threads)}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            with self._lock:
+                if task.cancelled:
+                    continue
+                task.running = True
+                self.active += 1
+
+            started = time.perf_counter()
+            self.queue_wait_ms.add((started - task.enqueued_at) * 1000)
+            try:
+                task.result = task.func(*task.args, **task.kwargs)
+            except Exception as e:
+                task.error = e
+            finally:
+                self.run_ms.add((time.perf_counter() - started) * 1000)
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+                task.done.set()
+
+
+def available_cpus():
+    """CPUs this process may use: its affinity mask, capped by a cgroup CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+def _cgroup_cpu_quota():
+    """CPU limit of the container (cgroup v2 or v1), or None"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        return None if quota == 'max' else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        return quota / period if quota > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def plan_threads(workers=0, torch_threads=0, interop_threads=0, processes=1):
+    """Resolve the thread settings; 0 means sized from the available CPUs
+
+    The CPUs are shared by ``processes`` server processes. One inference
+    thread with every core for torch gives the lowest latency on small
+    machines; from 4 cores two threads let one tokenize while the other runs
+    the model.
+    """
+    cpus = max(1, available_cpus() // max(1, processes))
+    if workers <= 0:
+        workers = 1 if cpus < 4 else 2
+    if torch_threads <= 0:
+        torch_threads = max(1, cpus // workers)
+    if interop_threads <= 0:
+        interop_threads = 1
+    return {
+        'cpus': cpus,
+        'workers': workers,
+        'torch_threads': torch_threads,
+        'interop_threads': interop_threads
+    }
+
+
+def configure_torch_threads(torch_threads, interop_threads):
+    """Apply the torch thread pool sizes (process-wide)"""
+    import torch
+
+    torch.set_num_threads(torch_threads)
+    if torch.get_num_interop_threads() != interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:
+            # Only possible before the first inter-op parallel work
+            logger.warning(f"⚠️ Keeping {torch.get_num_interop_threads()} torch inter-op threads: {e}")
@@ -0,0 +1,234 @@
+"""
+Background Scoring Jobs
+=======================
+Large scoring runs outside the request/response cycle, so they are not cut
+off by gunicorn's request ``--timeout``.
+
+``POST /api/jobs`` stores a job and its articles in the database and answers
+202 at once. ``GET /api/jobs/<id>`` reports progress, throughput and the
+results scored so far. In every server process a ``JobRunner`` keeps a few
+threads that claim queued jobs and score them chunk by chunk into
+``NewsAnalysis``. The database is the queue, so no broker is needed.
+
+A chunk's analysis rows, item results and job progress are committed in one
+transaction, so an interrupted job resumes after its last committed chunk.
+
+- a claim is a lease: a running job whose heartbeat is older than
+  ``lease_seconds`` is picked up again by any runner, e.g. after a crash or
+  a restart. While a runner owns a job, a timer renews the heartbeat every
+  ``heartbeat_interval`` (a third of the lease), so a slow chunk is not
+  mistaken for a dead runner
+- a chunk only commits while its runner still owns the job, so a cancelled
+  or reclaimed job is never written twice
+- on a clean shutdown a runner hands its jobs back to the queue right away
+
+Runners only start in processes that serve requests: from gunicorn's
+``post_fork`` hook or on the first request, never in a master that preloads
+the app, since threads and held locks would be inherited by every fork.
+"""
+
+import atexit
+import io
+import logging
+import os
+import socket
+import threading
+import time
+
+from batching import QueueFullError
+from bulk_scoring import input_format, iter_records
+from startup import ModelNotReadyError
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+ITEM_PENDING = 'pending'
+ITEM_SCORED = 'scored'
+ITEM_ERROR = 'error'
+
+
+class JobRunner:
+    """Threads that claim queued jobs and process them one chunk at a time.
+
+    The database work is done by four callbacks:
+
+    - ``claim_callback(owner)``: lease the next runnable job, return its id or None
+    - ``chunk_callback(job_id, owner)``: score and commit one chunk; False
+      when the job is finished or no longer owned by ``owner``
+    - ``release_callback(job_id, owner, error)``: hand the job back to the
+      queue; with an error it counts as a failed attempt
+    - ``heartbeat_callback(job_id, owner)``: renew the lease; False when the
+      job is no longer owned by ``owner``
+    """
+
+    def __init__(self, claim_callback, chunk_callback, release_callback, heartbeat_callback,
+                 workers=1, poll_interval=2.0, retry_delay=5.0, heartbeat_interval=40.0):
+        self.claim_callback = claim_callback
+        self.chunk_callback = chunk_callback
+        self.release_callback = release_callback
+        self.heartbeat_callback = heartbeat_callback
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.heartbeat_interval = heartbeat_interval
+
+        self._threads = []
+        self._heartbeat_thread = None
+        self._threads_pid = None
+        self._start_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._current = {}
+
+        self.chunks = 0
+        self.failures = 0
+        atexit.register(self.stop)
+
+    def start(self):
+        """Start the runner threads in this process (threads do not survive fork)"""
+        if self._stopping.is_set() or self._running():
+            return
+        with self._start_lock:
+            if self._threads_pid != os.getpid():
+                self._threads = []
+                self._heartbeat_thread = None
+                self._current = {}
+                self._threads_pid = os.getpid()
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                owner = f"{socket.gethostname()}:{os.getpid()}:{len(self._threads)}"
+                thread = threading.Thread(
+                    target=self._run, args=(owner,), name=f'job-runner-{len(self._threads)}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+            if self._heartbeat_thread is None or not self._heartbeat_thread.is_alive():
+                self._heartbeat_thread = threading.Thread(
+                    target=self._heartbeat, name='job-heartbeat', daemon=True
+                )
+                self._heartbeat_thread.start()
+
+    def wake(self):
+        """A job was submitted: look for work now instead of at the next poll"""
+        self._wake.set()
+
+    def stop(self, timeout=10):
+        """Let running chunks finish, then return this process's jobs to the queue"""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        self._wake.set()
+        if self._threads_pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0, deadline - time.monotonic()))
+        # Threads still busy with a chunk: that chunk's commit is dropped once released
+        for owner, job_id in list(self._current.items()):
+            self._release(job_id, owner)
+
+    def stats(self):
+        with self._counter_lock:
+            return {
+                'workers': self.workers,
+                'running': sorted(self._current.values()),
+                'chunks': self.chunks,
+                'failures': self.failures
+            }
+
+    def _running(self):
+        # Fast path for the per-request start() call
+        if self._threads_pid != os.getpid() or len(self._threads) < self.workers:
+            return False
+        threads = self._threads + [self._heartbeat_thread]
+        return all(thread is not None and thread.is_alive() for thread in threads)
+
+    def _heartbeat(self):
+        # Renews the leases while chunks run; a chunk may take longer than the lease
+        while not self._stopping.wait(self.heartbeat_interval):
+            for owner, job_id in list(self._current.items()):
+                try:
+                    if not self.heartbeat_callback(job_id, owner):
+                        logger.warning(f"⚠️ Job {job_id} is no longer owned by {owner}")
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not renew the lease of job {job_id}: {e}")
+
+    def _run(self, owner):
+        while not self._stopping.is_set():
+            try:
+                job_id = self.claim_callback(owner)
+            except Exception as e:
+                logger.error(f"❌ Could not claim a job: {e}")
+                job_id = None
+            if job_id is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+
+            self._current[owner] = job_id
+            logger.info(f"🔄 Job {job_id} claimed by {owner}")
+            try:
+                self._process(job_id, owner)
+            finally:
+                self._current.pop(owner, None)
+
+    def _process(self, job_id, owner):
+        while not self._stopping.is_set():
+            try:
+                more = self.chunk_callback(job_id, owner)
+            except (QueueFullError, ModelNotReadyError):
+                # Busy or not ready yet: not the job's fault, retry later
+                self._release(job_id, owner)
+                self._stopping.wait(self.retry_delay)
+                return
+            except Exception as e:
+                logger.error(f"❌ Job {job_id} chunk failed: {e}")
+                with self._counter_lock:
+                    self.failures += 1
+                self._release(job_id, owner, error=str(e))
+                self._stopping.wait(self.retry_delay)
+                return
+            with self._counter_lock:
+                self.chunks += 1
+            if not more:
+                return
+        # Shutting down between chunks: the job resumes elsewhere without waiting for the lease
+        self._release(job_id, owner)
+
+    def _release(self, job_id, owner, error=None):
+        try:
+            self.release_callback(job_id, owner, error)
+        except Exception as e:
+            # The lease expires on its own and another runner picks the job up
+            logger.warning(f"⚠️ Could not release job {job_id}: {e}")
+
+
+def read_articles(stream, filename):
+    """(title, content) pairs from an uploaded CSV or JSONL file.
+
+    CSV files need a header row. The body may be in a ``content`` or a
+    ``text`` field (the notebook's CSVs use ``text``).
+    """
+    reader = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    articles = []
+    for index, record in enumerate(iter_records(reader, input_format(filename or ''))):
+        if not isinstance(record, dict):
+            raise ValueError(f"Record {index} is not an object")
+        title = str(record.get('title') or '').strip()
+        content = str(record.get('content') or record.get('text') or '').strip()
+        if not title or not content:
+            raise ValueError(f"Both title and content are required (record {index})")
+        articles.append((title, content))
+    return articles
+
+
+def throughput(processed, active_seconds):
+    """Articles per second of scoring time, not counting time spent queued or stopped"""
+    return round(processed / active_seconds, 2) if active_seconds else None
@@ -0,0 +1,220 @@
+"""
+Prometheus Metrics
+==================
+Latency histograms, counters and gauges for ``/metrics``:
+
+- ``fakenews_detector_stage_seconds{stage}``: patterns, tokenize,
+  token_features and classify, per detector batch (via the detector's stage
+  observer hook)
+- ``fakenews_request_stage_seconds{endpoint,stage}``: cache_lookup,
+  inference, cache_store and db_insert inside the analyze routes
+- ``fakenews_request_seconds{endpoint}`` and
+  ``fakenews_requests_total{endpoint,method,status}``
+- ``fakenews_predictions_total{prediction,source}`` and
+  ``fakenews_cache_lookups_total{cache,result}``
+- ``fakenews_rejected_requests_total{queue}``: 503s from full queues
+- gauges for cache entries, queue depths and process RSS
+
+With several gunicorn workers set ``PROMETHEUS_MULTIPROC_DIR`` (see
+``gunicorn.conf.py``): every process writes its samples to memory-mapped
+files in that directory and a scrape of any worker aggregates all of them.
+
+Requires ``prometheus_client``; without it every helper is a no-op and
+``/metrics`` answers 503.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+    AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None
+    AVAILABLE = False
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+if AVAILABLE:
+    DETECTOR_STAGE_SECONDS = Histogram(
+        'fakenews_detector_stage_seconds', 'Detector stage latency per batch',
+        ['stage'], buckets=LATENCY_BUCKETS
+    )
+    REQUEST_STAGE_SECONDS = Histogram(
+        'fakenews_request_stage_seconds', 'Latency of the stages of an analyze request',
+        ['endpoint', 'stage'], buckets=LATENCY_BUCKETS
+    )
+    REQUEST_SECONDS = Histogram(
+        'fakenews_request_seconds', 'HTTP request latency',
+        ['endpoint'], buckets=LATENCY_BUCKETS
+    )
+    REQUESTS = Counter('fakenews_requests', 'HTTP requests', ['endpoint', 'method', 'status'])
+    PREDICTIONS = Counter('fakenews_predictions', 'Articles scored', ['prediction', 'source'])
+    DETECTOR_ARTICLES = Counter('fakenews_detector_articles', 'Articles run through the detector')
+    CACHE_LOOKUPS = Counter('fakenews_cache_lookups', 'Result cache lookups', ['cache', 'result'])
+    REJECTIONS = Counter('fakenews_rejected_requests', 'Requests answered 503 because a queue was full', ['queue'])
+
+    # Per-process values are summed over live workers; the on-disk cache is
+    # shared, so its size is the largest value any worker saw; RSS is one series per live pid
+    CACHE_ENTRIES = Gauge(
+        'fakenews_cache_entries', 'Entries in the in-process result caches', ['cache'],
+        multiprocess_mode='livesum'
+    )
+    PERSISTENT_CACHE_ENTRIES = Gauge(
+        'fakenews_persistent_cache_entries', 'Entries in the shared on-disk result cache',
+        multiprocess_mode='livemax'
+    )
+    QUEUE_DEPTH = Gauge(
+        'fakenews_queue_depth', 'Items waiting in in-process queues', ['queue'], multiprocess_mode='livesum'
+    )
+    RESIDENT_MEMORY = Gauge(
+        'fakenews_process_resident_memory_bytes', 'Resident set size of the process', multiprocess_mode='liveall'
+    )
+
+
+class _Refresher:
+    """Calls the gauge callback at most once per interval per process"""
+
+    def __init__(self):
+        self.callback = None
+        self.interval = 1.0
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, force=False):
+        if not AVAILABLE:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last < self.interval:
+                return
+            self._last = now
+        try:
+            RESIDENT_MEMORY.set(resident_memory_bytes())
+            if self.callback is not None:
+                self.callback()
+        except Exception as e:
+            logger.debug(f"Metrics gauge refresh failed: {e}")
+
+
+refresh_gauges = _Refresher()
+
+
+def is_multiprocess():
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def set_gauge_callback(callback, interval=1.0):
+    """Register the function that updates cache/queue gauges (throttled)"""
+    refresh_gauges.callback = callback
+    refresh_gauges.interval = interval
+
+
+def observe_detector_stage(stage, seconds, articles):
+    """Stage observer for ``bert_detector.add_stage_observer``"""
+    if not AVAILABLE:
+        return
+    DETECTOR_STAGE_SECONDS.labels(stage).observe(seconds)
+    if stage == 'classify':
+        DETECTOR_ARTICLES.inc(articles)
+
+
+_stage_listeners = []
+
+
+def add_stage_listener(listener):
+    """Also call ``listener(endpoint, stage, seconds)`` for every timed request stage"""
+    if listener not in _stage_listeners:
+        _stage_listeners.append(listener)
+
+
+@contextmanager
+def stage(endpoint, name):
+    """Time one stage of a request"""
+    if not AVAILABLE and not _stage_listeners:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if AVAILABLE:
+            REQUEST_STAGE_SECONDS.labels(endpoint, name).observe(seconds)
+        for listener in _stage_listeners:
+            listener(endpoint, name, seconds)
+
+
+def record_request(endpoint, method, status, seconds):
+    if not AVAILABLE:
+        return
+    endpoint = endpoint or 'unknown'
+    REQUESTS.labels(endpoint, method, str(status)).inc()
+    REQUEST_SECONDS.labels(endpoint).observe(seconds)
+    refresh_gauges()
+
+
+def record_predictions(results, source):
+    if not AVAILABLE:
+        return
+    for result in results:
+        PREDICTIONS.labels(result['prediction'], source).inc()
+
+
+def record_cache_lookup(cache, hit):
+    if AVAILABLE:
+        CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def record_rejection(queue):
+    if AVAILABLE:
+        REJECTIONS.labels(queue).inc()
+
+
+def set_cache_entries(cache, entries):
+    if AVAILABLE and entries is not None:
+        CACHE_ENTRIES.labels(cache).set(entries)
+
+
+def set_persistent_cache_entries(entries):
+    if AVAILABLE and entries is not None:
+        PERSISTENT_CACHE_ENTRIES.set(entries)
+
+
+def set_queue_depth(queue, depth):
+    if AVAILABLE:
+        QUEUE_DEPTH.labels(queue).set(depth)
+
+
+def resident_memory_bytes():
+    """Current RSS from /proc, or the peak RSS where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def render():
+    """Return (body, content_type) for a scrape"""
+    refresh_gauges(force=True)
+
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """gunicorn ``child_exit`` hook: drop a dead worker's live gauges"""
+    if AVAILABLE and is_multiprocess():
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,237 @@
+"""
+Detector Model Bundles
+======================
+Versioned on-disk format for a trained detector, replacing pickled
+``BERTFakeNewsDetector`` objects.
+
+A bundle is a directory::
+
+    bert_fake_news_detector_YYYYMMDD_HHMMSS/
+        manifest.json           format version, model names, labels, patterns
+        tokenizer/              Hugging Face tokenizer files
+        model/config.json       classifier configuration
+        model/model.safetensors classifier weights
+
+The weights are memory-mapped copy-on-write rather than read into private
+memory, so pages are only read when first touched and every process on a host
+that loads the same bundle shares them through the page cache. The model is
+built with its parameters on the meta device and the mapped tensors are
+attached directly, so loading never holds a private copy of the weights.
+
+Usage:
+    python model_bundle.py export [--from models/old_model.pkl] [--models-dir models]
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+BUNDLE_FORMAT = 'fake-news-detector-bundle'
+BUNDLE_VERSION = 1
+BUNDLE_PREFIX = 'bert_fake_news_detector_'
+MANIFEST_NAME = 'manifest.json'
+TOKENIZER_DIR = 'tokenizer'
+MODEL_DIR = 'model'
+WEIGHTS_NAME = 'model.safetensors'
+
+# safetensors dtype codes
+_DTYPES = {
+    'F64': 'float64', 'F32': 'float32', 'F16': 'float16', 'BF16': 'bfloat16',
+    'I64': 'int64', 'I32': 'int32', 'I16': 'int16', 'I8': 'int8', 'U8': 'uint8', 'BOOL': 'bool'
+}
+
+
+def is_bundle(path):
+    return os.path.isdir(path) and os.path.isfile(os.path.join(path, MANIFEST_NAME))
+
+
+def read_manifest(path):
+    """Load and validate a bundle manifest"""
+    with open(os.path.join(path, MANIFEST_NAME), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f"{path} is not a detector bundle")
+    if manifest.get('format_version', 0) > BUNDLE_VERSION:
+        raise ValueError(
+            f"Bundle format version {manifest['format_version']} is newer than supported ({BUNDLE_VERSION})"
+        )
+    return manifest
+
+
+def save_bundle(detector, path):
+    """Write a detector (with its classification pipeline) as a bundle directory"""
+    from bert_detector import SCORING_VERSION
+
+    classifier = detector.classifier_pipeline
+    if classifier is None:
+        raise ValueError("Only detectors with a loaded classification pipeline can be bundled")
+
+    os.makedirs(path, exist_ok=True)
+    classifier.tokenizer.save_pretrained(os.path.join(path, TOKENIZER_DIR))
+    # One unsharded safetensors file keeps the weights in a single mapping
+    classifier.model.save_pretrained(
+        os.path.join(path, MODEL_DIR), safe_serialization=True, max_shard_size='1000GB'
+    )
+
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'format_version': BUNDLE_VERSION,
+        'created_at': datetime.utcnow().isoformat(),
+        'model_name': detector.model_name,
+        'classifier_name': getattr(classifier.model, 'name_or_path', None),
+        'task': 'text-classification',
+        'scoring_version': SCORING_VERSION,
+        'suspicious_patterns': list(detector.suspicious_patterns),
+        'weights': f'{MODEL_DIR}/{WEIGHTS_NAME}'
+    }
+    with open(os.path.join(path, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return path
+
+
+def load_bundle(path):
+    """Load a detector from a bundle, memory-mapping its weights"""
+    from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer, pipeline
+    from bert_detector import BERTFakeNewsDetector
+
+    manifest = read_manifest(path)
+    tokenizer = AutoTokenizer.from_pretrained(os.path.join(path, TOKENIZER_DIR))
+
+    # Only the module tree is built here; every parameter comes from the mapping
+    config = AutoConfig.from_pretrained(os.path.join(path, MODEL_DIR))
+    with parameters_on_meta():
+        model = AutoModelForSequenceClassification.from_config(config)
+    model._bundle_weights = assign_mmap_weights(model, os.path.join(path, manifest['weights']))
+    model.bundle_path = os.path.join(path, MODEL_DIR)
+    # Keep the original identifier so model_version stays comparable
+    model.name_or_path = manifest.get('classifier_name') or model.name_or_path
+    model.eval()
+
+    classifier = pipeline('text-classification', model=model, tokenizer=tokenizer, device=-1)
+    return BERTFakeNewsDetector.from_components(
+        manifest['model_name'], tokenizer, classifier, manifest.get('suspicious_patterns')
+    )
+
+
+@contextmanager
+def parameters_on_meta():
+    """Create module parameters on the meta device: no memory, no initialization.
+
+    Buffers are still allocated: they are small, and non-persistent ones
+    (e.g. position ids) are not stored in the weights file.
+    """
+    import torch
+
+    register_parameter = torch.nn.Module.register_parameter
+
+    def register_on_meta(module, name, param):
+        register_parameter(module, name, param)
+        if param is not None and param.device.type != 'meta':
+            module._parameters[name] = torch.nn.Parameter(param.to('meta'), requires_grad=param.requires_grad)
+
+    torch.nn.Module.register_parameter = register_on_meta
+    try:
+        yield
+    finally:
+        torch.nn.Module.register_parameter = register_parameter
+
+
+def read_safetensors_mmap(weights_path):
+    """Map a safetensors file and return ({name: tensor}, mmap).
+
+    Tensors are views into a private (copy-on-write) mapping: nothing is read
+    until a page is touched, and untouched pages stay shared with the page
+    cache. The mapping must outlive the tensors.
+    """
+    import torch
+
+    with open(weights_path, 'rb') as f:
+        header_size = struct.unpack('<Q', f.read(8))[0]
+        header = json.loads(f.read(header_size))
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = 8 + header_size
+    tensors = {}
+    for name, info in header.items():
+        if name == '__metadata__':
+            continue
+        dtype = getattr(torch, _DTYPES[info['dtype']])
+        begin, end = info['data_offsets']
+        count = (end - begin) // torch.empty((), dtype=dtype).element_size()
+        if count == 0:
+            tensor = torch.empty(info['shape'], dtype=dtype)
+        else:
+            tensor = torch.frombuffer(mapping, dtype=dtype, count=count, offset=data_start + begin)
+        tensors[name] = tensor.view(info['shape'])
+    return tensors, mapping
+
+
+def assign_mmap_weights(model, weights_path):
+    """Point the model's parameters and buffers at memory-mapped tensors"""
+    import torch
+
+    tensors, mapping = read_safetensors_mmap(weights_path)
+    expected = model.state_dict()
+    for name, tensor in tensors.items():
+        if name not in expected:
+            continue
+        if tuple(expected[name].shape) != tuple(tensor.shape):
+            raise ValueError(f"Shape mismatch for {name}: {tuple(tensor.shape)} vs {tuple(expected[name].shape)}")
+        module_name, _, attribute = name.rpartition('.')
+        module = model.get_submodule(module_name)
+        if attribute in module._parameters:
+            module._parameters[attribute] = torch.nn.Parameter(tensor, requires_grad=False)
+        else:
+            module._buffers[attribute] = tensor
+
+    # Tied weights are stored once; re-tie the rest to the loaded tensors
+    model.tie_weights()
+    missing = [name for name in expected if name not in tensors and not _is_tied(model, name)]
+    missing += [name for name, tensor in model.state_dict().items()
+                if tensor.device.type == 'meta' and name not in missing]
+    if missing:
+        raise ValueError(f"Bundle weights are missing {len(missing)} tensors, e.g. {missing[:3]}")
+    return mapping
+
+
+def _is_tied(model, name):
+    tied = getattr(model, '_tied_weights_keys', None) or []
+    if isinstance(tied, dict):
+        tied = list(tied)
+    return any(name == key or name.endswith(key) for key in tied)
+
+
+def new_bundle_path(models_dir='models'):
+    return os.path.join(models_dir, f"{BUNDLE_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export a detector as a memory-mappable bundle')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export = subparsers.add_parser('export', help='write a new bundle to the models directory')
+    export.add_argument('--from', dest='source', help='pickled detector to convert (default: build from the hub)')
+    export.add_argument('--models-dir', default='models')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.source:
+        from model_loader import load_model
+        detector = load_model(args.source)
+    else:
+        from bert_detector import create_detector
+        detector = create_detector()
+    if detector is None:
+        sys.exit(1)
+
+    path = save_bundle(detector, new_bundle_path(args.models_dir))
+    print(f"✅ Bundle written to {path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,34 +6,52 @@ Standalone script to load and use the saved BERT fake news detection model.
 
 Usage:
     python model_loader.py "News Title" "News Article Text"
+    python model_loader.py score Fake.csv --output fake_scores.jsonl --workers 4
     
 Or import in your code:
     from model_loader import load_model, predict_news
-    detector = load_model("models/bert_fake_news_detector_YYYYMMDD_HHMMSS.pkl")
+    detector = load_model("models/bert_fake_news_detector_YYYYMMDD_HHMMSS")
     result = predict_news(detector, "Title", "Text")
+
+Models are bundle directories (see ``model_bundle.py``) or legacy ``.pkl`` files.
+The ``score`` subcommand streams a CSV/JSONL dump through a process pool
+(see ``bulk_scoring.py``).
 """
 
+import argparse
+import json
 import pickle
 import os
 import sys
 from typing import Dict, Any
 import re
-import torch
 
 # Import the standalone detector
 from bert_detector import BERTFakeNewsDetector
+from model_bundle import BUNDLE_PREFIX, is_bundle, load_bundle
 
 def load_model(model_path: str):
     """
-    Load the BERT fake news detection model from pickle file
+    Load the BERT fake news detection model from a bundle or pickle file
     
     Args:
-        model_path (str): Path to the pickle file
+        model_path (str): Path to the bundle directory or pickle file
         
     Returns:
         BERTFakeNewsDetector: Loaded model object
     """
+    if is_bundle(model_path):
+        try:
+            model = load_bundle(model_path)
+            print(f"✅ Model bundle loaded from {model_path}")
+            return model
+        except Exception as e:
+            print(f"❌ Error loading model bundle: {e}")
+            return None
+    
     try:
+        import torch
+        
         # Set device to CPU for loading
         device = torch.device('cpu')
         
@@ -84,33 +102,80 @@ def predict_news(model, title: str, text: str) -> Dict[str, Any]:
 
 def find_latest_model(models_dir: str = "models") -> str:
     """
-    Find the latest model file in the models directory
+    Find the latest model bundle or pickle file in the models directory
     
     Args:
         models_dir (str): Directory containing model files
         
     Returns:
-        str: Path to the latest model file
+        str: Path to the latest model; a bundle wins over a pickle with the same timestamp
     """
     if not os.path.exists(models_dir):
         return None
     
-    model_files = [f for f in os.listdir(models_dir) 
-                   if f.startswith("bert_fake_news_detector_") and f.endswith(".pkl")]
+    candidates = []
+    for name in os.listdir(models_dir):
+        if not name.startswith(BUNDLE_PREFIX):
+            continue
+        path = os.path.join(models_dir, name)
+        if is_bundle(path):
+            candidates.append((name, 1, path))
+        elif name.endswith(".pkl"):
+            candidates.append((name[:-len(".pkl")], 0, path))
     
-    if not model_files:
+    if not candidates:
         return None
     
-    # Sort by filename (which includes timestamp)
-    model_files.sort(reverse=True)
-    latest_model = os.path.join(models_dir, model_files[0])
+    # Sort by name (which includes timestamp), then bundles before pickles
+    return max(candidates)[2]
+
+def score_main(argv):
+    """``score`` subcommand: bulk-score a CSV or JSONL file"""
+    import bulk_scoring
+    
+    parser = argparse.ArgumentParser(
+        prog='model_loader.py score',
+        description='Stream a CSV/JSONL file of articles through the detector'
+    )
+    bulk_scoring.add_arguments(parser)
+    args = parser.parse_args(argv)
     
-    return latest_model
+    # Workers load the latest saved model, or build the hub models when there is none
+    model_path = args.model or find_latest_model()
+    try:
+        summary = bulk_scoring.score_file(
+            args.input, args.output,
+            output_format=args.output_format,
+            input_fmt=args.input_format,
+            model_path=model_path,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            batch_size=args.batch_size,
+            title_field=args.title_field,
+            text_field=args.text_field,
+            id_field=args.id_field,
+            label=args.label,
+            limit=args.limit,
+            resume=args.resume,
+            overwrite=args.overwrite,
+            progress_interval=args.progress_interval
+        )
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    
+    print(f"✅ Scored {summary['records']:,} articles into {summary['output']}")
+    print(json.dumps(summary))
 
 def main():
     """Main function for command line usage"""
+    if len(sys.argv) >= 2 and sys.argv[1] == 'score':
+        score_main(sys.argv[2:])
+        return
+    
     if len(sys.argv) != 3:
         print("Usage: python model_loader.py \"News Title\" \"News Article Text\"")
+        print("       python model_loader.py score INPUT --output OUTPUT [--format jsonl|parquet] [--resume]")
         sys.exit(1)
     
     title = sys.argv[1]
@@ -0,0 +1,76 @@
+"""
+Keyset Pagination
+=================
+Cursor-based paging for queries ordered newest first.
+
+Instead of ``OFFSET`` (which scans and discards every earlier row) each page
+continues from the last row seen, ``WHERE (created_at, id) < (:created_at, :id)``,
+so with an index on the sort column every page costs the same no matter how
+deep it is or how large the table has grown.
+"""
+
+from sqlalchemy import tuple_
+
+
+class KeysetPage:
+    """One page of rows plus the cursors to the neighbouring pages"""
+
+    def __init__(self, items, per_page, has_next, has_prev, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.total = total
+
+    @property
+    def next_after(self):
+        """Cursor for the next (older) page"""
+        return self.items[-1].id if self.has_next and self.items else None
+
+    @property
+    def prev_before(self):
+        """Cursor for the previous (newer) page"""
+        return self.items[0].id if self.has_prev and self.items else None
+
+
+def keyset_paginate(query, sort_column, id_column, per_page, after=None, before=None, with_total=False):
+    """Page through ``query`` in descending (sort_column, id_column) order.
+
+    ``after`` and ``before`` are model instances (the cursor rows): ``after``
+    returns the rows just older than it, ``before`` the rows just newer.
+    Ties on ``sort_column`` are broken by ``id_column`` so no row is skipped or
+    repeated. ``sort_column`` must not contain NULLs. The total row count is
+    only computed when ``with_total`` is set.
+    """
+    total = query.order_by(None).count() if with_total else None
+
+    if before is not None:
+        cursor_value, cursor_id = getattr(before, sort_column.key), getattr(before, id_column.key)
+        rows = (
+            query.filter(_after_cursor(sort_column, id_column, cursor_value, cursor_id))
+            .order_by(sort_column.asc(), id_column.asc())
+            .limit(per_page + 1)
+            .all()
+        )
+        has_prev = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        return KeysetPage(items, per_page, has_next=True, has_prev=has_prev, total=total)
+
+    if after is not None:
+        cursor_value, cursor_id = getattr(after, sort_column.key), getattr(after, id_column.key)
+        query = query.filter(_before_cursor(sort_column, id_column, cursor_value, cursor_id))
+
+    rows = query.order_by(sort_column.desc(), id_column.desc()).limit(per_page + 1).all()
+    return KeysetPage(rows[:per_page], per_page, has_next=len(rows) > per_page,
+                      has_prev=after is not None, total=total)
+
+
+def _before_cursor(sort_column, id_column, value, row_id):
+    """Rows that sort after the cursor in descending order (older rows)"""
+    # Row-value comparison lets SQLite and PostgreSQL seek the composite index
+    return tuple_(sort_column, id_column) < (value, row_id)
+
+
+def _after_cursor(sort_column, id_column, value, row_id):
+    """Rows that sort before the cursor in descending order (newer rows)"""
+    return tuple_(sort_column, id_column) > (value, row_id)
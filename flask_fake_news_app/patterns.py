@@ -0,0 +1,141 @@
+"""
+Suspicious Pattern Matching
+===========================
+Compiled multi-pattern matcher for the suspicious phrases in
+``config.SUSPICIOUS_PATTERNS``.
+
+Large phrase lists are compiled once into a single trie-shaped regular
+expression, so scanning a text costs one pass regardless of how many phrases
+there are. Short lists (the default configuration) are faster as a handful of
+C-level substring searches, so the matcher picks the strategy by list size.
+Either way a pattern is counted once if it occurs anywhere in the lowercased
+text, which matches the original ``pattern in text.lower()`` semantics,
+including phrases that overlap or contain one another.
+"""
+
+import re
+from bisect import bisect_right
+from functools import lru_cache
+
+# Joins texts in batch mode; patterns containing it are rejected
+BATCH_SEPARATOR = '\x00'
+
+# Below this many phrases, repeated substring searches beat the compiled regex
+SUBSTRING_SCAN_MAX_PATTERNS = 64
+
+
+class PatternMatcher:
+    """Single-pass matcher for a fixed set of lowercase phrases"""
+
+    def __init__(self, patterns, strategy=None):
+        self.patterns = tuple(dict.fromkeys(pattern.lower() for pattern in patterns if pattern))
+        if any(BATCH_SEPARATOR in pattern for pattern in self.patterns):
+            raise ValueError("Patterns may not contain NUL characters")
+
+        if strategy is None:
+            strategy = 'substring' if len(self.patterns) <= SUBSTRING_SCAN_MAX_PATTERNS else 'regex'
+        if strategy not in ('substring', 'regex'):
+            raise ValueError(f"Unknown matching strategy: {strategy}")
+        self.strategy = strategy
+
+        pattern_set = set(self.patterns)
+        # Every pattern that is a prefix of a longer one is matched at the same
+        # position, so the regex only needs to report the longest phrase there.
+        self._prefixes = {
+            pattern: tuple(pattern[:i] for i in range(1, len(pattern) + 1) if pattern[:i] in pattern_set)
+            for pattern in self.patterns
+        }
+        self._regex = None
+        if strategy == 'regex' and self.patterns:
+            self._regex = re.compile(_trie_regex(self.patterns))
+
+    def matched_patterns(self, text_lower):
+        """Set of patterns occurring in an already lowercased text"""
+        if self._regex is None:
+            return {pattern for pattern in self.patterns if pattern in text_lower}
+        matched = set()
+        for _, longest in self._scan(text_lower):
+            matched.update(self._prefixes[longest])
+        return matched
+
+    def _scan(self, text_lower):
+        """Yield (start, longest phrase) for every position where a phrase starts.
+        
+        The regex engine skips ahead to the next candidate position in C; after a
+        hit the search resumes one character later so overlapping phrases are found.
+        """
+        search = self._regex.search
+        match = search(text_lower)
+        while match is not None:
+            yield match.start(), match.group()
+            match = search(text_lower, match.start() + 1)
+
+    def features(self, text):
+        """Return (pattern_count, caps_ratio, exclamation_count) for one text"""
+        pattern_count = len(self.matched_patterns(text.lower()))
+        return (pattern_count, _caps_ratio(text), text.count('!'))
+
+    def features_batch(self, texts):
+        """Vectorized ``features``; the regex strategy scans all texts joined together once"""
+        if not texts:
+            return []
+        if self._regex is None:
+            return [self.features(text) for text in texts]
+
+        found_per_text = [set() for _ in texts]
+        # Lowercase before joining: lower() can change the length of some characters
+        lowered = [text.lower() for text in texts]
+        joined = BATCH_SEPARATOR.join(lowered)
+        # Start offset of each text inside the joined string
+        starts = []
+        offset = 0
+        for text in lowered:
+            starts.append(offset)
+            offset += len(text) + len(BATCH_SEPARATOR)
+
+        for start, longest in self._scan(joined):
+            found_per_text[bisect_right(starts, start) - 1].add(longest)
+
+        return [
+            (len(set().union(*(self._prefixes[longest] for longest in found))), _caps_ratio(text), text.count('!'))
+            for found, text in zip(found_per_text, texts)
+        ]
+
+
+@lru_cache(maxsize=8)
+def get_matcher(patterns):
+    """Shared matcher for a tuple of patterns, compiled on first use"""
+    return PatternMatcher(patterns)
+
+
+def _caps_ratio(text):
+    words = text.split()
+    return sum(map(str.isupper, words)) / len(words) if words else 0
+
+
+def _trie_regex(patterns):
+    """Compile phrases into a regex whose alternations share common prefixes"""
+    trie = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return _node_regex(trie)
+
+
+def _node_regex(node):
+    terminal = '' in node
+    branches = [re.escape(char) + _node_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+
+    if len(branches) == 1:
+        body = branches[0]
+    else:
+        body = f"(?:{'|'.join(branches)})"
+
+    if terminal:
+        # Greedy optional group prefers the longer phrase at this position
+        return f"(?:{body})?" if len(branches) > 1 or len(body) > 1 else f"{body}?"
+    return body
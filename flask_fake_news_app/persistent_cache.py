@@ -0,0 +1,159 @@
+"""
+Persistent Result Cache
+=======================
+On-disk cache of detector results shared by every gunicorn worker on a host.
+
+Results live in a small SQLite database (normally under the Flask
+``instance/`` folder) opened in WAL mode, so any number of worker processes
+can read concurrently while one of them writes. Entries are keyed by the
+article content hash and the detector's ``model_version``; the oldest
+entries are evicted once the table grows past ``max_entries``.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (key, model_version)
+);
+CREATE INDEX IF NOT EXISTS ix_results_created_at ON results (created_at);
+"""
+
+
+class PersistentResultCache:
+    """SQLite-WAL key-value store of prediction results"""
+
+    def __init__(self, path, max_entries=100000, ttl_seconds=7 * 24 * 3600, evict_every=500):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evict_every = evict_every
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self._puts_since_evict = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        # One connection per thread and per process: sqlite3 connections must
+        # not be shared across threads or inherited through fork.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('PRAGMA busy_timeout=5000')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key, model_version):
+        """Return the cached result, or None on a miss"""
+        try:
+            row = self._connection().execute(
+                'SELECT result, created_at FROM results WHERE key = ? AND model_version = ?',
+                (key, model_version)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._count_error(e)
+            return None
+
+        with self._counter_lock:
+            if row is None or (self.ttl_seconds and row[1] + self.ttl_seconds < time.time()):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, model_version, result):
+        self.put_many([(key, model_version, result)])
+
+    def put_many(self, entries, replace=True):
+        """Store (key, model_version, result) tuples in one transaction"""
+        if not entries:
+            return
+        verb = 'INSERT OR REPLACE' if replace else 'INSERT OR IGNORE'
+        now = time.time()
+        try:
+            connection = self._connection()
+            with connection:
+                connection.execute('BEGIN IMMEDIATE')
+                connection.executemany(
+                    f'{verb} INTO results (key, model_version, result, created_at) VALUES (?, ?, ?, ?)',
+                    [(key, model_version, json.dumps(result), now) for key, model_version, result in entries]
+                )
+        except sqlite3.Error as e:
+            self._count_error(e)
+            return
+
+        with self._counter_lock:
+            self._puts_since_evict += len(entries)
+            evict = self._puts_since_evict >= self.evict_every
+            if evict:
+                self._puts_since_evict = 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries and the oldest ones beyond max_entries"""
+        try:
+            connection = self._connection()
+            with connection:
+                connection.execute('BEGIN IMMEDIATE')
+                removed = 0
+                if self.ttl_seconds:
+                    removed += connection.execute(
+                        'DELETE FROM results WHERE created_at < ?', (time.time() - self.ttl_seconds,)
+                    ).rowcount
+                excess = connection.execute('SELECT COUNT(*) FROM results').fetchone()[0] - self.max_entries
+                if excess > 0:
+                    removed += connection.execute(
+                        'DELETE FROM results WHERE rowid IN '
+                        '(SELECT rowid FROM results ORDER BY created_at LIMIT ?)', (excess,)
+                    ).rowcount
+        except sqlite3.Error as e:
+            self._count_error(e)
+            return
+
+        with self._counter_lock:
+            self.evictions += removed
+
+    def _count_error(self, error):
+        with self._counter_lock:
+            self.errors += 1
+        logger.warning(f"Persistent cache error: {error}")
+
+    def stats(self):
+        try:
+            entries = self._connection().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        with self._counter_lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'errors': self.errors,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0
+            }
@@ -0,0 +1,108 @@
+"""
+Pre-fork Model Sharing
+======================
+Loads the detector once in the gunicorn master and shares it with every
+worker through copy-on-write, so N workers cost about one model in RAM.
+
+``gunicorn.conf.py`` drives it through three calls:
+
+- ``enable()`` before the app is imported: turns the garbage collector off in
+  the master, so loading does not leave freed holes across the pages that the
+  workers will share
+- ``prepare_master(app_module)`` before each fork: waits until the detector is
+  loaded and warm, freezes it (eval mode, no autograd), closes the master's
+  database connections and moves every live object into the collector's
+  permanent generation (``gc.freeze``). Worker collections then never write
+  to the inherited objects, which would copy their pages
+- ``init_worker()`` right after the fork: turns the collector back on and
+  gives torch the planned number of threads
+
+Pre-forking and lazy model loading (``LAZY_MODEL_LOADING``) do not work
+together: the master would have to hold every fork until the model is loaded.
+``wanted()`` therefore turns pre-forking off when lazy loading is set, and
+``prepare_master`` never waits for a lazily loading model; each worker then
+loads its own copy.
+
+Torch's OpenMP thread pool does not survive ``fork``: a worker forked after
+the master ran a multi-threaded op deadlocks on its first op. The master
+therefore keeps torch on one thread, warm-up included. Each worker sets its
+own thread count after the fork.
+"""
+
+import gc
+import logging
+import os
+
+from config import STARTUP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+active = False
+_prepared = False
+_worker_torch_threads = None
+
+
+def wanted():
+    """Whether pre-fork mode is requested (``PREFORK_MODEL``) and can be used"""
+    if os.environ.get('PREFORK_MODEL', 'true').lower() != 'true':
+        return False
+    if STARTUP_CONFIG['lazy_model_loading']:
+        logger.warning("⚠️ Pre-fork model sharing is off with LAZY_MODEL_LOADING=true; each worker loads its own model")
+        return False
+    return True
+
+
+def enable():
+    """Switch the current (master) process to pre-fork mode"""
+    global active
+    active = True
+    gc.disable()
+
+
+def defer_torch_threads(threads):
+    """Remember the torch thread count for the workers; the master uses one"""
+    global _worker_torch_threads
+    _worker_torch_threads = threads
+
+
+def freeze_detector(detector):
+    """Put the classifier in inference mode so nothing writes to its weights"""
+    pipeline = getattr(detector, 'classifier_pipeline', None)
+    model = getattr(pipeline, 'model', None)
+    if model is None:
+        return
+    model.eval()
+    for parameter in model.parameters():
+        parameter.requires_grad_(False)
+
+
+def prepare_master(app_module):
+    """Make the master's state ready to be shared by the workers forked next"""
+    global _prepared
+    lazy = STARTUP_CONFIG['lazy_model_loading']
+    if not _prepared and not lazy:
+        app_module.detector_loader.wait()
+        if app_module.detector is not None:
+            freeze_detector(app_module.detector)
+
+    # Connections must not be shared across processes; workers open their own
+    with app_module.app.app_context():
+        app_module.db.engine.dispose()
+
+    gc.collect()
+    gc.freeze()
+    if not _prepared:
+        _prepared = True
+        if lazy:
+            # Workers forked mid-load restart the load themselves (see startup.py)
+            logger.info("Pre-fork: forking without waiting for the lazily loaded model")
+        else:
+            logger.info(f"✅ Pre-fork: model loaded in the master, {gc.get_freeze_count()} objects frozen")
+
+
+def init_worker():
+    """Per-worker setup right after the fork"""
+    gc.enable()
+    if _worker_torch_threads:
+        import torch
+        torch.set_num_threads(_worker_torch_threads)
@@ -0,0 +1,319 @@
+"""
+On-demand Request Profiling
+===========================
+Profiles single requests in production without a debugger.
+
+A request is profiled when
+- it carries ``X-Profile: 1`` or ``?profile=1`` and comes from localhost or
+  presents the admin token (``X-Admin-Token``), or
+- it is picked by the configured sampling rate.
+
+The request then runs under cProfile, a wall-clock stack sampler and
+(if torch is loaded) the torch profiler. Each profile is a directory under
+``instance/profiles/``::
+
+    20240101T120000_analyze_news_3f2a9c/
+        meta.json       endpoint, trigger, status, duration, input length and
+                        per-stage timings (detector and request stages)
+        cprofile.prof   pstats file (snakeviz, ``python -m pstats``)
+        stacks.folded   folded stacks for flamegraph.pl or speedscope
+        torch.txt       torch operator table, slowest first
+
+Only one request is profiled at a time; others run normally meanwhile.
+"""
+
+import cProfile
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+# Set by reverse proxies: behind one, every client connects from localhost
+FORWARDED_HEADERS = ('X-Forwarded-For', 'X-Real-IP', 'Forwarded')
+PROFILE_FILES = ('meta.json', 'cprofile.prof', 'stacks.folded', 'torch.txt')
+PROFILE_ID_PATTERN = re.compile(r'^[0-9]{8}T[0-9]{6}_[A-Za-z0-9_]+_[0-9a-f]{6}$')
+
+_active = threading.local()
+
+
+class StackSampler:
+    """Samples one thread's Python stack on an interval into folded-stack counts"""
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def folded(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class ProfileSession:
+    """Collects stage timings for the request being profiled on this thread"""
+
+    def __init__(self):
+        self.stages = []
+
+    def add_stage(self, kind, name, seconds, **details):
+        self.stages.append(dict(kind=kind, stage=name, ms=round(seconds * 1000, 3), **details))
+
+
+class RequestProfiler:
+    """Decides which requests to profile and writes their profiles to disk"""
+
+    def __init__(self, directory, admin_token=None, sample_rate=0.0, torch_profiler=True,
+                 max_profiles=100, sample_interval=0.001):
+        self.directory = directory
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.torch_profiler = torch_profiler
+        self.max_profiles = max_profiles
+        self.sample_interval = sample_interval
+        # cProfile allows a single active profiler per process on newer Pythons
+        self._lock = threading.Lock()
+
+    def is_authorized(self, request):
+        """The admin token when one is configured, or a direct (not proxied) request from localhost"""
+        token = request.headers.get('X-Admin-Token', '')
+        if self.admin_token and hmac.compare_digest(token, self.admin_token):
+            return True
+        proxied = (any(header in request.headers for header in FORWARDED_HEADERS)
+                   or 'werkzeug.proxy_fix.orig' in request.environ)
+        return request.remote_addr in LOCAL_ADDRESSES and not proxied
+
+    def trigger(self, request):
+        """Why this request should be profiled ('header', 'query', 'sampled') or None"""
+        if request.headers.get('X-Profile') == '1' and self.is_authorized(request):
+            return 'header'
+        if request.args.get('profile') == '1' and self.is_authorized(request):
+            return 'query'
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def profile_view(self, view):
+        """Decorator for Flask views: profile the call when the request asks for it"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import g, request
+
+            trigger = self.trigger(request)
+            if trigger is None or not self._lock.acquire(blocking=False):
+                return view(*args, **kwargs)
+            try:
+                g.profiling = True
+                metadata = {
+                    'endpoint': request.endpoint,
+                    'method': request.method,
+                    'path': request.path,
+                    'trigger': trigger,
+                    'input': _input_size(request.get_json(silent=True))
+                }
+                with self._profile(request.endpoint, metadata) as session:
+                    response = view(*args, **kwargs)
+                    session.response = response
+                return response
+            finally:
+                g.profiling = False
+                self._lock.release()
+        return wrapper
+
+    def profile_call(self, label, func, *args, **kwargs):
+        """Profile one direct call, e.g. ``profile_call('predict', detector.predict, title, text)``"""
+        with self._lock:
+            metadata = {'endpoint': label, 'trigger': 'manual', 'input': {
+                'chars': sum(len(arg) for arg in args if isinstance(arg, str))
+            }}
+            with self._profile(label, metadata) as session:
+                session.response = func(*args, **kwargs)
+            return session.response
+
+    @contextmanager
+    def _profile(self, label, metadata):
+        session = ProfileSession()
+        session.response = None
+        profile_id = (
+            f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}_"
+            f"{re.sub(r'[^A-Za-z0-9_]', '_', label or 'call')}_{uuid.uuid4().hex[:6]}"
+        )
+        path = os.path.join(self.directory, profile_id)
+
+        profiler = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident(), self.sample_interval)
+        torch_profile = self._start_torch_profiler()
+        _active.session = session
+        sampler.start()
+        started = time.perf_counter()
+        profiler.enable()
+        error = None
+        try:
+            yield session
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - started
+            sampler.stop()
+            _active.session = None
+            torch_table = self._stop_torch_profiler(torch_profile)
+            try:
+                self._write(path, profiler, sampler, torch_table, dict(
+                    metadata,
+                    id=profile_id,
+                    created_at=datetime.utcnow().isoformat(),
+                    duration_ms=round(duration * 1000, 3),
+                    status=_status_of(session.response),
+                    error=str(error) if error else None,
+                    tokens=_token_count(session.response),
+                    stages=session.stages
+                ))
+                logger.info(f"🔬 Profile saved: {profile_id} ({duration * 1000:.1f} ms)")
+            except Exception as e:
+                logger.warning(f"⚠️ Could not save profile {profile_id}: {e}")
+
+    def _start_torch_profiler(self):
+        # Only when torch is already loaded: profiling must not import it
+        if not self.torch_profiler or 'torch' not in sys.modules:
+            return None
+        try:
+            import torch
+            torch_profile = torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU])
+            torch_profile.__enter__()
+            return torch_profile
+        except Exception as e:
+            logger.debug(f"torch profiler unavailable: {e}")
+            return None
+
+    def _stop_torch_profiler(self, torch_profile):
+        if torch_profile is None:
+            return None
+        try:
+            torch_profile.__exit__(None, None, None)
+            return torch_profile.key_averages().table(sort_by='self_cpu_time_total', row_limit=40)
+        except Exception as e:
+            logger.debug(f"torch profiler failed: {e}")
+            return None
+
+    def _write(self, path, profiler, sampler, torch_table, metadata):
+        os.makedirs(path, exist_ok=True)
+        profiler.dump_stats(os.path.join(path, 'cprofile.prof'))
+        with open(os.path.join(path, 'stacks.folded'), 'w', encoding='utf-8') as f:
+            f.write(sampler.folded())
+        if torch_table:
+            with open(os.path.join(path, 'torch.txt'), 'w', encoding='utf-8') as f:
+                f.write(torch_table)
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+        self._prune()
+
+    def _prune(self):
+        profiles = sorted(self._profile_ids())
+        for profile_id in profiles[:max(0, len(profiles) - self.max_profiles)]:
+            shutil.rmtree(os.path.join(self.directory, profile_id), ignore_errors=True)
+
+    def _profile_ids(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return [name for name in os.listdir(self.directory) if PROFILE_ID_PATTERN.match(name)]
+
+    def list_profiles(self):
+        """Metadata of the stored profiles, newest first"""
+        profiles = []
+        for profile_id in sorted(self._profile_ids(), reverse=True):
+            try:
+                with open(os.path.join(self.directory, profile_id, 'meta.json'), encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            meta['files'] = [
+                name for name in PROFILE_FILES if os.path.exists(os.path.join(self.directory, profile_id, name))
+            ]
+            profiles.append(meta)
+        return profiles
+
+    def file_path(self, profile_id, filename):
+        """Path of a stored profile file, or None if it is not a valid profile file"""
+        if not PROFILE_ID_PATTERN.match(profile_id) or filename not in PROFILE_FILES:
+            return None
+        path = os.path.join(self.directory, profile_id, filename)
+        return path if os.path.isfile(path) else None
+
+
+def observe_detector_stage(stage, seconds, articles):
+    """Detector stage observer: record timings of the profiled request"""
+    session = getattr(_active, 'session', None)
+    if session is not None:
+        session.add_stage('detector', stage, seconds, articles=articles)
+
+
+def observe_request_stage(endpoint, stage, seconds):
+    """Request stage listener (``metrics.add_stage_listener``)"""
+    session = getattr(_active, 'session', None)
+    if session is not None:
+        session.add_stage('request', stage, seconds)
+
+
+def _input_size(data):
+    """Article count and character lengths of an analyze request body"""
+    if not isinstance(data, dict):
+        return {}
+    articles = data['articles'] if isinstance(data.get('articles'), list) else [data]
+    articles = [article for article in articles if isinstance(article, dict)]
+    return {
+        'articles': len(articles),
+        'title_chars': sum(len(str(article.get('title') or '')) for article in articles),
+        'content_chars': sum(len(str(article.get('content') or '')) for article in articles)
+    }
+
+
+def _status_of(response):
+    # Flask views return a response or a (body, status[, headers]) tuple
+    if isinstance(response, tuple) and len(response) > 1 and isinstance(response[1], int):
+        return response[1]
+    return getattr(response, 'status_code', None)
+
+
+def _token_count(response):
+    """Token count of a single-article /analyze response, when present"""
+    body = response[0] if isinstance(response, tuple) else response
+    try:
+        data = body.get_json(silent=True)
+        return data['result']['analysis']['bert_features']['text_length']
+    except Exception:
+        return None
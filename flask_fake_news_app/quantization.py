@@ -0,0 +1,64 @@
+"""
+Classifier Precision
+====================
+Reduced-precision variants of the CPU classification model.
+
+- ``'fp32'`` the model as loaded
+- ``'int8'`` dynamic INT8 quantization of every ``nn.Linear``: weights are
+  stored as int8 and activations are quantized on the fly, which shrinks the
+  linear layers about 4x and speeds them up on CPUs with VNNI/AVX2
+- ``'bf16'`` bfloat16 weights and activations, only on CPUs with native
+  bf16 instructions (AVX512-BF16 or AMX); elsewhere it falls back to fp32
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ('fp32', 'int8', 'bf16')
+
+
+def cpu_supports_bf16():
+    """True if the CPU has native bfloat16 arithmetic"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return 'avx512_bf16' in flags or 'amx_bf16' in flags
+
+
+def convert_model(model, precision):
+    """Return (model, effective_precision) for a requested precision"""
+    import torch
+
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown model precision: {precision}")
+    if precision == 'int8':
+        engines = torch.backends.quantized.supported_engines
+        for engine in ('x86', 'fbgemm', 'qnnpack'):
+            if engine in engines:
+                torch.backends.quantized.engine = engine
+                break
+        quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return quantized.eval(), 'int8'
+    if precision == 'bf16':
+        if not cpu_supports_bf16():
+            logger.warning("⚠️ CPU has no native bf16 support, keeping fp32")
+            return model, 'fp32'
+        return model.to(torch.bfloat16).eval(), 'bf16'
+    return model, 'fp32'
+
+
+def model_size_bytes(model):
+    """Bytes held by a model's weights, including packed quantized weights"""
+    return sum(_tensor_bytes(value) for value in model.state_dict().values())
+
+
+def _tensor_bytes(value):
+    # Quantized linear layers store their weights as a (weight, bias) tuple
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(item) for item in value)
+    if hasattr(value, 'element_size'):
+        return value.numel() * value.element_size()
+    return 0
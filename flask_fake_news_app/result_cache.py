@@ -0,0 +1,97 @@
+"""
+Prediction Result Cache
+=======================
+Bounded in-process cache of detector results keyed by a hash of the article.
+
+Entries expire after a TTL, the least recently used entry is evicted when
+the cache is full, and every entry is tagged with the detector's
+``model_version`` so results from a previous model are never served.
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def content_key(title, content):
+    """Content hash of an article.
+
+    Only differences that cannot change a prediction are normalized away
+    (surrounding whitespace and line-ending style); case and inner spacing
+    affect the pattern analysis, so they are kept.
+    """
+    normalized = '\x1f'.join(
+        part.strip().replace('\r\n', '\n') for part in (title, content)
+    )
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Thread-safe LRU cache with per-entry TTL and model-version tags"""
+
+    def __init__(self, max_entries=10000, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, model_version):
+        """Return a copy of the cached result, or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            result, version, expires_at = entry
+            if version != model_version:
+                del self._entries[key]
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(result)
+
+    def put(self, key, model_version, result):
+        """Store a result, evicting the least recently used entries if full"""
+        entry = (copy.deepcopy(result), model_version, time.monotonic() + self.ttl_seconds)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0
+            }
@@ -0,0 +1,112 @@
+"""
+Startup Helpers
+===============
+Per-phase startup timing and background loading of the detector.
+
+``BackgroundLoader`` runs a slow load function (building the detector) on a
+daemon thread so the web layer can bind and answer liveness checks
+immediately. Threads do not survive ``fork``: when a pre-forking server such
+as ``gunicorn --preload`` forks while the load is still running, each child
+restarts the load itself. A load that already finished before the fork is
+shared copy-on-write.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class ModelNotReadyError(Exception):
+    """Raised when a request needs the detector before it finished loading"""
+
+
+class StartupTimer:
+    """Records and logs how long each startup phase takes"""
+
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        self.phases[name] = round(seconds, 3)
+        logger.info(f"⏱️ Startup phase '{name}': {seconds:.2f}s")
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def summary(self):
+        return dict(self.phases, total=round(self.elapsed(), 3))
+
+
+class BackgroundLoader:
+    """Runs ``load_callback`` once on a background thread and tracks its state"""
+
+    PENDING, LOADING, READY, FAILED = 'pending', 'loading', 'ready', 'failed'
+
+    def __init__(self, load_callback, name='model-loader'):
+        self.load_callback = load_callback
+        self.name = name
+        self.state = self.PENDING
+        self.error = None
+        self.load_seconds = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    @property
+    def ready(self):
+        return self.state == self.READY
+
+    def start(self):
+        """Start loading unless a load is running or already finished"""
+        with self._lock:
+            if self.state != self.PENDING:
+                return
+            self.state = self.LOADING
+        threading.Thread(target=self._run, name=self.name, daemon=True).start()
+
+    def wait(self, timeout=None):
+        """Block until the load finished; True if it succeeded"""
+        self._done.wait(timeout)
+        return self.ready
+
+    def status(self):
+        return {
+            'state': self.state,
+            'load_seconds': self.load_seconds,
+            'error': str(self.error) if self.error else None
+        }
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            self.load_callback()
+            self.state = self.READY
+        except Exception as e:
+            logger.error(f"❌ Background load failed: {e}")
+            self.error = e
+            self.state = self.FAILED
+        finally:
+            self.load_seconds = round(time.perf_counter() - start, 3)
+            self._done.set()
+
+    def _after_fork(self):
+        # The loading thread stayed behind in the parent process
+        self._lock = threading.Lock()
+        if self.state == self.LOADING:
+            self.state = self.PENDING
+            self._done = threading.Event()
+            self.start()
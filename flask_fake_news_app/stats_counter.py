@@ -0,0 +1,107 @@
+"""
+Buffered System Statistics
+==========================
+Keeps the analysis counters in memory and periodically adds them to the
+``SystemStats`` row, instead of reading, incrementing and committing that
+single row inside every ``/analyze`` transaction.
+
+Each worker process owns its own accumulator (a shard). Flushes apply the
+pending deltas with ``SET total = total + :delta`` so increments from
+several workers never overwrite each other.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class StatsAccumulator:
+    """Per-process counters flushed to the database on an interval"""
+
+    def __init__(self, flush_callback, flush_interval=5.0):
+        self.flush_callback = flush_callback
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._reset()
+
+        self._flusher = None
+        self._flusher_pid = None
+        self._stop = threading.Event()
+        atexit.register(self.flush)
+
+    def _reset(self):
+        self.total = 0
+        self.fake = 0
+        self.real = 0
+        self.last_updated = None
+
+    def record(self, predictions):
+        """Count a list of 'Fake'/'Real' predictions"""
+        if not predictions:
+            return
+        fake_count = sum(1 for prediction in predictions if prediction == 'Fake')
+        with self._lock:
+            self.total += len(predictions)
+            self.fake += fake_count
+            self.real += len(predictions) - fake_count
+            self.last_updated = datetime.utcnow()
+        
+        if self.flush_interval <= 0:
+            # Write-through mode
+            self.flush()
+        else:
+            self._ensure_flusher()
+
+    def pending(self):
+        """Counts recorded in this process but not yet flushed"""
+        with self._lock:
+            return {
+                'total_analyses': self.total,
+                'fake_detected': self.fake,
+                'real_detected': self.real,
+                'last_updated': self.last_updated
+            }
+
+    def flush(self):
+        """Hand pending deltas to the flush callback; keep them if it fails.
+
+        The counters stay visible in ``pending()`` until the callback has
+        committed them, so readers never see a total that is in neither place.
+        """
+        with self._flush_lock:
+            deltas = self.pending()
+            if not deltas['total_analyses']:
+                return
+
+            try:
+                self.flush_callback(deltas)
+            except Exception as e:
+                logger.warning(f"Stats flush failed, will retry: {e}")
+                return
+            
+            with self._lock:
+                self.total -= deltas['total_analyses']
+                self.fake -= deltas['fake_detected']
+                self.real -= deltas['real_detected']
+                if not self.total:
+                    self.last_updated = None
+
+    def _ensure_flusher(self):
+        # Threads do not survive fork, so start one flusher per process
+        if self._flusher is not None and self._flusher_pid == os.getpid() and self._flusher.is_alive():
+            return
+        with self._start_lock:
+            if self._flusher is None or self._flusher_pid != os.getpid() or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._run, name='stats-flusher', daemon=True)
+                self._flusher_pid = os.getpid()
+                self._flusher.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
@@ -9,8 +9,14 @@ import requests
 import time
 import subprocess
 import signal
+import tempfile
 from threading import Thread
 
+# The app checks below write analyses; keep them out of the real database
+os.environ.setdefault(
+    'DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='fake_news_test_'), 'test.sqlite')
+)
+
 def test_model_loading():
     """Test if the model can be loaded directly"""
     print("🧪 Testing Model Loading...")
@@ -46,6 +52,350 @@ def test_model_loading():
         print(f"❌ Model loading test failed: {e}")
         return False
 
+def test_batch_prediction():
+    """Test that batched prediction matches single-article prediction"""
+    print("\n🧪 Testing Batch Prediction...")
+    try:
+        from bert_detector import create_detector
+        
+        detector = create_detector()
+        titles = ["Test News", "SHOCKING: Miracle Cure Revealed!"]
+        texts = [
+            "This is a test article for verification.",
+            "URGENT: Big Pharma doesn't want you to know about this secret!"
+        ]
+        
+        batch_results = detector.predict_batch(titles, texts, batch_size=2)
+        single_results = [detector.predict(title, text) for title, text in zip(titles, texts)]
+        
+        for batch_result, single_result in zip(batch_results, single_results):
+            if batch_result['prediction'] != single_result['prediction'] or \
+                    abs(batch_result['fake_probability'] - single_result['fake_probability']) > 1e-6:
+                print("❌ Batch result differs from single prediction")
+                return False
+        
+        print(f"✅ Batch prediction matches single prediction for {len(titles)} articles")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Batch prediction test failed: {e}")
+        return False
+
+class _StubDetector:
+    """Pattern-free detector that echoes each title and can hold its callers"""
+    model_version = 'stub'
+
+    def __init__(self, delay=0.0):
+        import threading
+        self.delay = delay
+        self.batch_sizes = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def predict_batch(self, titles, texts, batch_size=16):
+        self.batch_sizes.append(len(titles))
+        self.started.set()
+        self.release.wait()
+        time.sleep(self.delay)
+        return [dict(SAMPLE_RESULT, title=title) for title in titles]
+
+    def predict(self, title, text):
+        return self.predict_batch([title], [text])[0]
+
+def _wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def test_micro_batching():
+    """Test that concurrent callers get their own results and a full queue answers 503"""
+    print("\n🧪 Testing Micro-Batching...")
+    import app as flask_app
+    shared_batcher = flask_app.micro_batcher
+    shared_detector = flask_app.detector
+    try:
+        from batching import MicroBatcher, QueueFullError
+        
+        detector = _StubDetector(delay=0.01)
+        batcher = MicroBatcher(detector, max_batch_size=4, max_wait_ms=50, max_queue_size=64)
+        results = {}
+        def call(i):
+            results[i] = batcher.submit(f"Article {i}", f"Body of article {i}", timeout=10)
+        threads = [Thread(target=call, args=(i,)) for i in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if sorted(results) != list(range(12)) or \
+                any(result['title'] != f"Article {i}" for i, result in results.items()):
+            print("❌ A caller received another request's result")
+            return False
+        if sum(detector.batch_sizes) != 12 or max(detector.batch_sizes) > 4 or max(detector.batch_sizes) < 2:
+            print(f"❌ Unexpected batch sizes {detector.batch_sizes} (max 4)")
+            return False
+        
+        # A lone request is released once the wait window closes
+        started = time.perf_counter()
+        batcher.submit("Alone", "Single queued article", timeout=10)
+        waited = time.perf_counter() - started
+        if detector.batch_sizes[-1] != 1 or waited > 1.0:
+            print(f"❌ A lone request waited {waited:.3f}s in a batch of {detector.batch_sizes[-1]}")
+            return False
+        
+        # One request in the detector, one waiting: the next one is rejected
+        blocked = _StubDetector()
+        blocked.release.clear()
+        batcher = MicroBatcher(blocked, max_batch_size=1, max_wait_ms=0, max_queue_size=1)
+        holders = [Thread(target=batcher.submit, args=(f"Held {i}", "Held article", 10)) for i in range(2)]
+        holders[0].start()
+        blocked.started.wait(5)
+        holders[1].start()
+        if not _wait_until(lambda: batcher.metrics()['queue_depth'] == 1):
+            print("❌ The second request was never queued")
+            return False
+        try:
+            batcher.submit("Overflow", "Rejected article", timeout=10)
+            print("❌ A full queue accepted another request")
+            return False
+        except QueueFullError:
+            pass
+        
+        flask_app.detector_loader.wait()
+        flask_app.detector = blocked
+        flask_app.micro_batcher = batcher
+        response = flask_app.app.test_client().post('/analyze', json={
+            'title': "Overflow", 'content': f"Rejected article {time.time()}"
+        })
+        blocked.release.set()
+        for holder in holders:
+            holder.join()
+        if response.status_code != 503 or 'Retry-After' not in response.headers:
+            print(f"❌ /analyze answered {response.status_code} with a full micro-batch queue")
+            return False
+        if batcher.rejected != 2:
+            print(f"❌ Expected 2 rejections, counted {batcher.rejected}")
+            return False
+        
+        print(f"✅ 12 concurrent callers in batches of {detector.batch_sizes[:-1]}, full queue answered 503")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Micro-batching test failed: {e}")
+        return False
+    finally:
+        flask_app.micro_batcher = shared_batcher
+        flask_app.detector = shared_detector
+
+def test_long_document_windows():
+    """Test window selection, aggregation and token features in long-document mode"""
+    print("\n🧪 Testing Long-Document Windows...")
+    try:
+        import math
+        from bert_detector import spread_windows, aggregate_window_scores
+        from benchmarks.common import WORDS, tiny_detector
+
+        if spread_windows(5, 8) != [0, 1, 2, 3, 4] or spread_windows(10, 1) != [0] or \
+                spread_windows(9, 3) != [0, 4, 8] or spread_windows(10, 4) != [0, 3, 6, 9]:
+            print("❌ spread_windows does not spread windows evenly from first to last")
+            return False
+
+        scores = [0.2, 0.5, 0.35]
+        weights = [math.exp((score - 0.5) / 0.1) for score in scores]
+        attention = sum(w * s for w, s in zip(weights, scores)) / sum(weights)
+        if aggregate_window_scores(scores, 'max') != 0.5 or \
+                abs(aggregate_window_scores(scores, 'mean') - 0.35) > 1e-9 or \
+                abs(aggregate_window_scores(scores, 'attention', 0.1) - attention) > 1e-9:
+            print("❌ Window scores are aggregated incorrectly")
+            return False
+        try:
+            aggregate_window_scores(scores, 'median')
+            print("❌ An unknown aggregation was accepted")
+            return False
+        except ValueError:
+            pass
+
+        detector = tiny_detector()
+        tokenizer = detector.classifier_pipeline.tokenizer
+        title = "Long article"
+        texts = [' '.join(WORDS[i % len(WORDS)] for i in range(n)) for n in (10, 300)]
+        window_length, stride, max_windows = 32, 8, 3
+        for aggregation in ('max', 'mean', 'attention'):
+            detector.set_long_document(True, window_length=window_length, stride=stride,
+                                       max_windows=max_windows, aggregation=aggregation)
+            for text in texts:
+                combined = f"{title} [SEP] {text}"
+                ids = tokenizer(combined, add_special_tokens=True)['input_ids']
+                total = len(tokenizer(combined, add_special_tokens=True, max_length=window_length,
+                                      stride=stride, truncation=True,
+                                      return_overflowing_tokens=True)['input_ids'])
+                analysis = detector.predict(title, text)['analysis']
+
+                # The article rebuilt from its windows has every token exactly once
+                features = analysis['bert_features']
+                if features['text_length'] != len(ids) or \
+                        abs(features['token_diversity'] - len(set(ids)) / len(ids)) > 1e-9:
+                    print(f"❌ Rebuilt {features} from {total} windows, expected {len(ids)} tokens")
+                    return False
+
+                windows = analysis['windows']
+                indices = [window['window'] for window in windows['scores']]
+                if windows['total'] != total or indices != spread_windows(total, max_windows) or \
+                        windows['scored'] != len(indices) or windows['aggregation'] != aggregation:
+                    print(f"❌ Unexpected windows {windows} for {total} windows")
+                    return False
+                window_scores = [window['score'] for window in windows['scores']]
+                expected = aggregate_window_scores(window_scores, aggregation)
+                if abs(analysis['pipeline_score'] - expected) > 1e-9:
+                    print(f"❌ {aggregation} pipeline score {analysis['pipeline_score']} != {expected}")
+                    return False
+        if total <= max_windows:
+            print("❌ The long article should have more windows than are scored")
+            return False
+
+        print(f"✅ {total} windows of the long article, {max_windows} scored under each aggregation")
+        return True
+
+    except Exception as e:
+        print(f"❌ Long-document windows test failed: {e}")
+        return False
+
+def test_pattern_matcher():
+    """Test that the compiled pattern matcher counts like a plain substring scan"""
+    print("\n🧪 Testing Pattern Matcher...")
+    try:
+        import random
+        from config import SUSPICIOUS_PATTERNS
+        from patterns import PatternMatcher, SUBSTRING_SCAN_MAX_PATTERNS
+
+        rng = random.Random(4)
+        alphabet = 'abcdefgh !'
+        # Overlapping and nested phrases push the list past the substring-scan limit
+        patterns = list(SUSPICIOUS_PATTERNS) + [
+            ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 6)))
+            for _ in range(2 * SUBSTRING_SCAN_MAX_PATTERNS)
+        ]
+        matcher = PatternMatcher(patterns)
+        if matcher.strategy != 'regex':
+            print(f"❌ {len(matcher.patterns)} patterns should use the trie regex, got {matcher.strategy}")
+            return False
+
+        texts = []
+        for _ in range(500):
+            words = [rng.choice(patterns).upper() if rng.random() < 0.2 else
+                     ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 12)))
+                     for _ in range(rng.randint(0, 30))]
+            texts.append(' '.join(words))
+
+        expected = [sum(1 for pattern in matcher.patterns if pattern in text.lower()) for text in texts]
+        single = [matcher.features(text)[0] for text in texts]
+        batch = [features[0] for features in matcher.features_batch(texts)]
+        if single != expected or batch != expected:
+            print("❌ Pattern counts differ from the substring scan")
+            return False
+
+        print(f"✅ Trie matcher matches the substring scan on {len(texts)} texts ({len(matcher.patterns)} patterns)")
+        return True
+
+    except Exception as e:
+        print(f"❌ Pattern matcher test failed: {e}")
+        return False
+
+SAMPLE_RESULT = {
+    'prediction': 'Fake',
+    'confidence': 0.42,
+    'fake_probability': 0.71,
+    'real_probability': 0.29,
+    'analysis': {
+        'suspicion_patterns': 0.6,
+        'pipeline_score': 0.5,
+        'bert_features': {'token_diversity': 0.8, 'text_length': 12}
+    },
+    'method': 'Enhanced BERT-based Analysis'
+}
+
+def test_result_cache():
+    """Test that a cache hit returns the stored result unchanged"""
+    print("\n🧪 Testing Result Cache...")
+    try:
+        from result_cache import ResultCache, content_key
+
+        cache = ResultCache(max_entries=10, ttl_seconds=60)
+        key = content_key("Test News", "This is a test article for verification.")
+        if content_key("  Test News ", "This is a test article for verification.\r\n") != key:
+            print("❌ Surrounding whitespace changed the cache key")
+            return False
+        if cache.get(key, 'v1') is not None:
+            print("❌ Empty cache returned a result")
+            return False
+
+        cache.put(key, 'v1', SAMPLE_RESULT)
+        hit = cache.get(key, 'v1')
+        if hit != SAMPLE_RESULT:
+            print("❌ Cache hit differs from the stored result")
+            return False
+        # Callers may modify what they get back
+        hit['analysis']['pipeline_score'] = 0.0
+        if cache.get(key, 'v1') != SAMPLE_RESULT:
+            print("❌ Modifying a cache hit changed the cached result")
+            return False
+
+        stats = cache.stats()
+        print(f"✅ Cache hit returns the stored result (hits: {stats['hits']}, misses: {stats['misses']})")
+        return True
+
+    except Exception as e:
+        print(f"❌ Result cache test failed: {e}")
+        return False
+
+def test_cache_invalidation():
+    """Test that caches stop serving results once the model version changes"""
+    print("\n🧪 Testing Cache Invalidation...")
+    try:
+        from bert_detector import BERTFakeNewsDetector
+        from config import SUSPICIOUS_PATTERNS
+        from persistent_cache import PersistentResultCache
+        from result_cache import ResultCache, content_key
+
+        # Editing the pattern list must change the version results are stored under
+        old_detector = BERTFakeNewsDetector.from_components('test-model', None, None, SUSPICIOUS_PATTERNS)
+        new_detector = BERTFakeNewsDetector.from_components(
+            'test-model', None, None, list(SUSPICIOUS_PATTERNS) + ['new suspicious phrase']
+        )
+        old_version, new_version = old_detector.model_version, new_detector.model_version
+        if old_version == new_version:
+            print("❌ Changing the suspicious patterns kept the same model_version")
+            return False
+
+        key = content_key("Test News", "This is a test article for verification.")
+        memory = ResultCache()
+        memory.put(key, old_version, SAMPLE_RESULT)
+        if memory.get(key, new_version) is not None or memory.get(key, old_version) is not None:
+            print("❌ In-memory cache served a result of another model version")
+            return False
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.sqlite')
+            PersistentResultCache(path).put(key, old_version, SAMPLE_RESULT)
+            # A restarted worker opens the same file
+            disk = PersistentResultCache(path)
+            if disk.get(key, old_version) != SAMPLE_RESULT:
+                print("❌ Persistent cache lost a result across instances")
+                return False
+            if disk.get(key, new_version) is not None:
+                print("❌ Persistent cache served a result of another model version")
+                return False
+
+        print("✅ Both caches miss after a model_version change")
+        return True
+
+    except Exception as e:
+        print(f"❌ Cache invalidation test failed: {e}")
+        return False
+
 def test_flask_import():
     """Test if Flask app can be imported without errors"""
     print("\n🧪 Testing Flask App Import...")
@@ -60,6 +410,40 @@ def test_flask_import():
         print(f"❌ Flask app import failed: {e}")
         return False
 
+def test_torch_free_import():
+    """Test that importing the app leaves torch to the model load"""
+    print("\n🧪 Testing Torch-free App Import...")
+    # A fresh interpreter with the background model load held back, so only
+    # the import itself can bring torch in
+    script = '''
+import os, sys, time
+import startup
+startup.BackgroundLoader.start = lambda self: None
+started = time.perf_counter()
+import app
+print('torch' in sys.modules, round(time.perf_counter() - started, 2), flush=True)
+os._exit(0)
+'''
+    try:
+        result = subprocess.run(
+            [sys.executable, '-c', script], capture_output=True, text=True, timeout=120,
+            cwd=os.path.dirname(os.path.abspath(__file__)), env=dict(os.environ, LAZY_MODEL_LOADING='true')
+        )
+        lines = result.stdout.split()
+        if result.returncode != 0 or len(lines) != 2:
+            print(f"❌ App import failed: {result.stderr.strip()[-500:]}")
+            return False
+        torch_loaded, seconds = lines
+        if torch_loaded != 'False':
+            print("❌ Importing the app imported torch")
+            return False
+        print(f"✅ App imported in {seconds}s without torch")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Torch-free import test failed: {e}")
+        return False
+
 def test_flask_routes():
     """Test Flask routes by starting server briefly"""
     print("\n🧪 Testing Flask Routes...")
@@ -72,7 +456,7 @@ def test_flask_routes():
             print("✅ Flask app context created successfully!")
             
             # Test database
-            from app import db, NewsAnalysis, SystemStats
+            from app import SystemStats
             try:
                 stats = SystemStats.query.first()
                 print("✅ Database connection successful!")
@@ -85,6 +469,783 @@ def test_flask_routes():
         print(f"❌ Flask routes test failed: {e}")
         return False
 
+def test_stats_flush():
+    """Test that buffered counters reach SystemStats and /api/stats on a flush"""
+    print("\n🧪 Testing Statistics Flush...")
+    # A fresh database reports that nothing was analyzed yet
+    script = '''
+import json
+import startup
+startup.BackgroundLoader.start = lambda self: None
+import app
+print(json.dumps(app.app.test_client().get('/api/stats').get_json()))
+'''
+    try:
+        import json
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='fake_news_test_'), 'fresh.sqlite')}"
+        result = subprocess.run(
+            [sys.executable, '-c', script], capture_output=True, text=True, timeout=120,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=dict(os.environ, DATABASE_URL=database_url, LAZY_MODEL_LOADING='true', JOBS='false')
+        )
+        if result.returncode != 0:
+            print(f"❌ Child process failed: {result.stderr.strip()[-500:]}")
+            return False
+        fresh = json.loads(result.stdout.strip().splitlines()[-1])
+        if fresh.get('accuracy_note') != 'No analyses performed yet' or fresh['total_analyses'] != 0:
+            print(f"❌ Fresh database /api/stats: {fresh}")
+            return False
+        
+        import app as flask_app
+        
+        client = flask_app.app.test_client()
+        accumulator = flask_app.stats_accumulator
+        accumulator.flush()
+        before = client.get('/api/stats').get_json()
+        
+        accumulator.record(['Fake', 'Real', 'Fake'])
+        buffered = client.get('/api/stats').get_json()
+        if buffered['total_analyses'] != before['total_analyses'] + 3:
+            print("❌ /api/stats does not include counts that are not flushed yet")
+            return False
+        
+        accumulator.flush()
+        if accumulator.pending()['total_analyses']:
+            print("❌ Counts are still pending after a flush")
+            return False
+        after = client.get('/api/stats').get_json()
+        with flask_app.app.app_context():
+            stored = flask_app.SystemStats.query.first()
+            stored = (stored.total_analyses, stored.fake_detected, stored.real_detected)
+        expected = (before['total_analyses'] + 3, before['fake_detected'] + 2, before['real_detected'] + 1)
+        if stored != expected or (after['total_analyses'], after['fake_detected'], after['real_detected']) != expected:
+            print(f"❌ Expected totals {expected}, stored {stored}")
+            return False
+        
+        # Counts stay pending until the callback commits them, and a failed
+        # flush keeps them for the next one
+        from stats_counter import StatsAccumulator
+        seen_during_flush = []
+        def failing_flush(deltas):
+            seen_during_flush.append(local.pending()['total_analyses'])
+            raise RuntimeError('database unavailable')
+        local = StatsAccumulator(failing_flush, flush_interval=3600)
+        local.record(['Fake', 'Real'])
+        local.flush()
+        if seen_during_flush != [2] or local.pending()['total_analyses'] != 2:
+            print(f"❌ Pending counts during/after a failed flush: {seen_during_flush}, {local.pending()}")
+            return False
+        local.flush_callback = lambda deltas: local.record(['Real'])
+        local.flush()
+        pending = local.pending()
+        if (pending['total_analyses'], pending['real_detected']) != (1, 1):
+            print(f"❌ A count recorded during a flush was lost: {pending}")
+            return False
+
+        print(f"✅ Flushed totals: {after['total_analyses']} analyses, {after['fake_detected']} fake, "
+              f"{after['real_detected']} real")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Statistics flush test failed: {e}")
+        return False
+
+def test_write_behind():
+    """Test that queued analyses appear in /api/history and /api/stats once flushed"""
+    print("\n🧪 Testing Write-Behind Inserts...")
+    import app as flask_app
+    from stats_counter import StatsAccumulator
+    shared_accumulator = flask_app.stats_accumulator
+    try:
+        from write_behind import AnalysisWriter
+        
+        client = flask_app.app.test_client()
+        # Own counters, so the periodic flush of earlier activity cannot race the checks
+        accumulator = StatsAccumulator(flask_app._flush_stats, flush_interval=3600)
+        flask_app.stats_accumulator = accumulator
+        writer = AnalysisWriter(flask_app._insert_analyses, flush_interval=2.0)
+        with flask_app.app.app_context():
+            rows = [
+                flask_app._analysis_values(f"Queued article {i}", "Queued article content.", SAMPLE_RESULT)
+                for i in range(3)
+            ]
+        
+        writer.submit(rows)
+        history_uids = lambda: {analysis['uid'] for analysis in client.get('/api/history?per_page=10').get_json()['analyses']}
+        uids = {row['uid'] for row in rows}
+        if uids & history_uids() or accumulator.pending()['total_analyses']:
+            print("❌ Queued rows were visible or counted before the flush")
+            return False
+        
+        writer.flush()
+        if not uids <= history_uids():
+            print("❌ Flushed rows are missing from /api/history")
+            return False
+        if accumulator.pending()['total_analyses'] != len(rows):
+            print("❌ Flushed rows were not counted in the statistics")
+            return False
+        
+        # A duplicate uid fails the insert: nothing may be counted for it
+        writer.submit([dict(rows[0], title="Duplicate")])
+        writer.flush()
+        if writer.stats()['failed'] != 1 or accumulator.pending()['total_analyses'] != len(rows):
+            print("❌ A failed insert was counted in the statistics")
+            return False
+        accumulator.flush()
+        writer.close()
+        
+        print(f"✅ {len(rows)} queued rows visible and counted after the flush, failed insert not counted")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Write-behind test failed: {e}")
+        return False
+    finally:
+        flask_app.stats_accumulator = shared_accumulator
+
+def test_write_behind_shutdown():
+    """Test that rows still queued at exit are written and counted"""
+    print("\n🧪 Testing Write-Behind Shutdown...")
+    # The writer holds the rows for its (long) flush interval when the process exits
+    script = '''
+import json, sys
+from types import SimpleNamespace
+import startup
+startup.BackgroundLoader.start = lambda self: None
+import app
+app.detector = SimpleNamespace(model_version='shutdown-test')
+result = json.loads(sys.argv[1])
+app.analysis_writer.submit([
+    app._analysis_values(f"Shutdown article {i}", "Queued when the process exits.", result) for i in range(5)
+])
+'''
+    try:
+        import json
+        from sqlalchemy import create_engine, text
+        
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='fake_news_test_'), 'shutdown.sqlite')}"
+        result = subprocess.run(
+            [sys.executable, '-c', script, json.dumps(SAMPLE_RESULT)], capture_output=True, text=True, timeout=120,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=dict(os.environ, DATABASE_URL=database_url, LAZY_MODEL_LOADING='true', JOBS='false',
+                     WRITE_BEHIND='true', WRITE_BEHIND_FLUSH_INTERVAL='100', STATS_FLUSH_INTERVAL='100')
+        )
+        if result.returncode != 0:
+            print(f"❌ Child process failed: {result.stderr.strip()[-500:]}")
+            return False
+        
+        engine = create_engine(database_url)
+        with engine.connect() as connection:
+            written = connection.execute(
+                text("SELECT COUNT(*) FROM news_analysis WHERE model_version = 'shutdown-test'")
+            ).scalar()
+            counted = connection.execute(text("SELECT total_analyses, fake_detected FROM system_stats")).first()
+        engine.dispose()
+        if written != 5:
+            print(f"❌ Only {written} of 5 queued rows were written at exit")
+            return False
+        if counted is None or tuple(counted) != (5, 5):
+            print(f"❌ Rows written at exit were not counted: {counted}")
+            return False
+        
+        print("✅ 5 rows queued at exit were written and counted")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Write-behind shutdown test failed: {e}")
+        return False
+
+def test_history_pagination():
+    """Test that keyset cursors page through /api/history in ?page= order"""
+    print("\n🧪 Testing History Pagination...")
+    try:
+        from datetime import datetime, timedelta
+        import app as flask_app
+        
+        client = flask_app.app.test_client()
+        with flask_app.app.app_context():
+            base = datetime.utcnow() - timedelta(days=1)
+            rows = []
+            for i in range(23):
+                result = dict(SAMPLE_RESULT, prediction='Real') if i % 3 == 0 else SAMPLE_RESULT
+                row = flask_app._analysis_values(f"History article {i}", "History article content.", result)
+                # Groups of three share a timestamp: only the id orders them
+                row['created_at'] = base + timedelta(seconds=i // 3)
+                rows.append(row)
+            flask_app.db.session.execute(flask_app.db.insert(flask_app.NewsAnalysis), rows)
+            flask_app.db.session.commit()
+        
+        per_page = 7
+        first = client.get(f'/api/history?page=1&per_page={per_page}').get_json()
+        offset_pages = [[analysis['id'] for analysis in first['analyses']]]
+        for page in range(2, first['pages'] + 1):
+            response = client.get(f'/api/history?page={page}&per_page={per_page}').get_json()
+            offset_pages.append([analysis['id'] for analysis in response['analyses']])
+        
+        # Forward with ?after=, then back again with ?before=
+        keyset_pages = []
+        response = client.get(f'/api/history?per_page={per_page}').get_json()
+        while True:
+            keyset_pages.append([analysis['id'] for analysis in response['analyses']])
+            if not response['has_more']:
+                break
+            response = client.get(f"/api/history?per_page={per_page}&after={response['next_after']}").get_json()
+        backward_pages = [keyset_pages[-1]]
+        while response['prev_before'] is not None:
+            response = client.get(f"/api/history?per_page={per_page}&before={response['prev_before']}").get_json()
+            backward_pages.insert(0, [analysis['id'] for analysis in response['analyses']])
+        
+        offset_ids = [analysis_id for page in offset_pages for analysis_id in page]
+        if len(set(offset_ids)) != len(offset_ids) or len(offset_ids) != first['total']:
+            print("❌ ?page= pages repeat or skip rows")
+            return False
+        if keyset_pages != offset_pages:
+            print("❌ ?after= pages differ from ?page= pages")
+            return False
+        if backward_pages != offset_pages:
+            print("❌ ?before= pages differ from ?page= pages")
+            return False
+        
+        # A ?prediction= filter holds on both paths and in the page's cursor links;
+        # more than one 20-row /history page of matches
+        import re
+        with flask_app.app.app_context():
+            rows = [
+                flask_app._analysis_values(f"Filtered article {i}", "Filtered article content.",
+                                           dict(SAMPLE_RESULT, prediction='Real'))
+                for i in range(21)
+            ]
+            flask_app.db.session.execute(flask_app.db.insert(flask_app.NewsAnalysis), rows)
+            flask_app.db.session.commit()
+        filtered_offset = []
+        page = 1
+        while True:
+            response = client.get(f'/api/history?page={page}&per_page=3&prediction=Real').get_json()
+            filtered_offset.append([analysis['id'] for analysis in response['analyses']])
+            if page >= response['pages']:
+                break
+            page += 1
+        filtered_keyset = []
+        query = 'per_page=3&prediction=Real'
+        while True:
+            response = client.get(f'/api/history?{query}').get_json()
+            if any(analysis['prediction'] != 'Real' for analysis in response['analyses']):
+                print(f"❌ A filtered page returned other predictions: ?{query}")
+                return False
+            filtered_keyset.append([analysis['id'] for analysis in response['analyses']])
+            if not response['has_more']:
+                break
+            query = f"per_page=3&prediction=Real&after={response['next_after']}"
+        if filtered_keyset != filtered_offset or len(filtered_keyset) < 2:
+            print("❌ Filtered ?after= pages differ from filtered ?page= pages")
+            return False
+        html = client.get('/history?prediction=Real').get_data(as_text=True)
+        older = re.search(r'href="(/history\?[^"]*after=[^"]*)"', html)
+        if older is None or 'prediction=Real' not in older.group(1):
+            print(f"❌ The history page's Older link drops the filter: {older and older.group(1)}")
+            return False
+        if 'prediction=Real' not in client.get('/history?page=1&prediction=Real').get_data(as_text=True):
+            print("❌ The ?page= links drop the filter")
+            return False
+        
+        print(f"✅ {len(offset_pages)} pages of {first['total']} analyses match in both directions")
+        return True
+        
+    except Exception as e:
+        print(f"❌ History pagination test failed: {e}")
+        return False
+
+def _write_articles_csv(path, title, count):
+    """Small article CSV in the notebook's Fake.csv/True.csv layout"""
+    import csv
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['title', 'text', 'subject', 'date'])
+        for i in range(count):
+            writer.writerow([f"{title} {i}", f"{title} article number {i} with some body text.", 'news', 'January 1, 2017'])
+
+def test_bulk_resume():
+    """Test that an interrupted bulk scoring run resumes without duplicates or gaps"""
+    print("\n🧪 Testing Bulk Scoring Resume...")
+    try:
+        import json
+        from bulk_scoring import read_checkpoint, score_file
+        
+        directory = tempfile.mkdtemp(prefix='fake_news_test_')
+        source = os.path.join(directory, 'articles.csv')
+        _write_articles_csv(source, "Bulk", 11)
+        read_rows = lambda path: [json.loads(line) for line in open(path, encoding='utf-8')]
+        
+        complete = os.path.join(directory, 'complete.jsonl')
+        score_file(source, complete, chunk_size=3, progress_interval=3600)
+        
+        # Stop after 5 records, then leave a half-written line past the checkpoint as a crash would
+        resumed = os.path.join(directory, 'resumed.jsonl')
+        score_file(source, resumed, chunk_size=3, limit=5, progress_interval=3600)
+        if read_checkpoint(resumed)['records'] != 5:
+            print("❌ The checkpoint does not record the interrupted run's 5 records")
+            return False
+        with open(resumed, 'ab') as f:
+            f.write(b'{"index": 5, "predic')
+        summary = score_file(source, resumed, chunk_size=3, resume=True, progress_interval=3600)
+        
+        expected, rows = read_rows(complete), read_rows(resumed)
+        if [row['index'] for row in rows] != list(range(11)) or summary['scored_this_run'] != 6:
+            print(f"❌ Resumed output has duplicates or gaps: {[row['index'] for row in rows]}")
+            return False
+        for row, reference in zip(rows, expected):
+            # Chunks are batched differently after the resume, so allow padding noise
+            if row['prediction'] != reference['prediction'] or row['suspicion_patterns'] != reference['suspicion_patterns'] \
+                    or abs(row['fake_probability'] - reference['fake_probability']) > 1e-4:
+                print(f"❌ Record {row['index']} differs from the uninterrupted run")
+                return False
+        
+        print("✅ Interrupted run resumed after 5 of 11 records, output matches an uninterrupted run")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Bulk scoring resume test failed: {e}")
+        return False
+
+class _StubTokenizer:
+    """Word-level tokenizer; ``shift`` changes its vocabulary and so its fingerprint"""
+
+    name_or_path = 'stub-tokenizer'
+    special_tokens_map = {'cls_token': '[CLS]', 'sep_token': '[SEP]'}
+
+    def __init__(self, shift=0):
+        self.shift = shift
+
+    def get_vocab(self):
+        return {'[CLS]': 1, '[SEP]': 2, '[UNK]': 3 + self.shift}
+
+    def encode_text(self, text):
+        return [1] + [10 + self.shift + len(word) for word in text.split()] + [2]
+
+    def __call__(self, texts, add_special_tokens=True, truncation=False, max_length=None):
+        encoded = [self.encode_text(text) for text in texts]
+        if truncation:
+            encoded = [ids[:max_length - 1] + [2] if len(ids) > max_length else ids for ids in encoded]
+        return {'input_ids': encoded}
+
+def test_corpus_store_rebuild():
+    """Test that the token store is reused as is and rebuilt when the tokenizer changes"""
+    print("\n🧪 Testing Corpus Store Rebuild...")
+    try:
+        import corpus_store
+        
+        directory = tempfile.mkdtemp(prefix='fake_news_test_')
+        fake_path, true_path = os.path.join(directory, 'Fake.csv'), os.path.join(directory, 'True.csv')
+        _write_articles_csv(fake_path, "Fake", 4)
+        _write_articles_csv(true_path, "True", 3)
+        path = os.path.join(directory, 'corpus')
+        ids_inode = lambda: os.stat(os.path.join(path, 'ids.int32')).st_ino
+        
+        tokenizer = _StubTokenizer()
+        store = corpus_store.open_or_build(path, tokenizer, fake_path, true_path, max_length=64)
+        first = corpus_store.bert_input("Fake 0", "Fake article number 0 with some body text.")
+        if (len(store) != 7 or list(store.token_ids(0)) != tokenizer.encode_text(first)
+                or list(store.labels) != [0, 1, 0, 1, 0, 1, 0]):
+            print("❌ The built store does not hold the tokenized articles in dataset order")
+            return False
+        
+        built = ids_inode()
+        corpus_store.open_or_build(path, _StubTokenizer(), fake_path, true_path, max_length=64)
+        if ids_inode() != built:
+            print("❌ An up-to-date store was rebuilt")
+            return False
+        
+        changed = _StubTokenizer(shift=5)
+        if store.mismatch(changed, 64) != "tokenizer files changed" or not store.mismatch(tokenizer, 32):
+            print("❌ A changed tokenizer or max_length was not detected")
+            return False
+        rebuilt = corpus_store.open_or_build(path, changed, fake_path, true_path, max_length=64)
+        if ids_inode() == built or list(rebuilt.token_ids(0)) != changed.encode_text(first):
+            print("❌ The store was not rebuilt with the new tokenizer")
+            return False
+        if rebuilt.manifest['tokenizer']['fingerprint'] == store.manifest['tokenizer']['fingerprint']:
+            print("❌ The rebuilt store kept the old tokenizer fingerprint")
+            return False
+        
+        print(f"✅ Store of {len(rebuilt)} articles reused unchanged and rebuilt for a new tokenizer")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Corpus store rebuild test failed: {e}")
+        return False
+
+def test_evaluation_metrics():
+    """Test the evaluation metrics and a threshold re-run served from the score cache"""
+    print("\n🧪 Testing Evaluation Metrics...")
+    try:
+        from dataset import FAKE_LABEL, REAL_LABEL, iter_labeled_articles
+        from evaluation import Metrics, ScoreCache, evaluate, model_fingerprint
+        from result_cache import content_key
+        
+        # Known matrix: 3 true positives, 1 false negative, 2 false positives, 4 true negatives
+        metrics = Metrics()
+        for label, predicted, count in ((FAKE_LABEL, FAKE_LABEL, 3), (FAKE_LABEL, REAL_LABEL, 1),
+                                        (REAL_LABEL, FAKE_LABEL, 2), (REAL_LABEL, REAL_LABEL, 4)):
+            for _ in range(count):
+                metrics.add(label, predicted)
+        report = metrics.report()
+        expected = {'articles': 10, 'accuracy': 0.7, 'precision': 0.6, 'recall': 0.75, 'f1': 0.6667,
+                    'real_precision': 0.8, 'real_recall': 0.6667}
+        if any(report[name] != value for name, value in expected.items()):
+            print(f"❌ Wrong metrics: {report}")
+            return False
+        if report['confusion_matrix'] != {'Fake': {'Fake': 3, 'Real': 1}, 'Real': {'Fake': 2, 'Real': 4}}:
+            print(f"❌ Wrong confusion matrix: {report['confusion_matrix']}")
+            return False
+        
+        # Every article's scores cached: re-runs with another threshold never load the model
+        directory = tempfile.mkdtemp(prefix='fake_news_test_')
+        fake_path, true_path = os.path.join(directory, 'Fake.csv'), os.path.join(directory, 'True.csv')
+        _write_articles_csv(fake_path, "Fake", 4)
+        _write_articles_csv(true_path, "True", 3)
+        cache_path = os.path.join(directory, 'evaluation_cache.sqlite')
+        cache = ScoreCache(cache_path)
+        cache.set_score_version(model_fingerprint(None), 'test-scores')
+        entries = []
+        for article in iter_labeled_articles(fake_path, true_path):
+            # Combined score 0.78 for fake articles, 0.22 for real ones and 0.66 for "True 0"
+            suspicion, pipeline_score = (0.9, 0.8) if article['label'] == FAKE_LABEL else (0.1, 0.2)
+            if article['title'] == "True 0":
+                suspicion, pipeline_score = 0.7, 0.7
+            entries.append((content_key(article['title'], article['text']), {
+                'suspicion_patterns': suspicion, 'pipeline_score': pipeline_score,
+                'token_diversity': 0.5, 'text_length': 9
+            }))
+        cache.put_many(entries, 'test-scores')
+        cache.close()
+        
+        default = evaluate(fake_path, true_path, cache_path=cache_path, progress_interval=3600)
+        strict = evaluate(fake_path, true_path, cache_path=cache_path, threshold=0.7, progress_interval=3600)
+        if default['cached'] != 7 or default['scored'] or strict['scored']:
+            print("❌ The re-run scored articles instead of reading the cache")
+            return False
+        if default['confusion_matrix']['Real'] != {'Fake': 1, 'Real': 2} or strict['accuracy'] != 1.0:
+            print("❌ The threshold was not applied to the cached scores")
+            return False
+        
+        print(f"✅ Metrics match the known matrix, threshold re-run from the cache: "
+              f"accuracy {default['accuracy']} -> {strict['accuracy']}")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Evaluation metrics test failed: {e}")
+        return False
+
+def test_profile_access():
+    """Test that stored profiles are served to direct localhost requests or the admin token only"""
+    print("\n🧪 Testing Profile Access...")
+    import app as flask_app
+    import profiling
+    shared_profiler = flask_app.request_profiler
+    try:
+        flask_app.request_profiler = profiling.RequestProfiler(
+            tempfile.mkdtemp(prefix='fake_news_test_'), admin_token='test-admin-token'
+        )
+        client = flask_app.app.test_client()
+        remote = {'REMOTE_ADDR': '203.0.113.7'}
+        cases = [
+            ("direct localhost", {}, {}, True),
+            ("X-Forwarded-For", {'X-Forwarded-For': '203.0.113.7'}, {}, False),
+            ("X-Real-IP", {'X-Real-IP': '203.0.113.7'}, {}, False),
+            ("Forwarded", {'Forwarded': 'for=203.0.113.7'}, {}, False),
+            ("ProxyFix environ", {}, {'werkzeug.proxy_fix.orig': {'REMOTE_ADDR': '203.0.113.7'}}, False),
+            ("remote address", {}, remote, False),
+            ("wrong token", {'X-Admin-Token': 'guess'}, remote, False),
+            ("admin token", {'X-Admin-Token': 'test-admin-token'}, remote, True),
+            ("admin token via proxy", {'X-Admin-Token': 'test-admin-token', 'X-Forwarded-For': '203.0.113.7'}, {}, True),
+        ]
+        # The file endpoint answers 404 for a missing profile once access is granted
+        urls = ('/api/profiles', '/api/profiles/20240101T120000_analyze_news_3f2a9c/meta.json')
+        for name, headers, environ, allowed in cases:
+            for url in urls:
+                status = client.get(url, headers=headers, environ_overrides=environ).status_code
+                if (status != 403) != allowed:
+                    print(f"❌ {name}: {url} answered {status}")
+                    return False
+        
+        print(f"✅ {len(cases)} access cases checked on both profile endpoints")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Profile access test failed: {e}")
+        return False
+    finally:
+        flask_app.request_profiler = shared_profiler
+
+def _rejection_count(queue):
+    """Value of fakenews_rejected_requests_total for a queue (None without prometheus_client)"""
+    import metrics
+    if not metrics.AVAILABLE:
+        return None
+    return metrics.prometheus_client.REGISTRY.get_sample_value(
+        'fakenews_rejected_requests_total', {'queue': queue}
+    ) or 0.0
+
+def test_admission_control():
+    """Test that requests beyond the inference queue get 503 with Retry-After"""
+    print("\n🧪 Testing Admission Control...")
+    import app as flask_app
+    from inference_executor import InferenceExecutor
+    shared_executor = flask_app.inference_executor
+    shared_batcher = flask_app.micro_batcher
+    shared_detector = flask_app.detector
+    blocked = _StubDetector()
+    try:
+        flask_app.detector_loader.wait()
+        blocked.release.clear()
+        executor = InferenceExecutor(workers=1, max_queue_size=1, max_queue_wait=30, name='inference')
+        flask_app.inference_executor = executor
+        flask_app.micro_batcher = None
+        flask_app.detector = blocked
+        
+        # One prediction running and one waiting fill the pool and its queue
+        holders = [Thread(target=executor.submit, args=(blocked.predict, f"Held {i}", "Held article"))
+                   for i in range(2)]
+        holders[0].start()
+        blocked.started.wait(5)
+        holders[1].start()
+        if not _wait_until(lambda: executor.stats()['queue_depth'] == 1):
+            print("❌ The second prediction was never queued")
+            return False
+        
+        rejections = _rejection_count('inference')
+        response = flask_app.app.test_client().post('/analyze', json={
+            'title': "Overflow", 'content': f"Rejected article {time.time()}"
+        })
+        if response.status_code != 503 or \
+                response.headers.get('Retry-After') != str(flask_app.EXECUTOR_CONFIG['retry_after']):
+            print(f"❌ Overflow request answered {response.status_code}, Retry-After "
+                  f"{response.headers.get('Retry-After')}")
+            return False
+        if executor.stats()['rejected'] != 1:
+            print(f"❌ Executor counted {executor.stats()['rejected']} rejections")
+            return False
+        if rejections is not None and _rejection_count('inference') != rejections + 1:
+            print("❌ fakenews_rejected_requests_total{queue=\"inference\"} did not go up")
+            return False
+        
+        blocked.release.set()
+        for holder in holders:
+            holder.join()
+        if executor.stats()['completed'] != 2:
+            print(f"❌ Admitted predictions did not complete: {executor.stats()}")
+            return False
+        
+        print("✅ Overflow request answered 503 with Retry-After and counted as rejected")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Admission control test failed: {e}")
+        return False
+    finally:
+        blocked.release.set()
+        flask_app.inference_executor = shared_executor
+        flask_app.micro_batcher = shared_batcher
+        flask_app.detector = shared_detector
+
+def test_prefork_lazy_loading():
+    """Test that a preloaded master with lazy loading forks before the model is loaded"""
+    print("\n🧪 Testing Pre-fork With Lazy Loading...")
+    import gc
+    import threading
+    import types
+    from contextlib import nullcontext
+    import prefork
+    from config import STARTUP_CONFIG
+    from startup import BackgroundLoader
+    lazy = STARTUP_CONFIG['lazy_model_loading']
+    release = threading.Event()
+    try:
+        STARTUP_CONFIG['lazy_model_loading'] = True
+        if prefork.wanted():
+            print("❌ Pre-fork mode stayed on with lazy model loading")
+            return False
+        
+        loader = BackgroundLoader(lambda: release.wait(30))
+        loader.start()
+        app_module = types.SimpleNamespace(
+            detector_loader=loader, detector=None,
+            app=types.SimpleNamespace(app_context=nullcontext),
+            db=types.SimpleNamespace(engine=types.SimpleNamespace(dispose=lambda: None))
+        )
+        master = Thread(target=prefork.prepare_master, args=(app_module,), daemon=True)
+        master.start()
+        master.join(5)
+        if master.is_alive() or loader.state != BackgroundLoader.LOADING:
+            print(f"❌ prepare_master waited for the model (loader {loader.state})")
+            return False
+        
+        # The worker forked mid-load starts its own load
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if loader.state == BackgroundLoader.LOADING else 1)
+        _, status = os.waitpid(pid, 0)
+        if os.WEXITSTATUS(status) != 0:
+            print("❌ The forked worker did not restart the model load")
+            return False
+        
+        print("✅ Forked before the model finished loading; the worker loads its own copy")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Pre-fork lazy loading test failed: {e}")
+        return False
+    finally:
+        release.set()
+        STARTUP_CONFIG['lazy_model_loading'] = lazy
+        prefork._prepared = False
+        gc.unfreeze()
+
+def _wait_for_job(client, status_url, done, timeout=60):
+    """Poll a job's status until done(job) or the timeout; returns the last job"""
+    deadline = time.time() + timeout
+    while True:
+        job = client.get(status_url).get_json()['job']
+        if done(job) or time.time() > deadline:
+            return job
+        time.sleep(0.05)
+
+def test_background_jobs():
+    """Test submitting, polling and cancelling background scoring jobs"""
+    print("\n🧪 Testing Background Jobs...")
+    import app as flask_app
+    chunk_size = flask_app.JOBS_CONFIG['chunk_size']
+    try:
+        flask_app.detector_loader.wait()
+        flask_app.JOBS_CONFIG['chunk_size'] = 2
+        client = flask_app.app.test_client()
+        articles = lambda count: {'articles': [
+            {'title': f"Job article {i}", 'content': f"Background job article number {i} for scoring."}
+            for i in range(count)
+        ]}
+        
+        response = client.post('/api/jobs', json=articles(5))
+        if response.status_code != 202:
+            print(f"❌ Job submission failed: {response.status_code}")
+            return False
+        status_url = response.headers['Location']
+        job = _wait_for_job(client, status_url, lambda job: job['status'] in ('completed', 'failed'))
+        results = client.get(f'{status_url}?per_page=10').get_json()['results']
+        if job['status'] != 'completed' or job['processed'] != 5 or len(results) != 5:
+            print(f"❌ Job did not complete: {job}")
+            return False
+        if [result['position'] for result in results] != list(range(5)):
+            print("❌ Job results are not in input order")
+            return False
+        
+        # Cancel while running: the chunk in flight is dropped, nothing more is scored
+        response = client.post('/api/jobs', json=articles(400))
+        status_url = response.headers['Location']
+        job = _wait_for_job(client, status_url, lambda job: job['status'] != 'queued' and job['processed'] > 0)
+        if job['status'] != 'running':
+            print(f"❌ Job was not caught running: {job['status']}")
+            return False
+        cancelled = client.delete(status_url)
+        if cancelled.status_code != 200 or cancelled.get_json()['job']['status'] != 'cancelled':
+            print(f"❌ Cancelling a running job failed: {cancelled.status_code}")
+            return False
+        processed = cancelled.get_json()['job']['processed']
+        time.sleep(1)
+        job = client.get(status_url).get_json()['job']
+        if job['status'] != 'cancelled' or job['processed'] != processed or processed >= 400:
+            print(f"❌ Cancelled job kept running: {job}")
+            return False
+        if client.delete(status_url).status_code != 409:
+            print("❌ Cancelling a cancelled job did not answer 409")
+            return False
+        
+        print(f"✅ Job completed with 5 ordered results, running job cancelled after {processed}/400")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Background jobs test failed: {e}")
+        return False
+    finally:
+        flask_app.JOBS_CONFIG['chunk_size'] = chunk_size
+
+def test_job_lease():
+    """Test that a lapsed job lease is taken over and a slow chunk keeps its lease"""
+    print("\n🧪 Testing Job Leases...")
+    try:
+        import threading
+        import uuid
+        from datetime import datetime, timedelta
+        import app as flask_app
+        from jobs import JobRunner
+        
+        flask_app.detector_loader.wait()
+        client = flask_app.app.test_client()
+        job_id = uuid.uuid4().hex
+        crashed = 'crashed-host:1:0'
+        with flask_app.app.app_context():
+            db = flask_app.db
+            db.session.add(flask_app.ScoringJob(
+                id=job_id, status='running', source='batch', total=3, owner=crashed,
+                heartbeat_at=datetime.utcnow(), created_at=datetime.utcnow()
+            ))
+            db.session.flush()
+            db.session.execute(db.insert(flask_app.ScoringJobItem), [
+                {'job_id': job_id, 'position': i, 'title': f"Leased article {i}",
+                 'content': "Article of a job whose runner crashed.", 'status': 'pending'}
+                for i in range(3)
+            ])
+            db.session.commit()
+            runnable = lambda: db.session.execute(
+                db.select(flask_app.ScoringJob.id).where(flask_app.ScoringJob.id == job_id, flask_app._runnable_job())
+            ).scalar()
+            
+            if runnable() is not None:
+                print("❌ A job with a fresh heartbeat was runnable")
+                return False
+            if not flask_app._heartbeat_job(job_id, crashed) or flask_app._heartbeat_job(job_id, 'other-host:1:0'):
+                print("❌ Only the owner may renew a lease")
+                return False
+            
+            # The runner stops heartbeating: once the lease lapses any runner takes over
+            db.session.execute(db.update(flask_app.ScoringJob).where(flask_app.ScoringJob.id == job_id).values(
+                heartbeat_at=datetime.utcnow() - timedelta(seconds=flask_app.JOBS_CONFIG['lease_seconds'] + 1)
+            ))
+            db.session.commit()
+            if runnable() != job_id:
+                print("❌ A job with a lapsed lease was not runnable")
+                return False
+        
+        flask_app.job_runner.start()
+        flask_app.job_runner.wake()
+        job = _wait_for_job(client, f'/api/jobs/{job_id}', lambda job: job['status'] in ('completed', 'failed'))
+        if job['status'] != 'completed' or job['processed'] != 3:
+            print(f"❌ The lapsed job was not taken over: {job}")
+            return False
+        
+        # A chunk slower than the heartbeat interval keeps renewing its lease
+        heartbeats = []
+        claimed = threading.Event()
+        runner = JobRunner(
+            lambda owner: None if claimed.is_set() else (claimed.set() or 'slow-job'),
+            lambda job_id, owner: time.sleep(0.5) or False,
+            lambda job_id, owner, error: None,
+            lambda job_id, owner: heartbeats.append(job_id) or True,
+            poll_interval=0.05, heartbeat_interval=0.1
+        )
+        runner.start()
+        time.sleep(0.8)
+        runner.stop()
+        if len(heartbeats) < 3 or set(heartbeats) != {'slow-job'}:
+            print(f"❌ The lease was not renewed during a slow chunk: {len(heartbeats)} heartbeats")
+            return False
+        
+        print(f"✅ Lapsed lease taken over and completed, slow chunk renewed its lease {len(heartbeats)} times")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Job lease test failed: {e}")
+        return False
+
 def test_api_endpoint():
     """Test API endpoint with a simple request"""
     print("\n🧪 Testing API Endpoint...")
@@ -160,8 +1321,27 @@ def main():
     
     tests = [
         ("Model Loading", test_model_loading),
+        ("Batch Prediction", test_batch_prediction),
+        ("Micro-Batching", test_micro_batching),
+        ("Long-Document Windows", test_long_document_windows),
+        ("Pattern Matcher", test_pattern_matcher),
+        ("Result Cache", test_result_cache),
+        ("Cache Invalidation", test_cache_invalidation),
+        ("Torch-free Import", test_torch_free_import),
         ("Flask Import", test_flask_import), 
         ("Flask Routes", test_flask_routes),
+        ("Statistics Flush", test_stats_flush),
+        ("Write-Behind Inserts", test_write_behind),
+        ("Write-Behind Shutdown", test_write_behind_shutdown),
+        ("History Pagination", test_history_pagination),
+        ("Bulk Scoring Resume", test_bulk_resume),
+        ("Corpus Store Rebuild", test_corpus_store_rebuild),
+        ("Evaluation Metrics", test_evaluation_metrics),
+        ("Profile Access", test_profile_access),
+        ("Admission Control", test_admission_control),
+        ("Pre-fork Lazy Loading", test_prefork_lazy_loading),
+        ("Background Jobs", test_background_jobs),
+        ("Job Leases", test_job_lease),
         # ("API Endpoint", test_api_endpoint),  # Commented out for safety
     ]
     
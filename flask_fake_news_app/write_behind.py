@@ -0,0 +1,214 @@
+"""
+Write-Behind Analysis Writer
+============================
+Optional asynchronous persistence of ``NewsAnalysis`` rows.
+
+Request threads enqueue row values and return immediately; a background
+thread drains the bounded queue and bulk-inserts rows in batches with a
+single executemany-style ``INSERT`` per transaction. Rows submitted together
+(for example one ``/api/analyze/batch`` request) are always written in the
+same transaction.
+
+When the queue is full the ``full_policy`` decides what happens:
+
+- ``'sync'``   write the rows inline on the request thread (default, never drops)
+- ``'block'``  wait up to ``block_timeout`` seconds for space, then write inline
+- ``'reject'`` raise ``QueueFullError`` so the caller can answer HTTP 503
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from batching import QueueFullError
+
+logger = logging.getLogger(__name__)
+
+FULL_POLICIES = ('sync', 'block', 'reject')
+
+# Queued by close(): the writer thread writes the rows it holds and exits
+_STOP = object()
+
+
+class AnalysisWriter:
+    """Bounded queue of row groups drained by one bulk-inserting thread"""
+
+    def __init__(self, insert_callback, max_queue_size=10000, batch_size=200,
+                 flush_interval=0.2, full_policy='sync', block_timeout=1.0):
+        if full_policy not in FULL_POLICIES:
+            raise ValueError(f"Unknown write-behind full_policy: {full_policy}")
+        self.insert_callback = insert_callback
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.full_policy = full_policy
+        self.block_timeout = block_timeout
+        self._queue = queue.Queue(maxsize=max_queue_size)
+
+        self._writer = None
+        self._writer_pid = None
+        self._start_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._closed = False
+
+        self.written = 0
+        self.batches = 0
+        self.inline_writes = 0
+        self.rejected = 0
+        self.failed = 0
+        atexit.register(self.close)
+
+    def submit(self, rows):
+        """Queue a group of row dictionaries for insertion"""
+        if not rows:
+            return
+        if self._closed:
+            self._write_inline(rows)
+            return
+        self._ensure_writer()
+
+        try:
+            if self.full_policy == 'block':
+                self._queue.put(rows, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(rows)
+            return
+        except queue.Full:
+            pass
+
+        if self.full_policy == 'reject':
+            with self._counter_lock:
+                self.rejected += 1
+            raise QueueFullError("Write-behind queue is full", queue='write_behind')
+        self._write_inline(rows)
+
+    def flush(self, timeout=30):
+        """Block until everything queued so far has been written"""
+        if self._writer is None or self._writer_pid != os.getpid() or not self._writer.is_alive():
+            # No live writer in this process: drain on the calling thread
+            self._drain()
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self, timeout=30):
+        """Write all pending rows and stop accepting queued work"""
+        if self._closed:
+            return
+        self._closed = True
+        writer = self._writer
+        if writer is not None and self._writer_pid == os.getpid() and writer.is_alive():
+            # Stop the writer instead of waiting out its flush_interval, so the
+            # rows it has already taken off the queue are written, then join it
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+                writer.join(timeout)
+            except queue.Full:
+                pass
+        self._drain()
+
+    def stats(self):
+        with self._counter_lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'written': self.written,
+                'batches': self.batches,
+                'inline_writes': self.inline_writes,
+                'rejected': self.rejected,
+                'failed': self.failed,
+                'full_policy': self.full_policy
+            }
+
+    def _ensure_writer(self):
+        # Threads do not survive fork, so start one writer per process
+        if self._writer is not None and self._writer_pid == os.getpid() and self._writer.is_alive():
+            return
+        with self._start_lock:
+            if self._writer is None or self._writer_pid != os.getpid() or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, name='analysis-writer', daemon=True)
+                self._writer_pid = os.getpid()
+                self._writer.start()
+
+    def _run(self):
+        while True:
+            # Wait for work, then give more rows up to flush_interval to arrive
+            group = self._queue.get()
+            if group is _STOP:
+                self._queue.task_done()
+                return
+            groups = [group]
+            row_count = len(group)
+            stopping = False
+            deadline = time.monotonic() + self.flush_interval
+            while row_count < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    group = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if group is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                groups.append(group)
+                row_count += len(group)
+            self._write_groups(groups)
+            if stopping:
+                return
+
+    def _take_ready(self, row_count):
+        """Take already-queued groups until the batch is full"""
+        groups = []
+        while row_count < self.batch_size:
+            try:
+                group = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if group is _STOP:
+                self._queue.task_done()
+                continue
+            groups.append(group)
+            row_count += len(group)
+        return groups
+
+    def _drain(self):
+        while True:
+            groups = self._take_ready(0)
+            if not groups:
+                return
+            self._write_groups(groups)
+
+    def _write_groups(self, groups):
+        try:
+            self._insert(groups)
+        finally:
+            for _ in groups:
+                self._queue.task_done()
+
+    def _insert(self, groups):
+        rows = [row for group in groups for row in group]
+        try:
+            self.insert_callback(rows)
+            with self._counter_lock:
+                self.written += len(rows)
+                self.batches += 1
+        except Exception as e:
+            if len(groups) > 1:
+                # Retry group by group so one bad row does not lose the whole batch
+                for group in groups:
+                    self._insert([group])
+                return
+            logger.error(f"Write-behind insert of {len(rows)} rows failed: {e}")
+            with self._counter_lock:
+                self.failed += len(rows)
+
+    def _write_inline(self, rows):
+        self.insert_callback(rows)
+        with self._counter_lock:
+            self.inline_writes += 1
+            self.written += len(rows)